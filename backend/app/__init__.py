@@ -16,10 +16,13 @@ from app.routes.favorites import favorites_bp
 from app.routes.watch_history import watch_history_bp
 from app.routes.profiles import profiles_bp
 from app.routes.user_profile import user_profile_bp
+from app.routes.recommendations import recommendations_bp
 from app.utils.auth import auth_debug_bp
+from app.utils.database import Database
+from app.utils.hashing import HashingOverloadedError
+from app.utils.log_config import configure_logging
+from app.utils.audit import get_audit_writer
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 def create_app(config_name='development'):
@@ -39,6 +42,12 @@ def create_app(config_name='development'):
     from app.config.config import config_by_name
     app.config.from_object(config_by_name[config_name])
     
+    # Queue-based logging, configured once per process
+    configure_logging(app)
+    
+    # Share one database connection and transaction per request
+    Database.init_app(app)
+    
     # Setup CORS with appropriate settings
     cors_origins = app.config.get('CORS_ORIGINS', 'http://localhost:3000')
     
@@ -63,12 +72,21 @@ def create_app(config_name='development'):
     app.register_blueprint(favorites_bp, url_prefix='/api/favorites')
     app.register_blueprint(watch_history_bp, url_prefix='/api/history')
     app.register_blueprint(user_profile_bp, url_prefix='/api/profile')
+    app.register_blueprint(recommendations_bp, url_prefix='/api/recommendations')
     app.register_blueprint(admin_bp, url_prefix='/api/admin')
     app.register_blueprint(auth_debug_bp, url_prefix='/api/debug')
     
     # Create upload directory if it doesn't exist
     os.makedirs(app.config.get('UPLOAD_FOLDER'), exist_ok=True)
     
+    # Start the audit writer with the first request each process serves, so
+    # entries spilled by a previous run are replayed; scripts and migrations
+    # that only create the app never start it
+    if app.config.get('AUDIT_ASYNC', True):
+        @app.before_request
+        def start_audit_writer():
+            get_audit_writer()
+    
     # Register error handlers
     @app.errorhandler(404)
     def handle_404(error):
@@ -79,6 +97,10 @@ def create_app(config_name='development'):
         logger.error(f"Internal server error: {error}")
         return {'message': 'Internal server error'}, 500
     
+    @app.errorhandler(HashingOverloadedError)
+    def handle_hashing_overloaded(error):
+        return {'message': 'Server is busy, please try again shortly'}, 503, {'Retry-After': '1'}
+    
     @app.route('/api/health')
     def health_check():
         return {'status': 'healthy'}, 200
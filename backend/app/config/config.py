@@ -10,6 +10,11 @@ class Config:
     SECRET_KEY = os.getenv('SECRET_KEY', 'dev_secret_key_change_in_production')
     DEBUG = os.getenv('DEBUG', 'True').lower() in ('true', '1', 't')
     
+    # Logging configurations
+    LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+    LOG_FORMAT = os.getenv('LOG_FORMAT', 'text')  # text or json
+    LOG_SAMPLE_RATES = os.getenv('LOG_SAMPLE_RATES', 'app.utils.auth=0.01,app.routes.access_codes=0.1')  # share of DEBUG records kept
+    
     # Database configurations
     DB_HOST = os.getenv('DB_HOST', 'localhost')
     DB_USER = os.getenv('DB_USER', 'root')
@@ -17,15 +22,109 @@ class Config:
     DB_NAME = os.getenv('DB_NAME', 'vortextv')
     DB_PORT = int(os.getenv('DB_PORT', 3306))
     
+    # Database connection pool configurations
+    DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 5))  # idle connections kept open
+    DB_POOL_MAX_OVERFLOW = int(os.getenv('DB_POOL_MAX_OVERFLOW', 10))  # extra connections allowed under load
+    DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', 30))  # seconds to wait for a free connection
+    DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', 3600))  # reconnect connections idle longer than this
+    DB_POOL_PRE_PING = os.getenv('DB_POOL_PRE_PING', 'True').lower() in ('true', '1', 't')
+    DB_REQUEST_SCOPED = os.getenv('DB_REQUEST_SCOPED', 'True').lower() in ('true', '1', 't')  # one connection and commit per request
+    
     # JWT configurations
     JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY', 'jwt_dev_secret_key_change_in_production')
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=1)
     JWT_REFRESH_TOKEN_EXPIRES = timedelta(days=30)
     
+    # Password hashing configurations
+    BCRYPT_ROUNDS = int(os.getenv('BCRYPT_ROUNDS', 12))  # cost factor; run scripts/calibrate_bcrypt.py to pick one
+    BCRYPT_WORKERS = int(os.getenv('BCRYPT_WORKERS', os.cpu_count() or 1))  # hashing processes, 0 hashes on the request thread
+    BCRYPT_MAX_PENDING = int(os.getenv('BCRYPT_MAX_PENDING', (os.cpu_count() or 1) * 4))  # running + queued hashes before 503s
+    
+    # Authentication cache configurations
+    AUTH_PRINCIPAL_CACHE_TTL = int(os.getenv('AUTH_PRINCIPAL_CACHE_TTL', 60))  # seconds a user/role lookup is reused
+    AUTH_PRINCIPAL_CACHE_MAX_ENTRIES = int(os.getenv('AUTH_PRINCIPAL_CACHE_MAX_ENTRIES', 10000))
+    ENTITLEMENT_CACHE_MAX_TTL = int(os.getenv('ENTITLEMENT_CACHE_MAX_TTL', 3600))  # cap on caching until the earliest expiry
+    ENTITLEMENT_CACHE_NEGATIVE_TTL = int(os.getenv('ENTITLEMENT_CACHE_NEGATIVE_TTL', 60))  # seconds a missing subscription is remembered
+    ENTITLEMENT_CACHE_MAX_ENTRIES = int(os.getenv('ENTITLEMENT_CACHE_MAX_ENTRIES', 10000))
+    ENTITLEMENT_SYNC_INTERVAL = float(os.getenv('ENTITLEMENT_SYNC_INTERVAL', 2))  # seconds between reads of other workers' entitlement changes
+    
     # TMDB API configurations
     TMDB_API_KEY = os.getenv('TMDB_API_KEY', 'b76df244c74bfa8348a64730afdaafeb')
     TMDB_API_BASE_URL = 'https://api.themoviedb.org/3'
     TMDB_IMAGE_BASE_URL = 'https://image.tmdb.org/t/p'
+    TMDB_POOL_SIZE = int(os.getenv('TMDB_POOL_SIZE', 20))  # keep-alive connections per worker
+    TMDB_CONNECT_TIMEOUT = float(os.getenv('TMDB_CONNECT_TIMEOUT', 3.05))
+    TMDB_READ_TIMEOUT = float(os.getenv('TMDB_READ_TIMEOUT', 10))
+    TMDB_MAX_RETRIES = int(os.getenv('TMDB_MAX_RETRIES', 3))  # retries on 429/5xx and connection errors
+    TMDB_RETRY_BACKOFF = float(os.getenv('TMDB_RETRY_BACKOFF', 0.3))  # exponential backoff factor in seconds
+    
+    # TMDB response cache configurations
+    TMDB_CACHE_ENABLED = os.getenv('TMDB_CACHE_ENABLED', 'True').lower() in ('true', '1', 't')
+    TMDB_CACHE_MAX_ENTRIES = int(os.getenv('TMDB_CACHE_MAX_ENTRIES', 2048))
+    TMDB_CACHE_MAX_BYTES = int(os.getenv('TMDB_CACHE_MAX_BYTES', 64 * 1024 * 1024))  # 64MB per worker
+    TMDB_CACHE_TTL_GENRES = int(os.getenv('TMDB_CACHE_TTL_GENRES', 24 * 60 * 60))  # 1 day
+    TMDB_CACHE_TTL_TRENDING = int(os.getenv('TMDB_CACHE_TTL_TRENDING', 5 * 60))  # 5 minutes
+    TMDB_CACHE_TTL_LISTS = int(os.getenv('TMDB_CACHE_TTL_LISTS', 15 * 60))  # popular, top rated, upcoming
+    TMDB_CACHE_STALE_TTL = int(os.getenv('TMDB_CACHE_STALE_TTL', 10 * 60))  # serve expired entries this long while refreshing
+    TMDB_CACHE_TTL_DETAILS = int(os.getenv('TMDB_CACHE_TTL_DETAILS', 60 * 60))  # full movie/TV details
+    TMDB_CACHE_TTL_SUMMARY = int(os.getenv('TMDB_CACHE_TTL_SUMMARY', 6 * 60 * 60))  # card summaries for list views
+    TMDB_REFRESH_WORKERS = int(os.getenv('TMDB_REFRESH_WORKERS', 4))  # background refresh threads per worker
+    
+    # TMDB batch fetch configurations
+    TMDB_BATCH_WORKERS = int(os.getenv('TMDB_BATCH_WORKERS', 10))  # concurrent upstream lookups per worker
+    TMDB_BATCH_DEADLINE = float(os.getenv('TMDB_BATCH_DEADLINE', 5))  # seconds before partial results are returned
+    
+    # Local content metadata store configurations
+    CONTENT_METADATA_ENABLED = os.getenv('CONTENT_METADATA_ENABLED', 'True').lower() in ('true', '1', 't')
+    CONTENT_METADATA_MAX_AGE = int(os.getenv('CONTENT_METADATA_MAX_AGE', 7 * 24 * 60 * 60))  # seconds before a stored title is refetched
+    
+    # Local search index configurations
+    SEARCH_INDEX_ENABLED = os.getenv('SEARCH_INDEX_ENABLED', 'True').lower() in ('true', '1', 't')
+    SEARCH_LOCAL_MIN_RESULTS = int(os.getenv('SEARCH_LOCAL_MIN_RESULTS', 5))  # fewer local matches fall back to TMDB
+    SEARCH_PAGE_SIZE = int(os.getenv('SEARCH_PAGE_SIZE', 20))
+    SEARCH_SUGGEST_MIN_LENGTH = int(os.getenv('SEARCH_SUGGEST_MIN_LENGTH', 2))  # characters typed before suggesting
+    SEARCH_SUGGEST_VIEWS_REFRESH = int(os.getenv('SEARCH_SUGGEST_VIEWS_REFRESH', 600))  # seconds between view count reloads
+    SEARCH_FUZZY_ENABLED = os.getenv('SEARCH_FUZZY_ENABLED', 'True').lower() in ('true', '1', 't')  # typo-tolerant fallback when TMDB finds nothing
+    SEARCH_FUZZY_MAX_RESULTS = int(os.getenv('SEARCH_FUZZY_MAX_RESULTS', 20))
+    
+    # Search result cache configurations
+    SEARCH_CACHE_ENABLED = os.getenv('SEARCH_CACHE_ENABLED', 'True').lower() in ('true', '1', 't')
+    SEARCH_CACHE_MAX_ENTRIES = int(os.getenv('SEARCH_CACHE_MAX_ENTRIES', 10000))  # least frequently used evicted first
+    SEARCH_CACHE_TTL = int(os.getenv('SEARCH_CACHE_TTL', 60 * 60))  # seconds
+    
+    # Watch history write-behind buffer configurations
+    WATCH_BUFFER_ENABLED = os.getenv('WATCH_BUFFER_ENABLED', 'True').lower() in ('true', '1', 't')  # off writes on the request thread
+    WATCH_BUFFER_FLUSH_INTERVAL = float(os.getenv('WATCH_BUFFER_FLUSH_INTERVAL', 2))  # seconds between flushes
+    WATCH_BUFFER_BATCH_SIZE = int(os.getenv('WATCH_BUFFER_BATCH_SIZE', 500))  # rows per statement; a full batch flushes early
+    WATCH_BUFFER_MAX_PENDING = int(os.getenv('WATCH_BUFFER_MAX_PENDING', 50000))  # rows held in memory before events are dropped
+    PROGRESS_MAX_EVENTS = int(os.getenv('PROGRESS_MAX_EVENTS', 100))  # progress reports accepted per heartbeat request
+    
+    # Admin listing pagination configurations
+    PAGINATION_MAX_PER_PAGE = int(os.getenv('PAGINATION_MAX_PER_PAGE', 100))
+    PAGINATION_COUNT_TTL = int(os.getenv('PAGINATION_COUNT_TTL', 60))  # seconds a listing total is reused
+    PAGINATION_COUNT_CACHE_MAX_ENTRIES = int(os.getenv('PAGINATION_COUNT_CACHE_MAX_ENTRIES', 1024))
+    
+    # Admin dashboard statistics configurations
+    DASHBOARD_STATS_REFRESH_INTERVAL = float(os.getenv('DASHBOARD_STATS_REFRESH_INTERVAL', 300))  # seconds between scheduled recomputes
+    
+    # Audit log writer configurations
+    AUDIT_ASYNC = os.getenv('AUDIT_ASYNC', 'True').lower() in ('true', '1', 't')  # off writes on the request thread
+    AUDIT_FLUSH_INTERVAL = float(os.getenv('AUDIT_FLUSH_INTERVAL', 1))  # longest wait before a batch is written
+    AUDIT_BATCH_SIZE = int(os.getenv('AUDIT_BATCH_SIZE', 500))  # rows per INSERT
+    AUDIT_MAX_QUEUE = int(os.getenv('AUDIT_MAX_QUEUE', 10000))  # entries held in memory before spilling to disk
+    AUDIT_SPILL_FILE = os.getenv('AUDIT_SPILL_FILE', os.path.join(os.getcwd(), 'audit_spill.jsonl'))
+    AUDIT_REPLAY_INTERVAL = float(os.getenv('AUDIT_REPLAY_INTERVAL', 60))  # seconds between spill file replays
+    AUDIT_RETENTION_MONTHS = int(os.getenv('AUDIT_RETENTION_MONTHS', 12))  # whole months kept in audit_log
+    AUDIT_ARCHIVE_DIR = os.getenv('AUDIT_ARCHIVE_DIR', os.path.join(os.getcwd(), 'audit_archive'))
+    AUDIT_PARTITION_MONTHS_AHEAD = int(os.getenv('AUDIT_PARTITION_MONTHS_AHEAD', 3))  # monthly partitions created in advance
+    
+    # Recommendation configurations
+    RECOMMENDATIONS_FILE = os.getenv('RECOMMENDATIONS_FILE', os.path.join(os.getcwd(), 'recommendations.npy'))
+    RECOMMENDATIONS_RELOAD_INTERVAL = float(os.getenv('RECOMMENDATIONS_RELOAD_INTERVAL', 60))  # seconds between checks for a rebuilt file
+    RECOMMENDATIONS_MAX_SEEDS = int(os.getenv('RECOMMENDATIONS_MAX_SEEDS', 100))  # recent titles per user recommendations start from
+    RECOMMENDATIONS_NEIGHBORS = int(os.getenv('RECOMMENDATIONS_NEIGHBORS', 50))  # similar titles kept per title
+    RECOMMENDATIONS_MIN_USERS = int(os.getenv('RECOMMENDATIONS_MIN_USERS', 2))  # titles with fewer users are left out
+    RECOMMENDATIONS_SHRINKAGE = float(os.getenv('RECOMMENDATIONS_SHRINKAGE', 10))  # damps similarities backed by few shared users
     
     # File storage configurations
     UPLOAD_FOLDER = os.path.join(os.getcwd(), 'uploads')
@@ -1,12 +1,12 @@
 from flask import Blueprint, request, jsonify
 from app.utils.database import Database
-from app.utils.auth import token_required
+from app.utils.audit import audit_log
+from app.utils.auth import token_required, invalidate_entitlement
+from app.utils.dashboard_stats import adjust_dashboard_stats
 from app.utils.access_code import AccessCodeGenerator
 from datetime import datetime
 import logging
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Create blueprint
@@ -17,11 +17,10 @@ access_codes_bp = Blueprint('access_codes', __name__)
 def generate_access_code():
     """Generate a new access code for the current user's subscription"""
     user_id = request.user['user_id']
-    logger.info(f"Access code generation request received for user_id: {user_id}")
+    logger.debug("Access code generation request received for user_id: %s", user_id)
     
     try:
         # Check if user has active subscription
-        logger.info(f"Checking subscription for user_id: {user_id}")
         subscription = Database.get_single_result(
             """
             SELECT s.subscription_id, s.end_date, p.max_access_codes, p.plan_name
@@ -32,12 +31,10 @@ def generate_access_code():
             (user_id,)
         )
         
-        logger.info(f"Subscription check result: {subscription}")
         if not subscription:
             return jsonify({'success': False, 'error': 'No active subscription found'}), 403
         
         # Check if user has reached the max number of access codes
-        logger.info(f"Checking access code count for user_id: {user_id}, subscription_id: {subscription['subscription_id']}")
         codes_count = Database.get_single_result(
             """
             SELECT COUNT(*) as count
@@ -47,7 +44,8 @@ def generate_access_code():
             (user_id, subscription['subscription_id'])
         )
         
-        logger.info(f"Current access codes count: {codes_count}")
+        logger.debug("User %s has %s access codes for subscription %s",
+                     user_id, codes_count['count'] if codes_count else 0, subscription['subscription_id'])
         if codes_count and codes_count['count'] >= subscription['max_access_codes']:
             return jsonify({
                 'success': False,
@@ -57,12 +55,9 @@ def generate_access_code():
             }), 403
         
         # Generate a formatted access code
-        logger.info(f"Generating access code for user_id: {user_id}")
         access_code = AccessCodeGenerator.generate_formatted_code()
-        logger.info(f"Generated access code: {access_code}")
         
         # Insert access code into database
-        logger.info(f"Inserting access code into database")
         # Use two separate queries for MySQL - first insert, then get the last inserted ID
         Database.execute_query(
             """
@@ -83,25 +78,20 @@ def generate_access_code():
             "SELECT LAST_INSERT_ID() as code_id", 
             ()
         )
-        logger.info(f"Database insert result - last insert ID: {code_id_result}")
         
         code_id = None
         if code_id_result and len(code_id_result) > 0:
             code_id = code_id_result[0]['code_id']
         
+        # Access code counts on the admin dashboard changed
+        adjust_dashboard_stats(access_code_stats={'total_codes': 1, 'available_codes': 1})
+        
         # Log audit
-        Database.execute_query(
-            """
-            INSERT INTO audit_log (user_id, action, details, ip_address)
-            VALUES (%s, %s, %s, %s)
-            """,
-            (
-                user_id,
-                'generate_access_code',
-                f"Access code generated for subscription {subscription['subscription_id']}",
-                request.remote_addr
-            ),
-            fetch=False
+        audit_log(
+            user_id,
+            'generate_access_code',
+            f"Access code generated for subscription {subscription['subscription_id']}",
+            request.remote_addr
         )
         
         # Calculate remaining codes
@@ -120,13 +110,14 @@ def generate_access_code():
             'generatedCodes': current_count
         }
         
-        logger.info(f"Returning success response with access code: {access_code}, remaining: {remaining_codes}")
+        logger.info(
+            "Access code generated",
+            extra={'user_id': user_id, 'code_id': code_id, 'remaining_codes': remaining_codes}
+        )
         return jsonify(response_data), 201
         
     except Exception as e:
-        logger.error(f"Error generating access code: {e}")
-        import traceback
-        logger.error(f"Traceback: {traceback.format_exc()}")
+        logger.error("Error generating access code: %s", e, exc_info=True)
         return jsonify({'success': False, 'error': f'Error generating access code: {str(e)}'}), 500
 
 @access_codes_bp.route('/redeem', methods=['POST'])
@@ -179,7 +170,7 @@ def redeem_access_code():
         # Get the access code
         access_code = Database.get_single_result(
             """
-            SELECT ac.code_id, ac.code, ac.created_by, ac.subscription_id, ac.expires_at,
+            SELECT ac.code_id, ac.code, ac.created_by, ac.subscription_id, ac.expires_at, ac.used_by,
                    s.user_id as owner_id, u.username as owner_username
             FROM access_codes ac
             JOIN subscriptions s ON ac.subscription_id = s.subscription_id
@@ -207,19 +198,18 @@ def redeem_access_code():
             fetch=False
         )
         
+        # Drop the cached entitlement so access changes on the next request
+        invalidate_entitlement(user_id)
+        
+        if access_code['used_by'] is None:
+            adjust_dashboard_stats(access_code_stats={'used_codes': 1, 'available_codes': -1})
+        
         # Log audit
-        Database.execute_query(
-            """
-            INSERT INTO audit_log (user_id, action, details, ip_address)
-            VALUES (%s, %s, %s, %s)
-            """,
-            (
-                user_id,
-                'redeem_access_code',
-                f"Access code {clean_code} redeemed from user {access_code['owner_username']}",
-                request.remote_addr
-            ),
-            fetch=False
+        audit_log(
+            user_id,
+            'redeem_access_code',
+            f"Access code {clean_code} redeemed from user {access_code['owner_username']}",
+            request.remote_addr
         )
         
         # Get subscription plan details
@@ -305,7 +295,7 @@ def revoke_access_code(code_id):
         # Check if the access code exists and was created by the user
         access_code = Database.get_single_result(
             """
-            SELECT code_id, code, used_by
+            SELECT code_id, code, used_by, is_active = TRUE AND expires_at > NOW() as is_current
             FROM access_codes
             WHERE code_id = %s AND created_by = %s
             """,
@@ -326,19 +316,18 @@ def revoke_access_code(code_id):
             fetch=False
         )
         
+        # The user who redeemed the code, if any, loses access
+        if access_code['used_by']:
+            invalidate_entitlement(access_code['used_by'])
+        elif access_code['is_current']:
+            adjust_dashboard_stats(access_code_stats={'available_codes': -1})
+        
         # Log audit
-        Database.execute_query(
-            """
-            INSERT INTO audit_log (user_id, action, details, ip_address)
-            VALUES (%s, %s, %s, %s)
-            """,
-            (
-                user_id,
-                'revoke_access_code',
-                f"Access code {access_code['code']} revoked",
-                request.remote_addr
-            ),
-            fetch=False
+        audit_log(
+            user_id,
+            'revoke_access_code',
+            f"Access code {access_code['code']} revoked",
+            request.remote_addr
         )
         
         return jsonify({'message': 'Access code revoked successfully'}), 200
@@ -1,11 +1,17 @@
 from flask import Blueprint, request, jsonify
 from app.utils.database import Database
-from app.utils.auth import token_required, admin_required, superadmin_required
+from app.utils.audit import audit_log, get_audit_writer
+from app.utils.auth import token_required, admin_required, superadmin_required, invalidate_principal, get_principal_cache, get_entitlement_cache
+from app.utils.hashing import HashingOverloadedError
 from app.utils.tmdb import TMDBApi
+from app.utils.watch_buffer import get_watch_buffer
+from app.utils.pagination import paginate, InvalidCursorError, get_count_cache
+from app.utils.dashboard_stats import get_dashboard_snapshot, adjust_dashboard_stats, ROLE_COUNT_FIELDS
+from app.utils.search_index import get_search_index
+from app.utils.search_cache import get_search_cache
+from app.utils.recommendations import get_recommendation_model
 import logging
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Create blueprint
@@ -15,151 +21,65 @@ admin_bp = Blueprint('admin', __name__)
 @token_required
 @admin_required
 def get_dashboard_stats():
-    """Get dashboard statistics"""
+    """Get dashboard statistics from the in-memory snapshot"""
     try:
-        # Get user stats
-        user_stats = Database.get_single_result(
-            """
-            SELECT 
-                COUNT(*) as total_users,
-                SUM(CASE WHEN role_id = 1 THEN 1 ELSE 0 END) as superadmin_count,
-                SUM(CASE WHEN role_id = 2 THEN 1 ELSE 0 END) as admin_count,
-                SUM(CASE WHEN role_id = 3 THEN 1 ELSE 0 END) as user_count,
-                COUNT(DISTINCT CASE WHEN last_login >= DATE_SUB(NOW(), INTERVAL 7 DAY) THEN user_id END) as active_users_last_week
-            FROM users
-            """
-        )
-        
-        # Get subscription stats
-        subscription_stats = Database.get_single_result(
-            """
-            SELECT 
-                COUNT(*) as total_subscriptions,
-                SUM(CASE WHEN is_active = TRUE AND end_date > NOW() THEN 1 ELSE 0 END) as active_subscriptions,
-                COUNT(DISTINCT user_id) as users_with_subscription
-            FROM subscriptions
-            """
-        )
+        stats, as_of = get_dashboard_snapshot().get()
         
-        # Get subscription plan distribution
-        subscription_plans = Database.execute_query(
-            """
-            SELECT 
-                p.plan_name,
-                COUNT(*) as count,
-                ROUND(SUM(p.price), 2) as total_revenue
-            FROM subscriptions s
-            JOIN subscription_plans p ON s.plan_id = p.plan_id
-            WHERE s.is_active = TRUE AND s.end_date > NOW()
-            GROUP BY p.plan_id, p.plan_name
-            ORDER BY count DESC
-            """
-        )
-        
-        # Get access code stats
-        access_code_stats = Database.get_single_result(
-            """
-            SELECT 
-                COUNT(*) as total_codes,
-                SUM(CASE WHEN used_by IS NOT NULL THEN 1 ELSE 0 END) as used_codes,
-                SUM(CASE WHEN used_by IS NULL AND is_active = TRUE AND expires_at > NOW() THEN 1 ELSE 0 END) as available_codes
-            FROM access_codes
-            """
-        )
-        
-        # Get recent user registrations (last 30 days)
-        recent_registrations = Database.execute_query(
-            """
-            SELECT DATE(created_at) as date, COUNT(*) as count
-            FROM users
-            WHERE created_at >= DATE_SUB(NOW(), INTERVAL 30 DAY)
-            GROUP BY DATE(created_at)
-            ORDER BY date DESC
-            """
-        )
-        
-        # Compile all stats
-        stats = {
-            'user_stats': user_stats,
-            'subscription_stats': subscription_stats,
-            'subscription_plans': subscription_plans,
-            'access_code_stats': access_code_stats,
-            'recent_registrations': recent_registrations
-        }
-        
-        return jsonify(stats), 200
+        return jsonify({**stats, 'as_of': as_of.isoformat()}), 200
         
     except Exception as e:
         logger.error(f"Error getting admin stats: {e}")
         return jsonify({'message': 'Error getting dashboard statistics'}), 500
 
+@admin_bp.route('/stats/refresh', methods=['POST'])
+@token_required
+@superadmin_required
+def refresh_dashboard_stats():
+    """Recompute dashboard statistics now instead of waiting for the background refresh"""
+    try:
+        stats, as_of = get_dashboard_snapshot().refresh()
+        
+        return jsonify({**stats, 'as_of': as_of.isoformat()}), 200
+    
+    except Exception as e:
+        logger.error(f"Error refreshing admin stats: {e}")
+        return jsonify({'message': 'Error refreshing dashboard statistics'}), 500
+
 @admin_bp.route('/users', methods=['GET'])
 @token_required
 @admin_required
 def get_users_with_roles():
     """Get all users with their roles"""
     try:
-        # Get query parameters for pagination
-        page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 10, type=int)
         role_filter = request.args.get('role')
         search = request.args.get('search')
         
-        offset = (page - 1) * per_page
-        
-        # Build query based on filters
-        query = """
-            SELECT u.user_id, u.username, u.email, r.role_name as role,
-                  u.created_at, u.last_login, u.is_active
-            FROM users u
-            JOIN roles r ON u.role_id = r.role_id
-            WHERE 1=1
-        """
+        # Build filters
+        conditions = []
         params = []
         
         if role_filter:
-            query += " AND r.role_name = %s"
+            conditions.append("r.role_name = %s")
             params.append(role_filter)
         
         if search:
-            query += " AND (u.username LIKE %s OR u.email LIKE %s)"
+            conditions.append("(u.username LIKE %s OR u.email LIKE %s)")
             params.append(f"%{search}%")
             params.append(f"%{search}%")
         
-        # Add ordering and pagination
-        query += " ORDER BY u.created_at DESC LIMIT %s OFFSET %s"
-        params.extend([per_page, offset])
-        
-        # Execute query
-        users = Database.execute_query(query, tuple(params))
-        
-        # Get total count for pagination
-        count_query = """
-            SELECT COUNT(*) as count
-            FROM users u
-            JOIN roles r ON u.role_id = r.role_id
-            WHERE 1=1
-        """
-        count_params = []
-        
-        if role_filter:
-            count_query += " AND r.role_name = %s"
-            count_params.append(role_filter)
+        # Newest first, paged by (created_at, user_id)
+        users, pagination = paginate(
+            """u.user_id, u.username, u.email, r.role_name as role,
+                  u.created_at, u.last_login, u.is_active""",
+            "users u JOIN roles r ON u.role_id = r.role_id",
+            conditions, params,
+            sort_column='u.created_at', id_column='u.user_id', table='users'
+        )
         
-        if search:
-            count_query += " AND (u.username LIKE %s OR u.email LIKE %s)"
-            count_params.append(f"%{search}%")
-            count_params.append(f"%{search}%")
+        return jsonify({'users': users, **pagination}), 200
         
-        count = Database.get_single_result(count_query, tuple(count_params) if count_params else None)
-        
-        return jsonify({
-            'users': users,
-            'total': count['count'] if count else 0,
-            'page': page,
-            'per_page': per_page,
-            'pages': (count['count'] // per_page) + (1 if count['count'] % per_page > 0 else 0) if count else 0
-        }), 200
+    except InvalidCursorError:
+        return jsonify({'message': 'Invalid cursor'}), 400
         
     except Exception as e:
         logger.error(f"Error getting users with roles: {e}")
@@ -233,7 +153,7 @@ def update_user(user_id):
                 
             # Check if user exists
             user = Database.get_single_result(
-                "SELECT username FROM users WHERE user_id = %s",
+                "SELECT username, role_id FROM users WHERE user_id = %s",
                 (user_id,)
             )
             
@@ -279,19 +199,21 @@ def update_user(user_id):
             fetch=False
         )
         
+        # Drop the cached principal so the change applies to the user's next request
+        invalidate_principal(user_id)
+        
+        if 'role' in data and user['role_id'] != role['role_id']:
+            adjust_dashboard_stats(user_stats={
+                ROLE_COUNT_FIELDS[user['role_id']]: -1,
+                ROLE_COUNT_FIELDS[role['role_id']]: 1
+            })
+        
         # Log audit
-        Database.execute_query(
-            """
-            INSERT INTO audit_log (user_id, action, details, ip_address)
-            VALUES (%s, %s, %s, %s)
-            """,
-            (
-                request.user['user_id'],
-                'update_user',
-                f"User updated: ID {user_id}",
-                request.remote_addr
-            ),
-            fetch=False
+        audit_log(
+            request.user['user_id'],
+            'update_user',
+            f"User updated: ID {user_id}",
+            request.remote_addr
         )
         
         return jsonify({'message': 'User updated successfully'}), 200
@@ -326,7 +248,7 @@ def update_user_role(user_id):
         
         # Check if user exists
         user = Database.get_single_result(
-            "SELECT username FROM users WHERE user_id = %s",
+            "SELECT username, role_id FROM users WHERE user_id = %s",
             (user_id,)
         )
         
@@ -360,19 +282,21 @@ def update_user_role(user_id):
             fetch=False
         )
         
+        # Drop the cached principal so the change applies to the user's next request
+        invalidate_principal(user_id)
+        
+        if user['role_id'] != role_id:
+            adjust_dashboard_stats(user_stats={
+                ROLE_COUNT_FIELDS[user['role_id']]: -1,
+                ROLE_COUNT_FIELDS[role_id]: 1
+            })
+        
         # Log audit
-        Database.execute_query(
-            """
-            INSERT INTO audit_log (user_id, action, details, ip_address)
-            VALUES (%s, %s, %s, %s)
-            """,
-            (
-                request.user['user_id'],
-                'update_user_role',
-                f"Updated role of user {user['username']} to {role}",
-                request.remote_addr
-            ),
-            fetch=False
+        audit_log(
+            request.user['user_id'],
+            'update_user_role',
+            f"Updated role of user {user['username']} to {role}",
+            request.remote_addr
         )
         
         return jsonify({'message': 'User role updated successfully'}), 200
@@ -420,22 +344,18 @@ def admin_reset_user_password(user_id):
         )
         
         # Log audit
-        Database.execute_query(
-            """
-            INSERT INTO audit_log (user_id, action, details, ip_address)
-            VALUES (%s, %s, %s, %s)
-            """,
-            (
-                request.user['user_id'],
-                'admin_reset_password',
-                f"Reset password for user {user['username']}",
-                request.remote_addr
-            ),
-            fetch=False
+        audit_log(
+            request.user['user_id'],
+            'admin_reset_password',
+            f"Reset password for user {user['username']}",
+            request.remote_addr
         )
         
         return jsonify({'message': 'Password reset successfully'}), 200
         
+    except HashingOverloadedError:
+        return jsonify({'message': 'Server is busy, please try again shortly'}), 503
+    
     except Exception as e:
         logger.error(f"Error resetting user password: {e}")
         return jsonify({'message': 'Error resetting user password'}), 500
@@ -446,71 +366,38 @@ def admin_reset_user_password(user_id):
 def get_all_subscriptions():
     """Get all subscriptions with user details"""
     try:
-        # Get query parameters for pagination
-        page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 10, type=int)
         status = request.args.get('status')  # active, expired, all
         search = request.args.get('search')
         
-        offset = (page - 1) * per_page
-        
-        # Build query based on filters
-        query = """
-            SELECT s.subscription_id, s.user_id, u.username, u.email,
-                   p.plan_name, s.start_date, s.end_date, s.is_active, s.payment_status
-            FROM subscriptions s
-            JOIN users u ON s.user_id = u.user_id
-            JOIN subscription_plans p ON s.plan_id = p.plan_id
-            WHERE 1=1
-        """
+        # Build filters
+        conditions = []
         params = []
         
         if status == 'active':
-            query += " AND s.is_active = TRUE AND s.end_date > NOW()"
+            conditions.append("s.is_active = TRUE AND s.end_date > NOW()")
         elif status == 'expired' or status == 'inactive':
-            query += " AND (s.is_active = FALSE OR s.end_date <= NOW())"
+            conditions.append("(s.is_active = FALSE OR s.end_date <= NOW())")
         
         if search:
-            query += " AND (u.username LIKE %s OR u.email LIKE %s)"
+            conditions.append("(u.username LIKE %s OR u.email LIKE %s)")
             params.append(f"%{search}%")
             params.append(f"%{search}%")
         
-        # Add ordering and pagination
-        query += " ORDER BY s.start_date DESC LIMIT %s OFFSET %s"
-        params.extend([per_page, offset])
-        
-        # Execute query
-        subscriptions = Database.execute_query(query, tuple(params) if params else None)
-        
-        # Get total count for pagination
-        count_query = """
-            SELECT COUNT(*) as count
-            FROM subscriptions s
+        # Newest first, paged by (start_date, subscription_id)
+        subscriptions, pagination = paginate(
+            """s.subscription_id, s.user_id, u.username, u.email,
+                   p.plan_name, s.start_date, s.end_date, s.is_active, s.payment_status""",
+            """subscriptions s
             JOIN users u ON s.user_id = u.user_id
-            JOIN subscription_plans p ON s.plan_id = p.plan_id
-            WHERE 1=1
-        """
-        count_params = []
-        
-        if status == 'active':
-            count_query += " AND s.is_active = TRUE AND s.end_date > NOW()"
-        elif status == 'expired' or status == 'inactive':
-            count_query += " AND (s.is_active = FALSE OR s.end_date <= NOW())"
+            JOIN subscription_plans p ON s.plan_id = p.plan_id""",
+            conditions, params,
+            sort_column='s.start_date', id_column='s.subscription_id', table='subscriptions'
+        )
         
-        if search:
-            count_query += " AND (u.username LIKE %s OR u.email LIKE %s)"
-            count_params.append(f"%{search}%")
-            count_params.append(f"%{search}%")
+        return jsonify({'subscriptions': subscriptions, **pagination}), 200
         
-        count = Database.get_single_result(count_query, tuple(count_params) if count_params else None)
-        
-        return jsonify({
-            'subscriptions': subscriptions,
-            'total': count['count'] if count else 0,
-            'page': page,
-            'per_page': per_page,
-            'pages': (count['count'] // per_page) + (1 if count['count'] % per_page > 0 else 0) if count else 0
-        }), 200
+    except InvalidCursorError:
+        return jsonify({'message': 'Invalid cursor'}), 400
         
     except Exception as e:
         logger.error(f"Error getting all subscriptions: {e}")
@@ -522,64 +409,35 @@ def get_all_subscriptions():
 def get_audit_logs():
     """Get audit logs"""
     try:
-        # Get query parameters for pagination
-        page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 20, type=int)
         action_filter = request.args.get('action')
         user_id_filter = request.args.get('user_id')
         
-        offset = (page - 1) * per_page
-        
-        # Build query based on filters
-        query = """
-            SELECT l.log_id, l.user_id, u.username, l.action, l.details, 
-                   l.ip_address, l.created_at
-            FROM audit_log l
-            LEFT JOIN users u ON l.user_id = u.user_id
-            WHERE 1=1
-        """
+        # Build filters
+        conditions = []
         params = []
         
         if action_filter:
-            query += " AND l.action = %s"
+            conditions.append("l.action = %s")
             params.append(action_filter)
         
         if user_id_filter:
-            query += " AND l.user_id = %s"
+            conditions.append("l.user_id = %s")
             params.append(int(user_id_filter))
         
-        # Add ordering and pagination
-        query += " ORDER BY l.created_at DESC LIMIT %s OFFSET %s"
-        params.extend([per_page, offset])
-        
-        # Execute query
-        logs = Database.execute_query(query, tuple(params) if params else None)
-        
-        # Get total count for pagination
-        count_query = """
-            SELECT COUNT(*) as count
-            FROM audit_log l
-            WHERE 1=1
-        """
-        count_params = []
-        
-        if action_filter:
-            count_query += " AND l.action = %s"
-            count_params.append(action_filter)
+        # Newest first, paged by (created_at, log_id)
+        logs, pagination = paginate(
+            """l.log_id, l.user_id, u.username, l.action, l.details,
+                   l.ip_address, l.created_at""",
+            "audit_log l LEFT JOIN users u ON l.user_id = u.user_id",
+            conditions, params,
+            sort_column='l.created_at', id_column='l.log_id', table='audit_log',
+            default_per_page=20
+        )
         
-        if user_id_filter:
-            count_query += " AND l.user_id = %s"
-            count_params.append(int(user_id_filter))
+        return jsonify({'logs': logs, **pagination}), 200
         
-        count = Database.get_single_result(count_query, tuple(count_params) if count_params else None)
-        
-        return jsonify({
-            'logs': logs,
-            'total': count['count'] if count else 0,
-            'page': page,
-            'per_page': per_page,
-            'pages': (count['count'] // per_page) + (1 if count['count'] % per_page > 0 else 0) if count else 0
-        }), 200
+    except InvalidCursorError:
+        return jsonify({'message': 'Invalid cursor'}), 400
         
     except Exception as e:
         logger.error(f"Error getting audit logs: {e}")
@@ -649,4 +507,26 @@ def admin_get_tv_shows():
         
     except Exception as e:
         logger.error(f"Error getting TV shows for admin: {e}")
-        return jsonify({'message': 'Error getting TV shows'}), 500 
\ No newline at end of file
+        return jsonify({'message': 'Error getting TV shows'}), 500 
+
+@admin_bp.route('/cache-stats', methods=['GET'])
+@token_required
+@admin_required
+def get_cache_stats():
+    """Get hit/miss counters for in-process caches"""
+    try:
+        return jsonify({
+            'tmdb': TMDBApi.cache_stats(),
+            'principals': get_principal_cache().stats(),
+            'entitlements': get_entitlement_cache().stats(),
+            'watch_buffer': get_watch_buffer().stats(),
+            'listing_totals': get_count_cache().stats(),
+            'audit_writer': get_audit_writer().stats(),
+            'search_index': get_search_index().stats(),
+            'search_results': get_search_cache().stats(),
+            'recommendations': get_recommendation_model().stats()
+        }), 200
+    
+    except Exception as e:
+        logger.error(f"Error getting cache stats: {e}")
+        return jsonify({'message': 'Error getting cache statistics'}), 500
\ No newline at end of file
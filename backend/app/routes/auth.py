@@ -1,10 +1,12 @@
 from flask import Blueprint, request, jsonify
 from app.utils.database import Database
-from app.utils.auth import hash_password, verify_password, generate_token, token_required
+from app.utils.audit import audit_log
+from app.utils.auth import hash_password, verify_password, needs_rehash, generate_token, token_required
+from app.utils.hashing import HashingOverloadedError
+from app.utils.dashboard_stats import adjust_dashboard_stats, ROLE_COUNT_FIELDS
+from datetime import date
 import logging
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Create blueprint
@@ -57,18 +59,17 @@ def register():
         token = generate_token(user_id, role['role_name'])
         
         # Log audit
-        Database.execute_query(
-            """
-            INSERT INTO audit_log (user_id, action, details, ip_address)
-            VALUES (%s, %s, %s, %s)
-            """,
-            (
-                user_id,
-                'register',
-                f"User registered with username {data['username']}",
-                request.remote_addr
-            ),
-            fetch=False
+        audit_log(
+            user_id,
+            'register',
+            f"User registered with username {data['username']}",
+            request.remote_addr
+        )
+        
+        # User counts on the admin dashboard changed
+        adjust_dashboard_stats(
+            user_stats={'total_users': 1, ROLE_COUNT_FIELDS[role_id]: 1},
+            recent_registrations={date.today(): 1}
         )
         
         return jsonify({
@@ -112,6 +113,18 @@ def login():
         if not verify_password(data['password'], user['password']):
             return jsonify({'message': 'Invalid username or password'}), 401
         
+        # Upgrade the stored hash to the configured cost while we have the password
+        if needs_rehash(user['password']):
+            try:
+                Database.execute_query(
+                    "UPDATE users SET password = %s WHERE user_id = %s",
+                    (hash_password(data['password']), user['user_id']),
+                    fetch=False
+                )
+            except HashingOverloadedError:
+                # Not worth failing the login over; retried on the next one
+                logger.warning(f"Skipped password rehash for user {user['user_id']}: hashing queue full")
+        
         # Generate token
         token = generate_token(user['user_id'], user['role_name'])
         
@@ -123,18 +136,11 @@ def login():
         )
         
         # Log audit
-        Database.execute_query(
-            """
-            INSERT INTO audit_log (user_id, action, details, ip_address)
-            VALUES (%s, %s, %s, %s)
-            """,
-            (
-                user['user_id'],
-                'login',
-                f"User logged in: {user['username']}",
-                request.remote_addr
-            ),
-            fetch=False
+        audit_log(
+            user['user_id'],
+            'login',
+            f"User logged in: {user['username']}",
+            request.remote_addr
         )
         
         return jsonify({
@@ -146,6 +152,9 @@ def login():
             'token': token
         }), 200
         
+    except HashingOverloadedError:
+        return jsonify({'message': 'Server is busy, please try again shortly'}), 503
+    
     except Exception as e:
         logger.error(f"Error logging in: {e}")
         return jsonify({'message': 'Error logging in'}), 500
@@ -203,18 +212,11 @@ def forgot_password():
         logger.info(f"Password reset link for {email}: {reset_link}")
         
         # Log audit
-        Database.execute_query(
-            """
-            INSERT INTO audit_log (user_id, action, details, ip_address)
-            VALUES (%s, %s, %s, %s)
-            """,
-            (
-                user['user_id'],
-                'forgot_password',
-                "Password reset requested",
-                request.remote_addr
-            ),
-            fetch=False
+        audit_log(
+            user['user_id'],
+            'forgot_password',
+            "Password reset requested",
+            request.remote_addr
         )
         
         return jsonify({'message': 'If your email is registered, you will receive a password reset link shortly'}), 200
@@ -274,22 +276,18 @@ def reset_password():
         )
         
         # Log audit
-        Database.execute_query(
-            """
-            INSERT INTO audit_log (user_id, action, details, ip_address)
-            VALUES (%s, %s, %s, %s)
-            """,
-            (
-                token_data['user_id'],
-                'reset_password',
-                "Password reset completed",
-                request.remote_addr
-            ),
-            fetch=False
+        audit_log(
+            token_data['user_id'],
+            'reset_password',
+            "Password reset completed",
+            request.remote_addr
         )
         
         return jsonify({'message': 'Password reset successfully'}), 200
         
+    except HashingOverloadedError:
+        return jsonify({'message': 'Server is busy, please try again shortly'}), 503
+    
     except Exception as e:
         logger.error(f"Error resetting password: {e}")
         return jsonify({'message': 'An error occurred while resetting your password'}), 500
@@ -335,22 +333,18 @@ def update_password():
         )
         
         # Log audit
-        Database.execute_query(
-            """
-            INSERT INTO audit_log (user_id, action, details, ip_address)
-            VALUES (%s, %s, %s, %s)
-            """,
-            (
-                user_id,
-                'update_password',
-                "User updated password",
-                request.remote_addr
-            ),
-            fetch=False
+        audit_log(
+            user_id,
+            'update_password',
+            "User updated password",
+            request.remote_addr
         )
         
         return jsonify({'message': 'Password updated successfully'}), 200
         
+    except HashingOverloadedError:
+        return jsonify({'message': 'Server is busy, please try again shortly'}), 503
+    
     except Exception as e:
         logger.error(f"Error updating password: {e}")
         return jsonify({'message': 'Error updating password'}), 500 
\ No newline at end of file
@@ -2,10 +2,9 @@ from flask import Blueprint, request, jsonify
 from app.utils.database import Database
 from app.utils.auth import token_required
 from app.utils.tmdb import TMDBApi
+from app.utils.content_store import parse_content_id
 import logging
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Create blueprint
@@ -29,44 +28,31 @@ def get_favorites():
             (user_id,)
         )
         
-        # Separate movie and TV show IDs
-        movie_ids = []
-        tv_ids = []
+        # Map content IDs to (media_type, tmdb_id) lookups
+        items = [parse_content_id(favorite['content_id']) for favorite in favorites]
         
-        for favorite in favorites:
-            content_id = favorite['content_id']
-            if content_id.startswith('tv_'):
-                # TV show
-                tv_ids.append(int(content_id.replace('tv_', '')))
-            else:
-                # Movie
-                movie_ids.append(int(content_id))
+        # Read card summaries from the local store, fetching missing or outdated ones from TMDB;
+        # titles that fail or miss the deadline are left out
+        details = TMDBApi.get_summaries(items)
         
-        # Get details for movies
         movies = []
-        if movie_ids:
-            # Fetch details in batches to avoid making too many API calls
-            for movie_id in movie_ids:
-                movie_details = TMDBApi.get_movie_details(movie_id)
-                if 'error' not in movie_details:
-                    movie_details['media_type'] = 'movie'
-                    movies.append(movie_details)
-        
-        # Get details for TV shows
         tv_shows = []
-        if tv_ids:
-            # Fetch details in batches to avoid making too many API calls
-            for tv_id in tv_ids:
-                tv_details = TMDBApi.get_tv_show_details(tv_id)
-                if 'error' not in tv_details:
-                    tv_details['media_type'] = 'tv'
-                    tv_shows.append(tv_details)
+        
+        for (media_type, _), content_details in zip(items, details):
+            if content_details is None:
+                continue
+            
+            if media_type == 'tv':
+                tv_shows.append(content_details)
+            else:
+                movies.append(content_details)
         
         # Combine and sort by added_at date
         combined_favorites = {
             'movies': movies,
             'tv_shows': tv_shows,
-            'total': len(movies) + len(tv_shows)
+            'total': len(movies) + len(tv_shows),
+            'partial': None in details
         }
         
         return jsonify(combined_favorites), 200
@@ -96,29 +82,19 @@ def add_to_favorites():
         db_content_id = str(content_id)
     
     try:
-        # Check if already in favorites
-        existing = Database.get_single_result(
+        # Add to favorites; the unique (user_id, content_id) key turns a duplicate into a no-op
+        affected, favorite_id = Database.execute_write(
             """
-            SELECT favorite_id
-            FROM favorites
-            WHERE user_id = %s AND content_id = %s
+            INSERT INTO favorites (user_id, content_id, added_at)
+            VALUES (%s, %s, NOW())
+            ON DUPLICATE KEY UPDATE favorite_id = favorite_id
             """,
             (user_id, db_content_id)
         )
         
-        if existing:
+        if affected == 0:
             return jsonify({'message': 'Content already in favorites'}), 409
         
-        # Add to favorites
-        favorite_id = Database.execute_query(
-            """
-            INSERT INTO favorites (user_id, content_id, added_at)
-            VALUES (%s, %s, NOW())
-            """,
-            (user_id, db_content_id),
-            fetch=False
-        )
-        
         return jsonify({
             'message': 'Added to favorites',
             'favorite_id': favorite_id
@@ -8,8 +8,6 @@ from flask_limiter.util import get_remote_address
 from datetime import timedelta
 import jwt
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Create blueprint
@@ -3,8 +3,6 @@ from app.utils.database import Database
 from app.utils.auth import token_required
 import logging
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Create blueprint
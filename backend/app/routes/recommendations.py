@@ -0,0 +1,80 @@
+from flask import Blueprint, request, jsonify, current_app
+from app.utils.database import Database
+from app.utils.auth import token_required
+from app.utils.tmdb import TMDBApi
+from app.utils.content_store import parse_content_id
+from app.utils.recommendations import get_recommendation_model, interaction_strength
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Create blueprint
+recommendations_bp = Blueprint('recommendations', __name__)
+
+@recommendations_bp.route('', methods=['GET'])
+@token_required
+def get_recommendations():
+    """Get titles recommended from the current user's ratings and watch history"""
+    user_id = request.user['user_id']
+    
+    try:
+        limit = min(max(request.args.get('limit', 20, type=int), 1), 50)
+        media_type = request.args.get('type')
+        
+        if media_type not in (None, 'movie', 'tv'):
+            return jsonify({'message': 'Invalid type; use movie or tv'}), 400
+        
+        max_seeds = current_app.config.get('RECOMMENDATIONS_MAX_SEEDS', 100)
+        
+        # The user's most recent titles; a rating wins over watch progress
+        history = Database.execute_query(
+            """
+            SELECT content_id, watch_percentage
+            FROM watch_history
+            WHERE user_id = %s
+            ORDER BY watched_at DESC
+            LIMIT %s
+            """,
+            (user_id, max_seeds)
+        )
+        ratings = Database.execute_query(
+            """
+            SELECT content_id, rating
+            FROM user_ratings
+            WHERE user_id = %s
+            ORDER BY created_at DESC
+            LIMIT %s
+            """,
+            (user_id, max_seeds)
+        )
+        
+        seeds = {row['content_id']: interaction_strength(watch_percentage=row['watch_percentage']) for row in history}
+        seeds.update((row['content_id'], interaction_strength(rating=row['rating'])) for row in ratings)
+        
+        # Rank generously so filtering by type still fills the page
+        model = get_recommendation_model()
+        content_ids = model.recommend(seeds, limit * 3)
+        source = 'similar'
+        if not content_ids:
+            content_ids = model.popular(limit * 3, exclude=seeds)
+            source = 'popular'
+        
+        items = [parse_content_id(content_id) for content_id in content_ids]
+        if media_type is not None:
+            items = [item for item in items if item[0] == media_type]
+        items = items[:limit]
+        
+        # Read card summaries from the local store, fetching missing or outdated ones from TMDB
+        details = TMDBApi.get_summaries(items)
+        results = [summary for summary in details if summary is not None]
+        
+        return jsonify({
+            'results': results,
+            'total': len(results),
+            'source': source,
+            'partial': None in details
+        }), 200
+    
+    except Exception as e:
+        logger.error(f"Error getting recommendations: {e}")
+        return jsonify({'message': 'Error getting recommendations'}), 500
\ No newline at end of file
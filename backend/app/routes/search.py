@@ -1,15 +1,62 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from app.utils.auth import token_required
 from app.utils.tmdb import TMDBApi
+from app.utils.search_index import search_catalog, fuzzy_search_catalog, suggest_titles, MAX_SUGGESTIONS
+from app.utils.search_cache import cached_search
 import logging
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Create blueprint
 search_bp = Blueprint('search', __name__)
 
+def run_search(query, page, media_type, tmdb_search):
+    """
+    Searches the local index, then TMDB, then locally known titles resembling the query
+    
+    Args:
+        query (str): Normalized query
+        page (int): Page number
+        media_type (str, optional): 'movie' or 'tv'; both when None
+        tmdb_search (callable): TMDBApi search method for the media type
+    
+    Returns:
+        dict: Search response
+    """
+    # Serve from the local index, asking TMDB only when it has too few matches
+    response = search_catalog(query, page, media_type=media_type)
+    if response is None:
+        response = tmdb_search(query, page)
+        
+        # Nothing found is usually a typo; offer close local titles instead
+        if not response.get('total_results'):
+            response = fuzzy_search_catalog(query, page, media_type=media_type) or response
+    
+    return response
+
+@search_bp.route('/suggest', methods=['GET'])
+@token_required
+def suggest():
+    """Suggest titles completing what has been typed into the search box"""
+    try:
+        query = request.args.get('query', '')
+        limit = request.args.get('limit', 10, type=int)
+        media_type = request.args.get('type')
+        
+        if media_type not in (None, 'movie', 'tv'):
+            return jsonify({'message': 'Invalid type; use movie or tv'}), 400
+        
+        # Completions are answered locally only, never from TMDB
+        suggestions = []
+        if len(query.strip()) >= current_app.config.get('SEARCH_SUGGEST_MIN_LENGTH', 2):
+            suggestions = suggest_titles(query, min(max(limit, 1), MAX_SUGGESTIONS), media_type)
+        
+        return jsonify({'query': query, 'suggestions': suggestions}), 200
+    
+    except Exception as e:
+        logger.error(f"Error suggesting titles: {e}")
+        return jsonify({'message': 'Error suggesting titles'}), 500
+
 @search_bp.route('/multi', methods=['GET'])
 @token_required
 def search_multi():
@@ -21,7 +68,10 @@ def search_multi():
         if not query:
             return jsonify({'message': 'Missing search query'}), 400
         
-        response = TMDBApi.search_multi(query, page)
+        response = cached_search(
+            query, page, 'multi',
+            lambda normalized: run_search(normalized, page, None, TMDBApi.search_multi)
+        )
         
         if 'error' in response:
             return jsonify({'message': response['error']}), 500
@@ -43,7 +93,10 @@ def search_movies():
         if not query:
             return jsonify({'message': 'Missing search query'}), 400
         
-        response = TMDBApi.search_movies(query, page)
+        response = cached_search(
+            query, page, 'movie',
+            lambda normalized: run_search(normalized, page, 'movie', TMDBApi.search_movies)
+        )
         
         if 'error' in response:
             return jsonify({'message': response['error']}), 500
@@ -65,7 +118,10 @@ def search_tv_shows():
         if not query:
             return jsonify({'message': 'Missing search query'}), 400
         
-        response = TMDBApi.search_tv_shows(query, page)
+        response = cached_search(
+            query, page, 'tv',
+            lambda normalized: run_search(normalized, page, 'tv', TMDBApi.search_tv_shows)
+        )
         
         if 'error' in response:
             return jsonify({'message': response['error']}), 500
@@ -1,11 +1,11 @@
 from flask import Blueprint, request, jsonify
 from app.utils.database import Database
-from app.utils.auth import token_required, admin_required
+from app.utils.audit import audit_log
+from app.utils.auth import token_required, admin_required, invalidate_entitlement
+from app.utils.dashboard_stats import adjust_dashboard_stats
 from datetime import datetime, timedelta
 import logging
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Create blueprint
@@ -221,7 +221,7 @@ def create_subscription():
         # Check if plan exists
         plan = Database.get_single_result(
             """
-            SELECT plan_id, duration_months
+            SELECT plan_id, plan_name, price, duration_months
             FROM subscription_plans
             WHERE plan_id = %s
             """,
@@ -231,6 +231,18 @@ def create_subscription():
         if not plan:
             return jsonify({'message': 'Subscription plan not found'}), 404
         
+        # The user's earlier subscriptions, for the admin dashboard counts
+        previous = Database.execute_query(
+            """
+            SELECT p.plan_name, p.price, s.is_active = TRUE AND s.end_date > NOW() as is_current
+            FROM subscriptions s
+            JOIN subscription_plans p ON s.plan_id = p.plan_id
+            WHERE s.user_id = %s
+            """,
+            (user_id,)
+        )
+        replaced = [subscription for subscription in previous if subscription['is_current']]
+        
         # Calculate end date based on duration
         start_date = datetime.now()
         end_date = start_date + timedelta(days=30 * plan['duration_months'])
@@ -256,19 +268,25 @@ def create_subscription():
             fetch=False
         )
         
+        # Drop the cached entitlement so access changes on the next request
+        invalidate_entitlement(user_id)
+        adjust_dashboard_stats(
+            subscription_stats={
+                'total_subscriptions': 1,
+                'active_subscriptions': 1 - len(replaced),
+                'users_with_subscription': 0 if previous else 1
+            },
+            subscription_plans=[(plan['plan_name'], 1, plan['price'])] + [
+                (subscription['plan_name'], -1, -subscription['price']) for subscription in replaced
+            ]
+        )
+        
         # Log audit
-        Database.execute_query(
-            """
-            INSERT INTO audit_log (user_id, action, details, ip_address)
-            VALUES (%s, %s, %s, %s)
-            """,
-            (
-                user_id,
-                'create_subscription',
-                f"Subscription created for plan ID {plan_id}",
-                request.remote_addr
-            ),
-            fetch=False
+        audit_log(
+            user_id,
+            'create_subscription',
+            f"Subscription created for plan ID {plan_id}",
+            request.remote_addr
         )
         
         return jsonify({
@@ -292,9 +310,10 @@ def cancel_subscription():
         # Check if user has active subscription
         subscription = Database.get_single_result(
             """
-            SELECT subscription_id
-            FROM subscriptions
-            WHERE user_id = %s AND is_active = TRUE
+            SELECT s.subscription_id, p.plan_name, p.price, s.end_date > NOW() as is_current
+            FROM subscriptions s
+            JOIN subscription_plans p ON s.plan_id = p.plan_id
+            WHERE s.user_id = %s AND s.is_active = TRUE
             """,
             (user_id,)
         )
@@ -313,6 +332,17 @@ def cancel_subscription():
             fetch=False
         )
         
+        # Users who redeemed codes for this subscription lose access too
+        codes = Database.execute_query(
+            """
+            SELECT used_by, is_active = TRUE AND expires_at > NOW() as is_current
+            FROM access_codes
+            WHERE subscription_id = %s
+            """,
+            (subscription['subscription_id'],)
+        )
+        redeemers = [code['used_by'] for code in codes if code['used_by'] is not None]
+        
         # Deactivate all access codes for this subscription
         Database.execute_query(
             """
@@ -324,19 +354,22 @@ def cancel_subscription():
             fetch=False
         )
         
+        # Drop the cached entitlements so access changes on the next request
+        invalidate_entitlement(user_id, *redeemers)
+        adjust_dashboard_stats(
+            subscription_stats={'active_subscriptions': -1 if subscription['is_current'] else 0},
+            access_code_stats={
+                'available_codes': -sum(1 for code in codes if code['used_by'] is None and code['is_current'])
+            },
+            subscription_plans=[(subscription['plan_name'], -1, -subscription['price'])] if subscription['is_current'] else None
+        )
+        
         # Log audit
-        Database.execute_query(
-            """
-            INSERT INTO audit_log (user_id, action, details, ip_address)
-            VALUES (%s, %s, %s, %s)
-            """,
-            (
-                user_id,
-                'cancel_subscription',
-                f"Subscription {subscription['subscription_id']} cancelled",
-                request.remote_addr
-            ),
-            fetch=False
+        audit_log(
+            user_id,
+            'cancel_subscription',
+            f"Subscription {subscription['subscription_id']} cancelled",
+            request.remote_addr
         )
         
         return jsonify({'message': 'Subscription cancelled successfully'}), 200
@@ -455,18 +488,11 @@ def create_subscription_plan():
         )
         
         # Log audit
-        Database.execute_query(
-            """
-            INSERT INTO audit_log (user_id, action, details, ip_address)
-            VALUES (%s, %s, %s, %s)
-            """,
-            (
-                request.user['user_id'],
-                'create_plan',
-                f"Subscription plan created: {data['plan_name']}",
-                request.remote_addr
-            ),
-            fetch=False
+        audit_log(
+            request.user['user_id'],
+            'create_plan',
+            f"Subscription plan created: {data['plan_name']}",
+            request.remote_addr
         )
         
         return jsonify({
@@ -541,18 +567,11 @@ def update_subscription_plan(plan_id):
         )
         
         # Log audit
-        Database.execute_query(
-            """
-            INSERT INTO audit_log (user_id, action, details, ip_address)
-            VALUES (%s, %s, %s, %s)
-            """,
-            (
-                request.user['user_id'],
-                'update_plan',
-                f"Subscription plan updated: ID {plan_id}",
-                request.remote_addr
-            ),
-            fetch=False
+        audit_log(
+            request.user['user_id'],
+            'update_plan',
+            f"Subscription plan updated: ID {plan_id}",
+            request.remote_addr
         )
         
         return jsonify({'message': 'Subscription plan updated successfully'}), 200
@@ -600,18 +619,11 @@ def delete_subscription_plan(plan_id):
         )
         
         # Log audit
-        Database.execute_query(
-            """
-            INSERT INTO audit_log (user_id, action, details, ip_address)
-            VALUES (%s, %s, %s, %s)
-            """,
-            (
-                request.user['user_id'],
-                'delete_plan',
-                f"Subscription plan deleted: {plan['plan_name']} (ID: {plan_id})",
-                request.remote_addr
-            ),
-            fetch=False
+        audit_log(
+            request.user['user_id'],
+            'delete_plan',
+            f"Subscription plan deleted: {plan['plan_name']} (ID: {plan_id})",
+            request.remote_addr
         )
         
         return jsonify({'message': 'Subscription plan deleted successfully'}), 200
@@ -2,10 +2,9 @@ from flask import Blueprint, request, jsonify
 from app.utils.database import Database
 from app.utils.auth import token_required, has_subscription
 from app.utils.tmdb import TMDBApi
+from app.utils.watch_buffer import record_watch
 import logging
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Create blueprint
@@ -79,37 +78,8 @@ def get_tv_show_details(tv_id):
         # Track this view in user's watch history
         user_id = request.user['user_id']
         
-        # Check if TV show is already in watch history
-        existing_entry = Database.get_single_result(
-            """
-            SELECT history_id
-            FROM watch_history
-            WHERE user_id = %s AND content_id = %s
-            """,
-            (user_id, f"tv_{tv_id}")
-        )
-        
-        if existing_entry:
-            # Update existing entry
-            Database.execute_query(
-                """
-                UPDATE watch_history
-                SET watched_at = NOW()
-                WHERE history_id = %s
-                """,
-                (existing_entry['history_id'],),
-                fetch=False
-            )
-        else:
-            # Insert new entry
-            Database.execute_query(
-                """
-                INSERT INTO watch_history (user_id, content_id, watched_at)
-                VALUES (%s, %s, NOW())
-                """,
-                (user_id, f"tv_{tv_id}"),
-                fetch=False
-            )
+        # Buffered; the row is written by the watch buffer shortly after the response
+        record_watch(user_id, f"tv_{tv_id}")
         
         # Check if TV show is in user's favorites
         is_favorite = Database.get_single_result(
@@ -214,41 +184,21 @@ def rate_tv_show(tv_id):
     review = data.get('review', '')
     
     try:
-        # Check if user has already rated this TV show
-        existing_rating = Database.get_single_result(
+        # Insert the rating, or replace the user's previous one, in a single statement
+        affected, _ = Database.execute_write(
             """
-            SELECT rating_id
-            FROM user_ratings
-            WHERE user_id = %s AND content_id = %s
+            INSERT INTO user_ratings (user_id, content_id, rating, review)
+            VALUES (%s, %s, %s, %s)
+            ON DUPLICATE KEY UPDATE rating = VALUES(rating), review = VALUES(review), created_at = NOW()
             """,
-            (user_id, f"tv_{tv_id}")
+            (user_id, f"tv_{tv_id}", rating, review)
         )
         
-        if existing_rating:
-            # Update existing rating
-            Database.execute_query(
-                """
-                UPDATE user_ratings
-                SET rating = %s, review = %s, created_at = NOW()
-                WHERE rating_id = %s
-                """,
-                (rating, review, existing_rating['rating_id']),
-                fetch=False
-            )
-            
-            message = 'TV show rating updated successfully'
-        else:
-            # Insert new rating
-            Database.execute_query(
-                """
-                INSERT INTO user_ratings (user_id, content_id, rating, review)
-                VALUES (%s, %s, %s, %s)
-                """,
-                (user_id, f"tv_{tv_id}", rating, review),
-                fetch=False
-            )
-            
+        # MySQL reports 1 affected row for an insert and 2 for an update
+        if affected == 1:
             message = 'TV show rated successfully'
+        else:
+            message = 'TV show rating updated successfully'
         
         return jsonify({'message': message, 'rating': rating}), 200
         
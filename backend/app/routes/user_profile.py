@@ -1,10 +1,10 @@
 from flask import Blueprint, request, jsonify
 from app.utils.database import Database
-from app.utils.auth import token_required
+from app.utils.audit import audit_log
+from app.utils.auth import token_required, invalidate_principal
+from app.utils.hashing import HashingOverloadedError
 import logging
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Create blueprint
@@ -138,19 +138,15 @@ def update_profile():
         
         Database.execute_query(update_query, tuple(update_values), fetch=False)
         
+        # Drop the cached principal so the change applies to the user's next request
+        invalidate_principal(user_id)
+        
         # Log audit
-        Database.execute_query(
-            """
-            INSERT INTO audit_log (user_id, action, details, ip_address)
-            VALUES (%s, %s, %s, %s)
-            """,
-            (
-                user_id,
-                'update_profile',
-                f"User updated profile information",
-                request.remote_addr
-            ),
-            fetch=False
+        audit_log(
+            user_id,
+            'update_profile',
+            f"User updated profile information",
+            request.remote_addr
         )
         
         # Get updated user
@@ -213,22 +209,18 @@ def update_password():
         )
         
         # Log audit
-        Database.execute_query(
-            """
-            INSERT INTO audit_log (user_id, action, details, ip_address)
-            VALUES (%s, %s, %s, %s)
-            """,
-            (
-                user_id,
-                'update_password',
-                "User updated password",
-                request.remote_addr
-            ),
-            fetch=False
+        audit_log(
+            user_id,
+            'update_password',
+            "User updated password",
+            request.remote_addr
         )
         
         return jsonify({'message': 'Password updated successfully'}), 200
         
+    except HashingOverloadedError:
+        return jsonify({'message': 'Server is busy, please try again shortly'}), 503
+    
     except Exception as e:
         logger.error(f"Error updating password: {e}")
         return jsonify({'message': 'Error updating password'}), 500 
\ No newline at end of file
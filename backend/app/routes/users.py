@@ -1,10 +1,12 @@
 from flask import Blueprint, request, jsonify
 from app.utils.database import Database
-from app.utils.auth import token_required, admin_required, superadmin_required, hash_password
+from app.utils.audit import audit_log
+from app.utils.auth import token_required, admin_required, superadmin_required, hash_password, invalidate_principal
+from app.utils.hashing import HashingOverloadedError
+from app.utils.dashboard_stats import adjust_dashboard_stats, ROLE_COUNT_FIELDS
+from datetime import date
 import logging
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Create blueprint
@@ -214,18 +216,17 @@ def create_user():
         )
         
         # Log audit
-        Database.execute_query(
-            """
-            INSERT INTO audit_log (user_id, action, details, ip_address)
-            VALUES (%s, %s, %s, %s)
-            """,
-            (
-                request.user['user_id'],
-                'create_user',
-                f"User created: {data['username']} with role {data['role']}",
-                request.remote_addr
-            ),
-            fetch=False
+        audit_log(
+            request.user['user_id'],
+            'create_user',
+            f"User created: {data['username']} with role {data['role']}",
+            request.remote_addr
+        )
+        
+        # User counts on the admin dashboard changed
+        adjust_dashboard_stats(
+            user_stats={'total_users': 1, ROLE_COUNT_FIELDS[role['role_id']]: 1},
+            recent_registrations={date.today(): 1}
         )
         
         return jsonify({
@@ -301,6 +302,12 @@ def update_user(user_id):
             if not role:
                 return jsonify({'message': 'Invalid role'}), 400
                 
+            # Current role, to move the user between the dashboard's role counts
+            previous_role = Database.get_single_result(
+                "SELECT role_id FROM users WHERE user_id = %s",
+                (user_id,)
+            )
+            
             update_fields.append("role_id = %s")
             params.append(role['role_id'])
         
@@ -321,23 +328,28 @@ def update_user(user_id):
             fetch=False
         )
         
+        # Drop the cached principal so the change applies to the user's next request
+        invalidate_principal(user_id)
+        
+        if 'role' in data and previous_role and previous_role['role_id'] != role['role_id']:
+            adjust_dashboard_stats(user_stats={
+                ROLE_COUNT_FIELDS[previous_role['role_id']]: -1,
+                ROLE_COUNT_FIELDS[role['role_id']]: 1
+            })
+        
         # Log audit
-        Database.execute_query(
-            """
-            INSERT INTO audit_log (user_id, action, details, ip_address)
-            VALUES (%s, %s, %s, %s)
-            """,
-            (
-                request.user['user_id'],
-                'update_user',
-                f"User updated: ID {user_id}",
-                request.remote_addr
-            ),
-            fetch=False
+        audit_log(
+            request.user['user_id'],
+            'update_user',
+            f"User updated: ID {user_id}",
+            request.remote_addr
         )
         
         return jsonify({'message': 'User updated successfully'}), 200
         
+    except HashingOverloadedError:
+        return jsonify({'message': 'Server is busy, please try again shortly'}), 503
+    
     except Exception as e:
         logger.error(f"Error updating user: {e}")
         return jsonify({'message': 'Error updating user'}), 500
@@ -350,7 +362,12 @@ def delete_user(user_id):
     try:
         # Check if user exists
         user = Database.get_single_result(
-            "SELECT username FROM users WHERE user_id = %s",
+            """
+            SELECT username, role_id, created_at,
+                   last_login >= DATE_SUB(NOW(), INTERVAL 7 DAY) as active_last_week
+            FROM users
+            WHERE user_id = %s
+            """,
             (user_id,)
         )
         
@@ -378,19 +395,23 @@ def delete_user(user_id):
             fetch=False
         )
         
+        # Drop the cached principal so the change applies to the user's next request
+        invalidate_principal(user_id)
+        adjust_dashboard_stats(
+            user_stats={
+                'total_users': -1,
+                ROLE_COUNT_FIELDS[user['role_id']]: -1,
+                'active_users_last_week': -1 if user['active_last_week'] else 0
+            },
+            recent_registrations={user['created_at'].date(): -1} if user['created_at'] else None
+        )
+        
         # Log audit
-        Database.execute_query(
-            """
-            INSERT INTO audit_log (user_id, action, details, ip_address)
-            VALUES (%s, %s, %s, %s)
-            """,
-            (
-                request.user['user_id'],
-                'delete_user',
-                f"User deleted: {user['username']}",
-                request.remote_addr
-            ),
-            fetch=False
+        audit_log(
+            request.user['user_id'],
+            'delete_user',
+            f"User deleted: {user['username']}",
+            request.remote_addr
         )
         
         return jsonify({'message': 'User deleted successfully'}), 200
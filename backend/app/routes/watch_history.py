@@ -1,11 +1,12 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from app.utils.database import Database
 from app.utils.auth import token_required
 from app.utils.tmdb import TMDBApi
+from app.utils.content_store import parse_content_id
+from app.utils.watch_buffer import record_progress
+import math
 import logging
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Create blueprint
@@ -29,62 +30,35 @@ def get_watch_history():
             (user_id,)
         )
         
-        # Separate movie and TV show IDs
-        movie_ids = []
-        tv_ids = []
+        # Map content IDs to (media_type, tmdb_id) lookups
+        items = [parse_content_id(item['content_id']) for item in history]
         
-        for item in history:
-            content_id = item['content_id']
-            if content_id.startswith('tv_'):
-                # TV show
-                tv_ids.append(int(content_id.replace('tv_', '')))
-            else:
-                # Movie
-                movie_ids.append(int(content_id))
+        # Read card summaries from the local store, fetching missing or outdated ones from TMDB;
+        # titles that fail or miss the deadline are left out
+        details = TMDBApi.get_summaries(items)
         
-        # Get details for movies
         movies = []
-        if movie_ids:
-            # Fetch details in batches to avoid making too many API calls
-            for movie_id in movie_ids:
-                movie_details = TMDBApi.get_movie_details(movie_id)
-                if 'error' not in movie_details:
-                    movie_details['media_type'] = 'movie'
-                    
-                    # Find corresponding history item
-                    for item in history:
-                        if item['content_id'] == str(movie_id):
-                            movie_details['watched_at'] = item['watched_at']
-                            movie_details['watch_duration'] = item['watch_duration']
-                            movie_details['watch_percentage'] = item['watch_percentage']
-                            break
-                    
-                    movies.append(movie_details)
-        
-        # Get details for TV shows
         tv_shows = []
-        if tv_ids:
-            # Fetch details in batches to avoid making too many API calls
-            for tv_id in tv_ids:
-                tv_details = TMDBApi.get_tv_show_details(tv_id)
-                if 'error' not in tv_details:
-                    tv_details['media_type'] = 'tv'
                     
-                    # Find corresponding history item
-                    for item in history:
-                        if item['content_id'] == f"tv_{tv_id}":
-                            tv_details['watched_at'] = item['watched_at']
-                            tv_details['watch_duration'] = item['watch_duration']
-                            tv_details['watch_percentage'] = item['watch_percentage']
-                            break
+        for item, (media_type, _), content_details in zip(history, items, details):
+            if content_details is None:
+                continue
                     
-                    tv_shows.append(tv_details)
+            content_details['watched_at'] = item['watched_at']
+            content_details['watch_duration'] = item['watch_duration']
+            content_details['watch_percentage'] = item['watch_percentage']
+        
+            if media_type == 'tv':
+                tv_shows.append(content_details)
+            else:
+                movies.append(content_details)
         
         # Combine
         combined_history = {
             'movies': movies,
             'tv_shows': tv_shows,
-            'total': len(movies) + len(tv_shows)
+            'total': len(movies) + len(tv_shows),
+            'partial': None in details
         }
         
         return jsonify(combined_history), 200
@@ -109,41 +83,24 @@ def add_to_watch_history():
     watch_percentage = data.get('watch_percentage', 0)
     
     try:
-        # Check if item already exists in watch history
-        existing = Database.get_single_result(
+        # Insert the entry, or refresh the existing one, in a single statement
+        affected, _ = Database.execute_write(
             """
-            SELECT history_id
-            FROM watch_history
-            WHERE user_id = %s AND content_id = %s
+            INSERT INTO watch_history (user_id, content_id, watched_at, watch_duration, watch_percentage)
+            VALUES (%s, %s, NOW(), %s, %s)
+            ON DUPLICATE KEY UPDATE
+                watched_at = NOW(),
+                watch_duration = VALUES(watch_duration),
+                watch_percentage = VALUES(watch_percentage)
             """,
-            (user_id, content_id)
+            (user_id, content_id, watch_duration, watch_percentage)
         )
         
-        if existing:
-            # Update existing entry
-            Database.execute_query(
-                """
-                UPDATE watch_history
-                SET watched_at = NOW(), watch_duration = %s, watch_percentage = %s
-                WHERE history_id = %s
-                """,
-                (watch_duration, watch_percentage, existing['history_id']),
-                fetch=False
-            )
-            
-            message = 'Watch history updated'
-        else:
-            # Insert new entry
-            Database.execute_query(
-                """
-                INSERT INTO watch_history (user_id, content_id, watched_at, watch_duration, watch_percentage)
-                VALUES (%s, %s, NOW(), %s, %s)
-                """,
-                (user_id, content_id, watch_duration, watch_percentage),
-                fetch=False
-            )
-            
+        # MySQL reports 1 affected row for an insert and 2 for an update
+        if affected == 1:
             message = 'Added to watch history'
+        else:
+            message = 'Watch history updated'
         
         return jsonify({'message': message}), 200
         
@@ -151,6 +108,53 @@ def add_to_watch_history():
         logger.error(f"Error updating watch history: {e}")
         return jsonify({'message': 'Error updating watch history'}), 500
 
+@watch_history_bp.route('/progress', methods=['POST'])
+@token_required
+def report_progress():
+    """
+    Accept a batch of playback progress heartbeats
+    
+    Expects {"events": [{"content_id": "tv_123", "position": 600, "duration": 2400}, ...]}
+    with positions and durations in seconds. Reports are buffered and
+    written periodically, keeping only the latest one per title.
+    """
+    data = request.get_json(silent=True) or {}
+    user_id = request.user['user_id']
+    
+    events = data.get('events')
+    if not isinstance(events, list) or not events:
+        return jsonify({'message': 'Missing events'}), 400
+    
+    max_events = current_app.config.get('PROGRESS_MAX_EVENTS', 100)
+    if len(events) > max_events:
+        return jsonify({'message': f'At most {max_events} events per request'}), 400
+    
+    progress = []
+    for event in events:
+        try:
+            content_id = str(event['content_id'])
+            parse_content_id(content_id)
+            position = float(event['position'])
+            duration = float(event['duration'])
+        except (KeyError, TypeError, ValueError):
+            return jsonify({'message': 'Each event needs content_id, position and duration'}), 400
+        
+        # The JSON parser accepts NaN and Infinity, which the bounds below let through
+        if not (math.isfinite(position) and math.isfinite(duration)) or position < 0 or duration <= 0:
+            return jsonify({'message': 'position and duration must be finite, position >= 0 and duration > 0'}), 400
+        
+        percentage = round(min(position / duration, 1.0) * 100, 2)
+        progress.append((content_id, int(min(position, duration)), percentage))
+    
+    try:
+        accepted = record_progress(user_id, progress)
+        
+        return jsonify({'accepted': accepted, 'dropped': len(progress) - accepted}), 202
+    
+    except Exception as e:
+        logger.error(f"Error recording playback progress: {e}")
+        return jsonify({'message': 'Error recording playback progress'}), 500
+
 @watch_history_bp.route('/<int:history_id>', methods=['DELETE'])
 @token_required
 def remove_from_watch_history(history_id):
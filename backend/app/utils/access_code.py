@@ -5,8 +5,6 @@ import time
 from app.utils.database import Database
 import logging
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class AccessCodeGenerator: 
@@ -0,0 +1,399 @@
+import os
+import json
+import time
+import queue
+import atexit
+import threading
+from flask import current_app
+from mysql.connector.errors import InterfaceError, OperationalError
+from app.utils.database import Database, PoolTimeoutError
+import logging
+
+logger = logging.getLogger(__name__)
+
+_writer = None
+_writer_pid = None
+_writer_lock = threading.Lock()
+
+# Errors meaning the database is unavailable rather than rejecting the rows
+UNAVAILABLE_ERRORS = (InterfaceError, OperationalError, PoolTimeoutError)
+
+# Seconds a replay file may go untouched before another process treats its
+# replayer as dead and claims it
+ORPHANED_REPLAY_AGE = 300
+
+class AuditWriter:
+    """
+    Background writer for audit_log entries
+    
+    Entries are put on a bounded in-memory queue and written by a single
+    thread with multi-row INSERTs of up to `batch_size` rows. When the queue
+    is full, or a batch cannot be written, the entries are appended to a
+    local JSON-lines spill file instead of being lost. The spill file is
+    replayed into the database when the writer starts and again once writes
+    succeed, at most every `replay_interval` seconds. Entries the database
+    rejects outright are moved to `{spill_path}.dead` so they cannot hold
+    back the rest.
+    """
+    
+    def __init__(self, spill_path, flush_interval=1.0, batch_size=500, max_queue=10000, replay_interval=60.0):
+        """
+        Args:
+            spill_path (str): Append-only file entries overflow to
+            flush_interval (float): Longest time an entry waits before its batch is written
+            batch_size (int): Rows per INSERT
+            max_queue (int): Entries held in memory before spilling to disk
+            replay_interval (float): Minimum seconds between spill file replays
+        """
+        self.spill_path = spill_path
+        self.dead_letter_path = f"{spill_path}.dead"
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.replay_interval = replay_interval
+        
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._spill_lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread = None
+        self._last_replay = 0.0
+        
+        self.recorded = 0
+        self.written = 0
+        self.spilled = 0
+        self.replayed = 0
+        self.dead_lettered = 0
+    
+    def start(self):
+        """Starts the background writer thread"""
+        self._thread = threading.Thread(target=self._run, name='audit-writer', daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+        return self
+    
+    def record(self, entry):
+        """
+        Queues an entry without blocking, spilling it to disk if the queue is full
+        
+        Args:
+            entry (tuple): (user_id, action, details, ip_address, created_at Unix timestamp)
+        """
+        self.recorded += 1
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            self._spill([entry])
+    
+    def _drain(self, block):
+        """Takes up to batch_size entries off the queue"""
+        batch = []
+        try:
+            if block:
+                batch.append(self._queue.get(timeout=self.flush_interval))
+            while len(batch) < self.batch_size:
+                batch.append(self._queue.get_nowait())
+        except queue.Empty:
+            pass
+        return batch
+    
+    def _write(self, batch):
+        """Writes a batch with one multi-row INSERT"""
+        Database.execute_many(
+            """
+            INSERT INTO audit_log (user_id, action, details, ip_address, created_at)
+            VALUES (%s, %s, %s, %s, FROM_UNIXTIME(%s))
+            """,
+            batch
+        )
+        self.written += len(batch)
+    
+    def _append(self, path, batch):
+        """Appends entries to a file, one JSON array per line"""
+        lines = ''.join(json.dumps(list(entry), default=str) + '\n' for entry in batch)
+        with self._spill_lock:
+            try:
+                with open(path, 'a', encoding='utf-8') as spill_file:
+                    spill_file.write(lines)
+                return True
+            except OSError as e:
+                logger.error("Dropped %d audit entries, could not write %s: %s", len(batch), path, e)
+                return False
+    
+    def _spill(self, batch):
+        """Appends entries to the spill file"""
+        if self._append(self.spill_path, batch):
+            self.spilled += len(batch)
+    
+    def _write_rows(self, batch):
+        """
+        Writes a rejected batch one row at a time
+        
+        Rows the database rejects are moved to the dead-letter file. Stops
+        at the first row that fails because the database is unavailable.
+        
+        Returns:
+            tuple: (rows handled, rows written); rows from `rows handled` on were not attempted
+        """
+        written = 0
+        for handled, entry in enumerate(batch):
+            try:
+                self._write([entry])
+                written += 1
+            except UNAVAILABLE_ERRORS as e:
+                logger.error("Error replaying audit spill file: %s", e)
+                return handled, written
+            except Exception as e:
+                logger.error("Moving rejected audit entry to %s: %s", self.dead_letter_path, e)
+                if self._append(self.dead_letter_path, [entry]):
+                    self.dead_lettered += 1
+        return len(batch), written
+    
+    def _replay_file(self, replay_path):
+        """
+        Writes the entries of a claimed replay file and removes it
+        
+        Entries not written because the database is unavailable are spilled
+        again.
+        
+        Returns:
+            int: Number of entries replayed
+        """
+        try:
+            # Marks the file as in use for processes looking for orphans
+            os.utime(replay_path)
+            with open(replay_path, encoding='utf-8') as replay_file:
+                lines = replay_file.readlines()
+        except FileNotFoundError:
+            return 0
+        
+        entries = []
+        for line in lines:
+            try:
+                entries.append(tuple(json.loads(line)))
+            except ValueError:
+                logger.warning("Skipping malformed audit spill line")
+        
+        replayed = 0
+        position = 0
+        while position < len(entries):
+            batch = entries[position:position + self.batch_size]
+            try:
+                self._write(batch)
+                handled, written = len(batch), len(batch)
+            except UNAVAILABLE_ERRORS as e:
+                logger.error("Error replaying audit spill file: %s", e)
+                break
+            except Exception as e:
+                # One bad row fails the whole INSERT; retry row by row to isolate it
+                logger.warning("Audit spill batch rejected, retrying row by row: %s", e)
+                handled, written = self._write_rows(batch)
+            
+            replayed += written
+            position += handled
+            if handled < len(batch):
+                break
+            
+            try:
+                os.utime(replay_path)
+            except FileNotFoundError:
+                pass
+        
+        if position < len(entries):
+            self._spill(entries[position:])
+        
+        try:
+            os.remove(replay_path)
+        except FileNotFoundError:
+            pass
+        
+        self.replayed += replayed
+        return replayed
+    
+    def _claim_orphans(self):
+        """
+        Claims replay files whose process died before finishing them
+        
+        A file is claimed when it carries this process's pid (this process
+        is not replaying it, so it was left by a previous process with the
+        same pid) or has gone untouched for ORPHANED_REPLAY_AGE seconds.
+        
+        Returns:
+            list: Paths of the claimed files
+        """
+        directory = os.path.dirname(os.path.abspath(self.spill_path))
+        prefix = os.path.basename(self.spill_path) + '.'
+        own_name = f"{prefix}{os.getpid()}.replay"
+        
+        try:
+            names = os.listdir(directory)
+        except OSError:
+            return []
+        
+        claimed = []
+        for name in names:
+            if not name.startswith(prefix) or not name.endswith('.replay'):
+                continue
+            
+            path = os.path.join(directory, name)
+            try:
+                if name != own_name and time.time() - os.path.getmtime(path) < ORPHANED_REPLAY_AGE:
+                    continue
+                
+                # Renaming claims the file; of several processes only one succeeds
+                claimed_path = f"{self.spill_path}.{os.getpid()}.{len(claimed)}.orphan.replay"
+                os.rename(path, claimed_path)
+            except FileNotFoundError:
+                continue
+            
+            logger.info("Claimed orphaned audit replay file %s", name)
+            claimed.append(claimed_path)
+        
+        return claimed
+    
+    def replay(self):
+        """
+        Writes spilled entries to the database
+        
+        The spill file is first renamed so entries spilled meanwhile go to a
+        fresh file, and so only one worker process replays it. Replay files
+        left behind by a process that died mid-replay are claimed and
+        replayed too; entries it had already written may be written twice.
+        
+        Returns:
+            int: Number of entries replayed
+        """
+        self._last_replay = time.monotonic()
+        
+        replayed = 0
+        for orphan_path in self._claim_orphans():
+            replayed += self._replay_file(orphan_path)
+        
+        replay_path = f"{self.spill_path}.{os.getpid()}.replay"
+        try:
+            os.rename(self.spill_path, replay_path)
+            replayed += self._replay_file(replay_path)
+        except FileNotFoundError:
+            pass
+        
+        if replayed:
+            logger.info("Replayed %d spilled audit entries", replayed)
+        return replayed
+    
+    def flush(self, block=False):
+        """
+        Writes queued entries until the queue is empty
+        
+        Args:
+            block (bool): Wait up to flush_interval for the first entry
+        
+        Returns:
+            bool: False if a batch had to be spilled
+        """
+        while True:
+            batch = self._drain(block)
+            if not batch:
+                return True
+            block = False
+            
+            try:
+                self._write(batch)
+            except Exception as e:
+                logger.error("Error writing %d audit entries, spilling to disk: %s", len(batch), e)
+                self._spill(batch)
+                return False
+    
+    def _run(self):
+        """Background loop writing batches and replaying the spill file"""
+        try:
+            self.replay()
+        except Exception as e:
+            logger.error("Error replaying audit spill file: %s", e)
+        
+        while not self._stopping.is_set():
+            try:
+                healthy = self.flush(block=True)
+                if healthy and time.monotonic() - self._last_replay >= self.replay_interval:
+                    self.replay()
+            except Exception as e:
+                logger.error("Audit writer loop error: %s", e)
+    
+    def stop(self):
+        """Stops the writer thread and writes or spills whatever is still queued"""
+        self._stopping.set()
+        if self._thread is not None and self._thread.is_alive():
+            self._thread.join(timeout=self.flush_interval + 5)
+        self.flush()
+    
+    def stats(self):
+        """
+        Returns writer counters
+        
+        Returns:
+            dict: Queued, recorded, written, spilled, replayed and dead-lettered entry counts
+        """
+        return {
+            'queued': self._queue.qsize(),
+            'recorded': self.recorded,
+            'written': self.written,
+            'spilled': self.spilled,
+            'replayed': self.replayed,
+            'dead_lettered': self.dead_lettered
+        }
+
+def get_audit_writer():
+    """
+    Returns the process-wide audit writer, starting it on first use
+    
+    A new writer is started after a fork since its thread does not survive it.
+    
+    Returns:
+        AuditWriter: The writer
+    """
+    global _writer, _writer_pid
+    
+    pid = os.getpid()
+    
+    if _writer is None or _writer_pid != pid:
+        with _writer_lock:
+            if _writer is None or _writer_pid != pid:
+                _writer = AuditWriter(
+                    spill_path=current_app.config.get('AUDIT_SPILL_FILE', 'audit_spill.jsonl'),
+                    flush_interval=current_app.config.get('AUDIT_FLUSH_INTERVAL', 1.0),
+                    batch_size=current_app.config.get('AUDIT_BATCH_SIZE', 500),
+                    max_queue=current_app.config.get('AUDIT_MAX_QUEUE', 10000),
+                    replay_interval=current_app.config.get('AUDIT_REPLAY_INTERVAL', 60.0)
+                ).start()
+                _writer_pid = pid
+    
+    return _writer
+
+def audit_log(user_id, action, details=None, ip_address=None):
+    """
+    Records an audit log entry without writing it on the request thread
+    
+    The entry is queued once the current unit of work commits, so actions
+    that roll back leave no audit trail, and keeps the time it was recorded
+    as a Unix timestamp, which FROM_UNIXTIME stores correctly whatever the
+    time zones of the app server and the database session. With AUDIT_ASYNC
+    off it is written before the commit instead.
+    
+    Args:
+        user_id (int): User who performed the action
+        action (str): Action name, e.g. "login"
+        details (str, optional): Human-readable description
+        ip_address (str, optional): Client address
+    """
+    entry = (user_id, action, details, ip_address, time.time())
+    
+    if not current_app.config.get('AUDIT_ASYNC', True):
+        Database.execute_query(
+            """
+            INSERT INTO audit_log (user_id, action, details, ip_address, created_at)
+            VALUES (%s, %s, %s, %s, FROM_UNIXTIME(%s))
+            """,
+            entry,
+            fetch=False
+        )
+        return
+    
+    writer = get_audit_writer()
+    Database.on_commit(lambda: writer.record(entry))
\ No newline at end of file
@@ -1,18 +1,41 @@
 import jwt
-import bcrypt
+import math
+import time
 import datetime
+import threading
 from functools import wraps
 from flask import request, jsonify, current_app, Blueprint
 from app.utils.database import Database
+from app.utils.cache import TTLCache
+from app.utils.hashing import PasswordHasher
 import logging
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Create debug blueprint
 auth_debug_bp = Blueprint('auth_debug', __name__)
 
+# Authenticated users by user_id, shared by all requests in the process
+_principal_cache = None
+_principal_cache_lock = threading.Lock()
+
+# Whether a user is entitled to subscriber content, by user_id
+_entitlement_cache = None
+_entitlement_cache_lock = threading.Lock()
+
+# When this process last read entitlement_changes and last pruned it
+_entitlement_synced_at = None
+_entitlement_pruned_at = None
+_entitlement_sync_lock = threading.Lock()
+
+# Extra seconds each read of entitlement_changes reaches back, for
+# transactions that commit a while after writing their change row
+ENTITLEMENT_SYNC_GRACE = 30
+
+# Seconds change rows are kept, and between deletes of older ones
+ENTITLEMENT_CHANGES_RETENTION = 86400
+ENTITLEMENT_PRUNE_INTERVAL = 3600
+
 @auth_debug_bp.route('/test-token', methods=['GET'])
 def test_token():
     """Test endpoint to verify token generation and validation"""
@@ -45,18 +68,23 @@ def hash_password(password):
     """
     Hash a password using bcrypt
     
+    The hash is computed on the bcrypt process pool; raises
+    HashingOverloadedError when the pool's queue is full.
+    
     Args:
         password (str): The password to hash
         
     Returns:
         str: The hashed password
     """
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    return PasswordHasher.hash(password)
 
 def verify_password(password, hashed_password):
     """
     Verify a password against a hash
     
+    Runs on the bcrypt process pool like hash_password.
+    
     Args:
         password (str): The password to verify
         hashed_password (str): The hashed password to check against
@@ -64,7 +92,19 @@ def verify_password(password, hashed_password):
     Returns:
         bool: True if password matches, False otherwise
     """
-    return bcrypt.checkpw(password.encode('utf-8'), hashed_password.encode('utf-8'))
+    return PasswordHasher.verify(password, hashed_password)
+
+def needs_rehash(hashed_password):
+    """
+    Check whether a stored hash uses a cost other than BCRYPT_ROUNDS
+    
+    Args:
+        hashed_password (str): The stored hash
+    
+    Returns:
+        bool: True if the password should be rehashed
+    """
+    return PasswordHasher.needs_rehash(hashed_password)
 
 def generate_token(user_id, role, expiry=None):
     """
@@ -115,6 +155,71 @@ def decode_token(token):
     except jwt.InvalidTokenError:
         return {'error': 'Invalid token. Please log in again.'}
 
+def get_principal_cache():
+    """
+    Returns the process-wide cache of authenticated users
+    
+    Returns:
+        TTLCache: Cache of user rows with their role name, keyed by user_id
+    """
+    global _principal_cache
+    
+    if _principal_cache is None:
+        with _principal_cache_lock:
+            if _principal_cache is None:
+                _principal_cache = TTLCache(
+                    max_entries=current_app.config.get('AUTH_PRINCIPAL_CACHE_MAX_ENTRIES', 10000)
+                )
+    
+    return _principal_cache
+
+def load_principal(user_id):
+    """
+    Get a user and their role name, from cache when possible
+    
+    Args:
+        user_id (int): User ID
+    
+    Returns:
+        dict: User row with a 'role' key, or None if the user does not exist
+    """
+    ttl = current_app.config.get('AUTH_PRINCIPAL_CACHE_TTL', 60)
+    cache = get_principal_cache()
+    
+    if ttl:
+        cached = cache.get(int(user_id))
+        if cached is not None:
+            # Callers may modify request.user, so hand out a copy
+            return dict(cached)
+    
+    user = Database.get_single_result(
+        """
+        SELECT u.user_id, u.username, u.email, u.role_id, r.role_name AS role
+        FROM users u
+        JOIN roles r ON u.role_id = r.role_id
+        WHERE u.user_id = %s
+        """,
+        (user_id,)
+    )
+    
+    if user and ttl:
+        cache.set(int(user_id), dict(user), ttl)
+    
+    return user
+
+def invalidate_principal(user_id):
+    """
+    Drop a user's cached principal once the current transaction commits
+    
+    Call this after changing a user's username, email or role, or deleting
+    the user, so token_required picks up the change on the next request.
+    
+    Args:
+        user_id (int): User ID
+    """
+    cache = get_principal_cache()
+    Database.on_commit(lambda: cache.delete(int(user_id)))
+
 def token_required(f):
     """
     Decorator to require a valid JWT token for route access
@@ -126,7 +231,7 @@ def token_required(f):
         # Get token from header
         if 'Authorization' in request.headers:
             auth_header = request.headers['Authorization']
-            logger.info(f"Auth header: {auth_header[:15]}...")
+            logger.debug("Auth header: %s...", auth_header[:15])
             
             try:
                 # Make sure we're handling 'Bearer <token>' format correctly
@@ -139,55 +244,41 @@ def token_required(f):
                     else:
                         return jsonify({'message': 'Invalid authorization format. Use Bearer <token>'}), 401
             except IndexError:
-                logger.error(f"Malformed Authorization header: {auth_header}")
+                logger.warning("Malformed Authorization header")
                 return jsonify({'message': 'Token is missing or invalid'}), 401
         
         if not token:
-            logger.error("No token provided in request")
+            logger.debug("No token provided in request")
             return jsonify({'message': 'Token is missing'}), 401
         
         try:
             # Decode token
-            logger.info(f"Decoding token: {token[:10]}...")
+            logger.debug("Decoding token: %s...", token[:10])
             payload = decode_token(token)
             
             if 'error' in payload:
-                logger.error(f"Token decode error: {payload['error']}")
+                logger.debug("Token decode error: %s", payload['error'])
                 return jsonify({'message': payload['error']}), 401
             
             # Get user from database
             user_id = payload.get('sub')
             if not user_id:
-                logger.error("Token payload missing 'sub' field")
+                logger.warning("Token payload missing 'sub' field")
                 return jsonify({'message': 'Invalid token payload'}), 401
                 
-            logger.info(f"Looking up user ID: {user_id}")
-            user = Database.get_single_result(
-                "SELECT user_id, username, email, role_id FROM users WHERE user_id = %s",
-                (user_id,)
-            )
+            logger.debug("Looking up user ID: %s", user_id)
+            user = load_principal(user_id)
             
             if not user:
-                logger.error(f"User not found for ID: {user_id}")
+                logger.warning("User not found for ID: %s", user_id)
                 return jsonify({'message': 'User not found'}), 401
             
-            # Get role name
-            role = Database.get_single_result(
-                "SELECT role_name FROM roles WHERE role_id = %s",
-                (user['role_id'],)
-            )
-            
-            if not role:
-                logger.error(f"Role not found for role_id: {user['role_id']}")
-                return jsonify({'message': 'Role not found'}), 401
-            
             # Add user and role to request context
             request.user = user
-            request.user['role'] = role['role_name']
-            logger.info(f"User authenticated: {user['username']} with role {role['role_name']}")
+            logger.debug("User authenticated: %s with role %s", user['username'], user['role'])
             
         except Exception as e:
-            logger.error(f"Error in token validation: {e}")
+            logger.error("Error in token validation: %s", e)
             return jsonify({'message': 'Token is invalid'}), 401
         
         return f(*args, **kwargs)
@@ -228,6 +319,165 @@ def superadmin_required(f):
     
     return decorated
 
+def get_entitlement_cache():
+    """
+    Returns the process-wide cache of subscription entitlements
+    
+    Returns:
+        TTLCache: Cache of True/False entitlement flags, keyed by user_id
+    """
+    global _entitlement_cache
+    
+    if _entitlement_cache is None:
+        with _entitlement_cache_lock:
+            if _entitlement_cache is None:
+                _entitlement_cache = TTLCache(
+                    max_entries=current_app.config.get('ENTITLEMENT_CACHE_MAX_ENTRIES', 10000)
+                )
+    
+    return _entitlement_cache
+
+def sync_entitlements():
+    """
+    Drop cached entitlements that other processes have changed
+    
+    invalidate_entitlement records every change in entitlement_changes,
+    in the same transaction as the write. At most every
+    ENTITLEMENT_SYNC_INTERVAL seconds one request per process reads the
+    changes made since the previous read, so a new or cancelled
+    entitlement takes effect in every worker within about that long. If
+    the changes cannot be read, the whole cache is dropped instead.
+    """
+    global _entitlement_synced_at, _entitlement_pruned_at
+    
+    interval = current_app.config.get('ENTITLEMENT_SYNC_INTERVAL', 2)
+    now = time.monotonic()
+    if _entitlement_synced_at is not None and now - _entitlement_synced_at < interval:
+        return
+    
+    # One request thread syncs; the others carry on with the cache as is
+    if not _entitlement_sync_lock.acquire(blocking=False):
+        return
+    
+    try:
+        if _entitlement_synced_at is not None and now - _entitlement_synced_at < interval:
+            return
+        
+        cache = get_entitlement_cache()
+        window = ENTITLEMENT_SYNC_GRACE
+        if _entitlement_synced_at is not None:
+            window += math.ceil(now - _entitlement_synced_at)
+        
+        try:
+            changes = Database.execute_query(
+                """
+                SELECT DISTINCT user_id
+                FROM entitlement_changes
+                WHERE changed_at >= NOW() - INTERVAL %s SECOND
+                """,
+                (window,)
+            )
+            for change in changes:
+                cache.delete(int(change['user_id']))
+            
+            if _entitlement_pruned_at is None or now - _entitlement_pruned_at >= ENTITLEMENT_PRUNE_INTERVAL:
+                Database.execute_query(
+                    """
+                    DELETE FROM entitlement_changes
+                    WHERE changed_at < NOW() - INTERVAL %s SECOND
+                    """,
+                    (ENTITLEMENT_CHANGES_RETENTION,),
+                    fetch=False
+                )
+                _entitlement_pruned_at = now
+        except Exception as e:
+            # Changes made elsewhere are unknown, so nothing cached can be trusted
+            logger.error(f"Error reading entitlement changes, dropping cached entitlements: {e}")
+            cache.clear()
+        
+        _entitlement_synced_at = now
+    finally:
+        _entitlement_sync_lock.release()
+
+def load_entitlement(user_id):
+    """
+    Check whether a user has an active subscription or redeemed access code
+    
+    Both sources are checked with a single query. A positive result is
+    cached until the earliest end_date/expires_at among the user's active
+    entitlements, capped at ENTITLEMENT_CACHE_MAX_TTL; a negative result is
+    cached for ENTITLEMENT_CACHE_NEGATIVE_TTL. Changes made by other
+    processes drop the cached result within ENTITLEMENT_SYNC_INTERVAL.
+    
+    Args:
+        user_id (int): User ID
+    
+    Returns:
+        bool: True if the user is entitled to subscriber content
+    """
+    sync_entitlements()
+    cache = get_entitlement_cache()
+    
+    cached = cache.get(int(user_id))
+    if cached is not None:
+        return cached
+    
+    entitlement = Database.get_single_result(
+        """
+        SELECT COUNT(*) AS active,
+               TIMESTAMPDIFF(SECOND, NOW(), MIN(expires)) AS seconds_left
+        FROM (
+            SELECT end_date AS expires
+            FROM subscriptions
+            WHERE user_id = %s AND is_active = TRUE AND end_date > NOW()
+            UNION ALL
+            SELECT expires_at AS expires
+            FROM access_codes
+            WHERE used_by = %s AND is_active = TRUE AND expires_at > NOW()
+        ) AS entitlements
+        """,
+        (user_id, user_id)
+    )
+    
+    is_entitled = bool(entitlement and entitlement['active'])
+    
+    if is_entitled:
+        ttl = min(entitlement['seconds_left'] or 0, current_app.config.get('ENTITLEMENT_CACHE_MAX_TTL', 3600))
+    else:
+        ttl = current_app.config.get('ENTITLEMENT_CACHE_NEGATIVE_TTL', 60)
+    
+    cache.set(int(user_id), is_entitled, ttl)
+    
+    return is_entitled
+
+def invalidate_entitlement(*user_ids):
+    """
+    Drop cached entitlements once the current transaction commits
+    
+    Call this after creating or cancelling a subscription, or redeeming or
+    revoking an access code, for every user whose access changed. The
+    change is also recorded in entitlement_changes, in the same
+    transaction, for the caches of other processes.
+    
+    Args:
+        *user_ids (int): User IDs
+    """
+    cache = get_entitlement_cache()
+    
+    Database.execute_many(
+        """
+        INSERT INTO entitlement_changes (user_id)
+        VALUES (%s)
+        """,
+        [(int(user_id),) for user_id in user_ids]
+    )
+    
+    def invalidate():
+        for user_id in user_ids:
+            cache.delete(int(user_id))
+    
+    Database.on_commit(invalidate)
+
 def has_subscription(f):
     """
     Decorator to check if user has active subscription or valid access code
@@ -238,34 +488,12 @@ def has_subscription(f):
         if not hasattr(request, 'user') or not request.user:
             return jsonify({'message': 'Authentication required'}), 401
         
-        user_id = request.user['user_id']
-        
-        # Check for active subscription
-        subscription = Database.get_single_result(
-            """
-            SELECT subscription_id 
-            FROM subscriptions 
-            WHERE user_id = %s AND is_active = TRUE AND end_date > NOW()
-            """,
-            (user_id,)
-        )
-        
-        # Check for valid access code
-        access_code = Database.get_single_result(
-            """
-            SELECT code_id 
-            FROM access_codes 
-            WHERE used_by = %s AND is_active = TRUE AND expires_at > NOW()
-            """,
-            (user_id,)
-        )
-        
         # If user is admin or superadmin, allow access without subscription
         if request.user['role'] in ['admin', 'superadmin']:
             return f(*args, **kwargs)
         
         # If no subscription or access code found, deny access
-        if not subscription and not access_code:
+        if not load_entitlement(request.user['user_id']):
             return jsonify({
                 'message': 'Subscription required to access this content',
                 'subscription_required': True
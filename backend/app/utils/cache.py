@@ -0,0 +1,354 @@
+import time
+import threading
+from collections import OrderedDict
+import logging
+
+logger = logging.getLogger(__name__)
+
+class TTLCache:
+    """
+    Thread-safe LRU cache with per-entry expiry and a memory cap
+    
+    Entries are evicted least recently used first once either the entry
+    count or the total size of the cached values exceeds its limit. An entry
+    may be given a stale window after its TTL during which get_with_state
+    still returns it, flagged as stale, so callers can serve it while they
+    refresh it.
+    """
+    
+    def __init__(self, max_entries=1024, max_bytes=64 * 1024 * 1024):
+        """
+        Args:
+            max_entries (int): Maximum number of entries
+            max_bytes (int): Maximum total size of cached values
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        
+        self._entries = OrderedDict()  # key -> (value, size, fresh_until, stale_until)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def get(self, key):
+        """
+        Returns a cached value
+        
+        Args:
+            key (hashable): Cache key
+        
+        Returns:
+            The cached value, or None if missing or expired
+        """
+        value, is_stale = self.get_with_state(key, allow_stale=False)
+        return value
+    
+    def get_with_state(self, key, allow_stale=True):
+        """
+        Returns a cached value and whether it is past its TTL
+        
+        Args:
+            key (hashable): Cache key
+            allow_stale (bool): Whether entries inside their stale window are returned
+        
+        Returns:
+            tuple: (value, is_stale), or (None, False) if missing or expired
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            
+            if entry is None:
+                self.misses += 1
+                return (None, False)
+            
+            value, size, fresh_until, stale_until = entry
+            now = time.monotonic()
+            
+            if now >= stale_until:
+                self._remove(key)
+                self.misses += 1
+                return (None, False)
+            
+            is_stale = now >= fresh_until
+            if is_stale and not allow_stale:
+                self.misses += 1
+                return (None, False)
+            
+            self._entries.move_to_end(key)
+            if is_stale:
+                self.stale_hits += 1
+            else:
+                self.hits += 1
+            return (value, is_stale)
+    
+    def set(self, key, value, ttl, size=1, stale_ttl=0):
+        """
+        Stores a value
+        
+        Args:
+            key (hashable): Cache key
+            value: Value to cache
+            ttl (float): Seconds until the entry expires
+            size (int): Size accounted against max_bytes
+            stale_ttl (float): Extra seconds the entry may be served as stale
+        """
+        if ttl <= 0 or size > self.max_bytes:
+            return
+        
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            
+            fresh_until = time.monotonic() + ttl
+            self._entries[key] = (value, size, fresh_until, fresh_until + stale_ttl)
+            self._bytes += size
+            
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+    
+    def delete(self, key):
+        """Removes an entry if present"""
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+    
+    def clear(self):
+        """Removes every entry"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+    
+    def _remove(self, key):
+        """Removes an entry; the caller must hold the lock"""
+        _, size, _, _ = self._entries.pop(key)
+        self._bytes -= size
+    
+    def stats(self):
+        """
+        Returns cache usage counters
+        
+        Returns:
+            dict: Entry count, size, hits, misses, hit ratio and evictions
+        """
+        with self._lock:
+            served = self.hits + self.stale_hits
+            lookups = served + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'stale_hits': self.stale_hits,
+                'misses': self.misses,
+                'hit_ratio': round(served / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions
+            }
+
+class LFUCache:
+    """
+    Thread-safe least-frequently-used cache with per-entry expiry
+    
+    Once full, the entry read the fewest times is evicted, the oldest of
+    those first, so a handful of very popular keys stay resident however
+    many one-off keys pass through. Expiry keeps a key that was popular
+    once from staying forever. Every operation is O(1): keys are kept in
+    one insertion-ordered bucket per read count.
+    """
+    
+    def __init__(self, max_entries=1024):
+        """
+        Args:
+            max_entries (int): Maximum number of entries
+        """
+        self.max_entries = max_entries
+        
+        self._entries = {}  # key -> [value, frequency, expires_at]
+        self._buckets = {}  # frequency -> OrderedDict of keys, oldest first
+        self._min_frequency = 0
+        self._lock = threading.Lock()
+        
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+    
+    def get(self, key):
+        """
+        Returns a cached value, counting the read towards its frequency
+        
+        Args:
+            key (hashable): Cache key
+        
+        Returns:
+            The cached value, or None if missing or expired
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            
+            if entry is None:
+                self.misses += 1
+                return None
+            
+            if time.monotonic() >= entry[2]:
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            
+            frequency = entry[1]
+            bucket = self._buckets[frequency]
+            del bucket[key]
+            if not bucket:
+                del self._buckets[frequency]
+                if self._min_frequency == frequency:
+                    self._min_frequency = frequency + 1
+            
+            entry[1] = frequency + 1
+            self._buckets.setdefault(frequency + 1, OrderedDict())[key] = None
+            
+            self.hits += 1
+            return entry[0]
+    
+    def set(self, key, value, ttl):
+        """
+        Stores a value; a key already cached keeps its frequency
+        
+        Args:
+            key (hashable): Cache key
+            value: Value to cache
+            ttl (float): Seconds until the entry expires
+        """
+        if ttl <= 0 or self.max_entries <= 0:
+            return
+        
+        with self._lock:
+            expires_at = time.monotonic() + ttl
+            
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry[0] = value
+                entry[2] = expires_at
+                return
+            
+            if len(self._entries) >= self.max_entries:
+                if self._min_frequency not in self._buckets:
+                    self._min_frequency = min(self._buckets)
+                evicted, _ = self._buckets[self._min_frequency].popitem(last=False)
+                if not self._buckets[self._min_frequency]:
+                    del self._buckets[self._min_frequency]
+                del self._entries[evicted]
+                self.evictions += 1
+            
+            self._entries[key] = [value, 1, expires_at]
+            self._buckets.setdefault(1, OrderedDict())[key] = None
+            self._min_frequency = 1
+    
+    def delete(self, key):
+        """Removes an entry if present"""
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+    
+    def clear(self):
+        """Removes every entry"""
+        with self._lock:
+            self._entries.clear()
+            self._buckets.clear()
+            self._min_frequency = 0
+    
+    def _remove(self, key):
+        """Removes an entry; the caller must hold the lock"""
+        _, frequency, _ = self._entries.pop(key)
+        bucket = self._buckets[frequency]
+        del bucket[key]
+        if not bucket:
+            del self._buckets[frequency]
+    
+    def stats(self):
+        """
+        Returns cache usage counters
+        
+        Returns:
+            dict: Entry count, hits, misses, hit ratio, evictions and expirations
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations
+            }
+
+class _Call:
+    """Result holder for one in-flight SingleFlight call"""
+    
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class SingleFlight:
+    """
+    Collapses concurrent calls for the same key into a single execution
+    
+    The first caller for a key runs the function; callers arriving while it
+    is still running wait for it and receive the same result or exception.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.shared = 0
+    
+    def do(self, key, fn):
+        """
+        Runs fn for key unless a call for key is already in flight
+        
+        Args:
+            key (hashable): Deduplication key
+            fn (callable): Zero-argument function to run
+        
+        Returns:
+            The result of fn, possibly computed by another thread
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            is_leader = call is None
+            if is_leader:
+                call = _Call()
+                self._calls[key] = call
+            else:
+                self.shared += 1
+        
+        if not is_leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+    
+    def in_flight(self, key):
+        """Returns whether a call for key is currently running"""
+        with self._lock:
+            return key in self._calls
\ No newline at end of file
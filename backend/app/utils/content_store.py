@@ -0,0 +1,175 @@
+from app.utils.database import Database
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Columns mirrored from a TMDB content summary, in insert order
+SUMMARY_COLUMNS = (
+    'title', 'original_title', 'overview', 'poster_path', 'backdrop_path',
+    'vote_average', 'popularity', 'release_date'
+)
+
+def to_content_id(media_type, tmdb_id):
+    """
+    Builds the content_id used by favorites and watch history
+    
+    Args:
+        media_type (str): 'movie' or 'tv'
+        tmdb_id (int): TMDB ID
+    
+    Returns:
+        str: "123" for movies, "tv_123" for TV shows
+    """
+    return f"tv_{tmdb_id}" if media_type == 'tv' else str(tmdb_id)
+
+def parse_content_id(content_id):
+    """
+    Splits a content_id into its media type and TMDB ID
+    
+    Args:
+        content_id (str): "123" for movies, "tv_123" for TV shows
+    
+    Returns:
+        tuple: (media_type, tmdb_id)
+    """
+    if content_id.startswith('tv_'):
+        return ('tv', int(content_id.replace('tv_', '')))
+    return ('movie', int(content_id))
+
+def row_to_summary(row):
+    """
+    Builds a content summary from a content_metadata row
+    
+    Args:
+        row (dict): Row with media_type, tmdb_id and the SUMMARY_COLUMNS
+    
+    Returns:
+        dict: Summary with the same keys as summarize_content
+    """
+    release_date = row['release_date'].isoformat() if row['release_date'] else None
+    
+    return {
+        'id': row['tmdb_id'],
+        'media_type': row['media_type'],
+        'title': row['title'],
+        'original_title': row['original_title'],
+        'overview': row['overview'],
+        'poster_path': row['poster_path'],
+        'backdrop_path': row['backdrop_path'],
+        'vote_average': row['vote_average'],
+        'popularity': row['popularity'],
+        'release_date': release_date,
+        'year': int(release_date[:4]) if release_date else None
+    }
+
+class ContentStore:
+    """
+    Local mirror of TMDB content summaries in the content_metadata table
+    
+    Rows are keyed by content_id and written through from TMDB responses.
+    Each row records when it was fetched so readers can decide whether it
+    is still fresh enough to serve without asking TMDB again.
+    """
+    
+    @staticmethod
+    def get_many(content_ids):
+        """
+        Looks up summaries for many content IDs with a single query
+        
+        Args:
+            content_ids (list): Content IDs to look up
+        
+        Returns:
+            dict: content_id -> (summary, age in seconds) for the stored rows;
+                empty if the store cannot be read
+        """
+        content_ids = list(dict.fromkeys(content_ids))
+        if not content_ids:
+            return {}
+        
+        placeholders = ', '.join(['%s'] * len(content_ids))
+        
+        try:
+            rows = Database.execute_query(
+                f"""
+                SELECT content_id, media_type, tmdb_id, {', '.join(SUMMARY_COLUMNS)},
+                       TIMESTAMPDIFF(SECOND, fetched_at, CURRENT_TIMESTAMP) AS age
+                FROM content_metadata
+                WHERE content_id IN ({placeholders})
+                """,
+                tuple(content_ids)
+            )
+        except Exception as e:
+            logger.warning(f"Content metadata lookup failed, falling back to TMDB: {e}")
+            return {}
+        
+        return {row['content_id']: (row_to_summary(row), row['age']) for row in rows}
+    
+    @staticmethod
+    def iter_all(chunk_size=5000):
+        """
+        Yields every stored summary, reading the table in primary key order
+        
+        Args:
+            chunk_size (int): Rows read per query
+        
+        Yields:
+            dict: Summary with the same keys as summarize_content
+        """
+        last_id = ''
+        
+        while True:
+            rows = Database.execute_query(
+                f"""
+                SELECT content_id, media_type, tmdb_id, {', '.join(SUMMARY_COLUMNS)}
+                FROM content_metadata
+                WHERE content_id > %s
+                ORDER BY content_id
+                LIMIT %s
+                """,
+                (last_id, chunk_size)
+            )
+            
+            if not rows:
+                return
+            
+            for row in rows:
+                yield row_to_summary(row)
+            
+            last_id = rows[-1]['content_id']
+    
+    @staticmethod
+    def upsert_many(summaries):
+        """
+        Inserts or refreshes summaries in one multi-row statement
+        
+        Args:
+            summaries (list): Summaries as built by summarize_content
+        
+        Returns:
+            int: Number of affected rows
+        """
+        rows = {}
+        for summary in summaries:
+            if not summary.get('id') or summary.get('media_type') not in ('movie', 'tv'):
+                continue
+            
+            content_id = to_content_id(summary['media_type'], summary['id'])
+            rows[content_id] = (content_id, summary['media_type'], summary['id']) + tuple(
+                summary.get(column) for column in SUMMARY_COLUMNS
+            )
+        
+        if not rows:
+            return 0
+        
+        columns = ('content_id', 'media_type', 'tmdb_id') + SUMMARY_COLUMNS
+        updates = ', '.join(f"{column} = VALUES({column})" for column in SUMMARY_COLUMNS)
+        
+        return Database.execute_many(
+            f"""
+            INSERT INTO content_metadata ({', '.join(columns)})
+            VALUES ({', '.join(['%s'] * len(columns))})
+            ON DUPLICATE KEY UPDATE {updates}, fetched_at = CURRENT_TIMESTAMP
+            """,
+            list(rows.values())
+        )
\ No newline at end of file
@@ -0,0 +1,269 @@
+import os
+import time
+import threading
+from datetime import datetime
+from flask import current_app
+from app.utils.database import Database
+import logging
+
+logger = logging.getLogger(__name__)
+
+_snapshot = None
+_snapshot_pid = None
+_snapshot_lock = threading.Lock()
+
+# user_stats field counting each role, by role_id
+ROLE_COUNT_FIELDS = {1: 'superadmin_count', 2: 'admin_count', 3: 'user_count'}
+
+def compute_dashboard_stats():
+    """
+    Runs the admin dashboard aggregates
+    
+    Returns:
+        dict: User, subscription, plan, access code and registration statistics
+    """
+    # Get user stats
+    user_stats = Database.get_single_result(
+        """
+        SELECT
+            COUNT(*) as total_users,
+            SUM(CASE WHEN role_id = 1 THEN 1 ELSE 0 END) as superadmin_count,
+            SUM(CASE WHEN role_id = 2 THEN 1 ELSE 0 END) as admin_count,
+            SUM(CASE WHEN role_id = 3 THEN 1 ELSE 0 END) as user_count,
+            COUNT(DISTINCT CASE WHEN last_login >= DATE_SUB(NOW(), INTERVAL 7 DAY) THEN user_id END) as active_users_last_week
+        FROM users
+        """
+    )
+    
+    # Get subscription stats
+    subscription_stats = Database.get_single_result(
+        """
+        SELECT
+            COUNT(*) as total_subscriptions,
+            SUM(CASE WHEN is_active = TRUE AND end_date > NOW() THEN 1 ELSE 0 END) as active_subscriptions,
+            COUNT(DISTINCT user_id) as users_with_subscription
+        FROM subscriptions
+        """
+    )
+    
+    # Get subscription plan distribution
+    subscription_plans = Database.execute_query(
+        """
+        SELECT
+            p.plan_name,
+            COUNT(*) as count,
+            ROUND(SUM(p.price), 2) as total_revenue
+        FROM subscriptions s
+        JOIN subscription_plans p ON s.plan_id = p.plan_id
+        WHERE s.is_active = TRUE AND s.end_date > NOW()
+        GROUP BY p.plan_id, p.plan_name
+        ORDER BY count DESC
+        """
+    )
+    
+    # Get access code stats
+    access_code_stats = Database.get_single_result(
+        """
+        SELECT
+            COUNT(*) as total_codes,
+            SUM(CASE WHEN used_by IS NOT NULL THEN 1 ELSE 0 END) as used_codes,
+            SUM(CASE WHEN used_by IS NULL AND is_active = TRUE AND expires_at > NOW() THEN 1 ELSE 0 END) as available_codes
+        FROM access_codes
+        """
+    )
+    
+    # Get recent user registrations (last 30 days)
+    recent_registrations = Database.execute_query(
+        """
+        SELECT DATE(created_at) as date, COUNT(*) as count
+        FROM users
+        WHERE created_at >= DATE_SUB(NOW(), INTERVAL 30 DAY)
+        GROUP BY DATE(created_at)
+        ORDER BY date DESC
+        """
+    )
+    
+    return {
+        'user_stats': user_stats,
+        'subscription_stats': subscription_stats,
+        'subscription_plans': subscription_plans,
+        'access_code_stats': access_code_stats,
+        'recent_registrations': recent_registrations
+    }
+
+class DashboardSnapshot:
+    """
+    In-memory copy of the admin dashboard statistics
+    
+    A background thread recomputes the statistics every `refresh_interval`
+    seconds. In between, writes that change them add their counter deltas
+    with apply(), so the aggregates run at a fixed rate however busy the
+    site is and dashboard requests only read memory. The periodic recompute
+    also reconciles changes made by other processes, and any delta that
+    raced it.
+    """
+    
+    def __init__(self, refresh_interval=300.0):
+        """
+        Args:
+            refresh_interval (float): Seconds between scheduled recomputes
+        """
+        self.refresh_interval = refresh_interval
+        
+        self._current = None  # (stats, as_of), replaced as a whole
+        self._refresh_lock = threading.Lock()
+        self._apply_lock = threading.Lock()
+        self._thread = None
+        
+        self.refreshes = 0
+    
+    def start(self):
+        """Starts the background refresh thread"""
+        self._thread = threading.Thread(target=self._run, name='dashboard-stats', daemon=True)
+        self._thread.start()
+        return self
+    
+    def get(self):
+        """
+        Returns the current statistics, computing them on first use
+        
+        Returns:
+            tuple: (stats dict, as_of datetime of the last recompute)
+        """
+        current = self._current
+        if current is None:
+            with self._refresh_lock:
+                current = self._current or self._refresh()
+        return current
+    
+    def refresh(self):
+        """
+        Recomputes the statistics and swaps them in
+        
+        Returns:
+            tuple: (stats dict, as_of datetime)
+        """
+        with self._refresh_lock:
+            return self._refresh()
+    
+    def _refresh(self):
+        """Recomputes the statistics; the caller must hold the refresh lock"""
+        stats = compute_dashboard_stats()
+        
+        with self._apply_lock:
+            current = self._current = (stats, datetime.now())
+        
+        self.refreshes += 1
+        return current
+    
+    def apply(self, deltas):
+        """
+        Adds counter deltas to the current statistics
+        
+        Does nothing before the first recompute, which will include the
+        change anyway.
+        
+        Args:
+            deltas (dict): Deltas by section, see adjust_dashboard_stats
+        """
+        with self._apply_lock:
+            if self._current is None:
+                return
+            
+            stats, as_of = self._current
+            stats = dict(stats)
+            
+            for section in ('user_stats', 'subscription_stats', 'access_code_stats'):
+                if deltas.get(section) and stats.get(section) is not None:
+                    counters = dict(stats[section])
+                    for field, delta in deltas[section].items():
+                        counters[field] = (counters.get(field) or 0) + delta
+                    stats[section] = counters
+            
+            if deltas.get('subscription_plans'):
+                plans = {plan['plan_name']: dict(plan) for plan in stats['subscription_plans']}
+                for plan_name, count, revenue in deltas['subscription_plans']:
+                    plan = plans.setdefault(plan_name, {'plan_name': plan_name, 'count': 0, 'total_revenue': 0})
+                    plan['count'] += count
+                    plan['total_revenue'] += revenue
+                stats['subscription_plans'] = sorted(
+                    (plan for plan in plans.values() if plan['count'] > 0),
+                    key=lambda plan: plan['count'],
+                    reverse=True
+                )
+            
+            if deltas.get('recent_registrations'):
+                days = {row['date']: dict(row) for row in stats['recent_registrations']}
+                for day, count in deltas['recent_registrations'].items():
+                    if day in days or count > 0:
+                        days.setdefault(day, {'date': day, 'count': 0})['count'] += count
+                stats['recent_registrations'] = sorted(
+                    (row for row in days.values() if row['count'] > 0),
+                    key=lambda row: row['date'],
+                    reverse=True
+                )
+            
+            self._current = (stats, as_of)
+    
+    def _run(self):
+        """Background loop recomputing on the interval"""
+        while True:
+            time.sleep(self.refresh_interval)
+            
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.error(f"Error refreshing dashboard statistics: {e}")
+
+def get_dashboard_snapshot():
+    """
+    Returns the process-wide dashboard snapshot, starting it on first use
+    
+    A new snapshot is started after a fork since the refresh thread does not
+    survive it.
+    
+    Returns:
+        DashboardSnapshot: The snapshot
+    """
+    global _snapshot, _snapshot_pid
+    
+    pid = os.getpid()
+    
+    if _snapshot is None or _snapshot_pid != pid:
+        with _snapshot_lock:
+            if _snapshot is None or _snapshot_pid != pid:
+                _snapshot = DashboardSnapshot(
+                    refresh_interval=current_app.config.get('DASHBOARD_STATS_REFRESH_INTERVAL', 300)
+                ).start()
+                _snapshot_pid = pid
+    
+    return _snapshot
+
+def adjust_dashboard_stats(user_stats=None, subscription_stats=None, access_code_stats=None,
+                           subscription_plans=None, recent_registrations=None):
+    """
+    Adds counter deltas to the dashboard statistics once the current unit of work commits
+    
+    Does nothing in processes that have not served the dashboard yet; their
+    first recompute reads the change from the database.
+    
+    Args:
+        user_stats (dict): Deltas by user_stats field
+        subscription_stats (dict): Deltas by subscription_stats field
+        access_code_stats (dict): Deltas by access_code_stats field
+        subscription_plans (list): (plan name, count delta, revenue delta) tuples
+        recent_registrations (dict): Deltas by registration date
+    """
+    deltas = {
+        'user_stats': user_stats,
+        'subscription_stats': subscription_stats,
+        'access_code_stats': access_code_stats,
+        'subscription_plans': subscription_plans,
+        'recent_registrations': recent_registrations
+    }
+    
+    def apply():
+        if _snapshot is not None and _snapshot_pid == os.getpid():
+            _snapshot.apply(deltas)
+    
+    Database.on_commit(apply)
\ No newline at end of file
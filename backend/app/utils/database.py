@@ -1,38 +1,476 @@
+import os
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
+from flask import g, current_app, has_request_context
 import mysql.connector
 from mysql.connector import Error
 from app.config.config import active_config as config
 import logging
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+class PoolTimeoutError(Error):
+    """Raised when no pooled connection becomes available in time"""
+    pass
+
+class UnitOfWorkAbortedError(Error):
+    """Raised by statements run in a unit of work that has already been rolled back"""
+    pass
+
+class ConnectionPool:
+    """
+    Bounded, thread-safe pool of MySQL connections
+    
+    Up to `pool_size` idle connections are kept open for reuse and up to
+    `max_overflow` extra connections may be opened under load; overflow
+    connections are closed as soon as they are returned. Connections are
+    health-checked on checkout and reopened once they have been idle for
+    longer than `recycle` seconds.
+    """
+    
+    def __init__(self, connect_args, pool_size=5, max_overflow=10, timeout=30,
+                 recycle=3600, pre_ping=True):
+        """
+        Args:
+            connect_args (dict): Keyword arguments for mysql.connector.connect
+            pool_size (int): Number of idle connections kept open
+            max_overflow (int): Extra connections allowed beyond pool_size
+            timeout (float): Seconds to wait for a connection before giving up
+            recycle (int): Idle seconds after which a connection is reopened
+            pre_ping (bool): Whether to ping connections on checkout
+        """
+        self.connect_args = connect_args
+        self.pool_size = pool_size
+        self.max_overflow = max_overflow
+        self.timeout = timeout
+        self.recycle = recycle
+        self.pre_ping = pre_ping
+        
+        self._idle = deque()  # (connection, returned_at) pairs
+        self._open = 0  # idle + checked out connections
+        self._condition = threading.Condition(threading.Lock())
+    
+    @property
+    def max_connections(self):
+        """Hard cap on simultaneously open connections"""
+        return self.pool_size + self.max_overflow
+    
+    def _connect(self):
+        """Opens a new connection outside the pool's bookkeeping"""
+        return mysql.connector.connect(**self.connect_args)
+    
+    def _is_usable(self, connection, returned_at):
+        """Checks whether an idle connection can be handed out again"""
+        if self.recycle and time.monotonic() - returned_at > self.recycle:
+            return False
+        
+        if self.pre_ping:
+            try:
+                return connection.is_connected()
+            except Error:
+                return False
+        
+        return True
+    
+    def _discard(self, connection):
+        """Closes a connection and frees its slot in the pool"""
+        try:
+            connection.close()
+        except Error:
+            pass
+        
+        with self._condition:
+            self._open -= 1
+            self._condition.notify()
+    
+    def acquire(self):
+        """
+        Checks a connection out of the pool
+        
+        Returns:
+            MySQLConnection: A healthy connection
+        
+        Raises:
+            PoolTimeoutError: If the pool stays exhausted for `timeout` seconds
+        """
+        deadline = time.monotonic() + self.timeout
+        
+        while True:
+            connection = None
+            returned_at = None
+            
+            with self._condition:
+                while not self._idle and self._open >= self.max_connections:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise PoolTimeoutError(
+                            f"Timed out waiting for a database connection "
+                            f"({self.max_connections} in use)"
+                        )
+                    self._condition.wait(remaining)
+                
+                if self._idle:
+                    # Most recently returned first, so hot connections stay warm
+                    connection, returned_at = self._idle.pop()
+                else:
+                    # Reserve a slot before connecting so concurrent callers respect the cap
+                    self._open += 1
+            
+            if connection is None:
+                try:
+                    return self._connect()
+                except Error:
+                    with self._condition:
+                        self._open -= 1
+                        self._condition.notify()
+                    raise
+            
+            if self._is_usable(connection, returned_at):
+                return connection
+            
+            # Stale or broken connection, drop it and try again
+            self._discard(connection)
+    
+    def release(self, connection):
+        """
+        Returns a connection to the pool
+        
+        Any open transaction is rolled back so the next borrower starts from a
+        clean state.
+        
+        Args:
+            connection (MySQLConnection): Connection previously acquired from this pool
+        """
+        try:
+            if connection.in_transaction:
+                connection.rollback()
+        except Error:
+            self._discard(connection)
+            return
+        
+        with self._condition:
+            if len(self._idle) < self.pool_size:
+                self._idle.append((connection, time.monotonic()))
+                self._condition.notify()
+                return
+        
+        # Pool is full, this was an overflow connection
+        self._discard(connection)
+    
+    def close_all(self):
+        """Closes every idle connection"""
+        with self._condition:
+            idle = list(self._idle)
+            self._idle.clear()
+        
+        for connection, _ in idle:
+            self._discard(connection)
+    
+    def status(self):
+        """
+        Returns a snapshot of pool usage
+        
+        Returns:
+            dict: Open, idle and checked out connection counts
+        """
+        with self._condition:
+            return {
+                'open': self._open,
+                'idle': len(self._idle),
+                'in_use': self._open - len(self._idle),
+                'max_connections': self.max_connections
+            }
+
+class UnitOfWork:
+    """
+    One connection and transaction shared by a group of queries
+    
+    Queries run inside a unit of work reuse a single pooled connection and
+    their writes are committed together when the unit ends, instead of each
+    statement checking out its own connection and committing on its own.
+    
+    Once the unit has pending writes, each statement is preceded by a
+    savepoint so a failing statement is undone on its own. When that is not
+    possible (a deadlock or a lost connection ends the whole transaction),
+    the unit is rolled back and marked as failed: later statements raise
+    and the unit never commits.
+    """
+    
+    SAVEPOINT = 'unit_of_work_statement'
+    
+    def __init__(self):
+        self.connection = None
+        self.has_writes = False
+        self.failed = False
+        self.commit_callbacks = []
+    
+    def get_connection(self):
+        """Returns the unit's connection, checking one out on first use"""
+        if self.connection is None:
+            self.connection = Database.get_connection()
+        return self.connection
+    
+    def begin_statement(self):
+        """
+        Prepares the unit for a statement
+        
+        Returns:
+            str or None: Savepoint to roll back to if the statement fails,
+            None when there are no pending writes to protect
+        
+        Raises:
+            UnitOfWorkAbortedError: If an earlier statement aborted the unit
+        """
+        if self.failed:
+            raise UnitOfWorkAbortedError("An earlier statement aborted this unit of work")
+        
+        connection = self.get_connection()
+        if not self.has_writes:
+            return None
+        
+        # Reusing the name replaces the previous savepoint
+        cursor = connection.cursor()
+        try:
+            cursor.execute(f"SAVEPOINT {self.SAVEPOINT}")
+        finally:
+            cursor.close()
+        return self.SAVEPOINT
+    
+    def abort_statement(self, savepoint):
+        """
+        Undoes a failed statement, keeping the unit's earlier writes
+        
+        Args:
+            savepoint (str or None): Savepoint returned by begin_statement
+        """
+        if self.failed or self.connection is None:
+            return
+        
+        if savepoint is not None:
+            cursor = None
+            try:
+                cursor = self.connection.cursor()
+                cursor.execute(f"ROLLBACK TO SAVEPOINT {savepoint}")
+                return
+            except Error as e:
+                logger.error(f"Error rolling back to savepoint: {e}")
+            finally:
+                if cursor:
+                    cursor.close()
+        elif not self.has_writes:
+            # Nothing pending, so ending the transaction loses nothing
+            try:
+                self.connection.rollback()
+            except Error as e:
+                logger.error(f"Error rolling back unit of work: {e}")
+            return
+        
+        # The transaction itself is gone; never commit what is left of it
+        self.rollback()
+        self.failed = True
+    
+    def commit(self):
+        """Commits pending writes, if any"""
+        if self.failed:
+            self.rollback()
+            return
+        
+        if self.connection is not None and self.has_writes:
+            self.connection.commit()
+        self.has_writes = False
+    
+        callbacks, self.commit_callbacks = self.commit_callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                logger.error(f"Error in post-commit callback: {e}")
+    
+    def rollback(self):
+        """Discards pending writes"""
+        if self.connection is not None:
+            try:
+                self.connection.rollback()
+            except Error as e:
+                logger.error(f"Error rolling back unit of work: {e}")
+        self.has_writes = False
+        self.commit_callbacks = []
+    
+    def release(self):
+        """Hands the connection back to the pool"""
+        if self.connection is not None:
+            Database.release_connection(self.connection)
+            self.connection = None
+
 class Database:
     """
     Database utility class for MySQL operations
     """
     
+    _pool = None
+    _pool_pid = None
+    _pool_lock = threading.Lock()
+    _local = threading.local()
+    
+    @staticmethod
+    def get_pool():
+        """
+        Returns the process-wide connection pool, creating it on first use
+        
+        The pool is recreated after a fork so worker processes never share
+        sockets with their parent.
+        """
+        pid = os.getpid()
+        
+        if Database._pool is None or Database._pool_pid != pid:
+            with Database._pool_lock:
+                if Database._pool is None or Database._pool_pid != pid:
+                    Database._pool = ConnectionPool(
+                        {
+                            'host': config.DB_HOST,
+                            'database': config.DB_NAME,
+                            'user': config.DB_USER,
+                            'password': config.DB_PASSWORD,
+                            'port': config.DB_PORT
+                        },
+                        pool_size=config.DB_POOL_SIZE,
+                        max_overflow=config.DB_POOL_MAX_OVERFLOW,
+                        timeout=config.DB_POOL_TIMEOUT,
+                        recycle=config.DB_POOL_RECYCLE,
+                        pre_ping=config.DB_POOL_PRE_PING
+                    )
+                    Database._pool_pid = pid
+        
+        return Database._pool
+    
     @staticmethod
     def get_connection():
         """
-        Creates and returns a connection to the database
+        Checks out a connection from the pool
+        
+        Connections must be handed back with Database.release_connection.
         """
         try:
-            connection = mysql.connector.connect(
-                host=config.DB_HOST,
-                database=config.DB_NAME,
-                user=config.DB_USER,
-                password=config.DB_PASSWORD,
-                port=config.DB_PORT
-            )
-            
-            if connection.is_connected():
-                return connection
+            return Database.get_pool().acquire()
                 
         except Error as e:
             logger.error(f"Error connecting to MySQL database: {e}")
             raise
     
+    @staticmethod
+    def release_connection(connection):
+        """
+        Returns a connection obtained from get_connection to the pool
+        
+        Args:
+            connection (MySQLConnection): The connection to release
+        """
+        Database.get_pool().release(connection)
+    
+    @staticmethod
+    def init_app(app):
+        """
+        Binds a unit of work to every request handled by the app
+        
+        The first query of a request checks out a connection that is reused
+        for the rest of the request. Writes are committed once, after the view
+        returns a non-5xx response, and the connection is released when the
+        app context is torn down.
+        
+        Args:
+            app (Flask): The Flask application
+        """
+        @app.after_request
+        def commit_unit_of_work(response):
+            unit = g.get('_db_unit_of_work')
+            if unit is not None:
+                if response.status_code < 500:
+                    unit.commit()
+                else:
+                    unit.rollback()
+            return response
+        
+        @app.teardown_appcontext
+        def release_unit_of_work(exception=None):
+            unit = g.pop('_db_unit_of_work', None)
+            if unit is not None:
+                if unit.has_writes:
+                    # The request failed before after_request could commit
+                    unit.rollback()
+                unit.release()
+    
+    @staticmethod
+    def current_unit_of_work():
+        """
+        Returns the unit of work queries should join, if any
+        
+        An explicit Database.transaction() takes precedence; otherwise, inside
+        a request, the request-scoped unit bound to flask.g is used.
+        
+        Returns:
+            UnitOfWork or None: The active unit of work
+        """
+        unit = getattr(Database._local, 'unit_of_work', None)
+        if unit is not None:
+            return unit
+        
+        if has_request_context() and current_app.config.get('DB_REQUEST_SCOPED', True):
+            if '_db_unit_of_work' not in g:
+                g._db_unit_of_work = UnitOfWork()
+            return g._db_unit_of_work
+        
+        return None
+    
+    @staticmethod
+    def on_commit(callback):
+        """
+        Runs callback once the current unit of work has committed
+        
+        Use this for side effects that must not be seen before the data is,
+        such as invalidating caches. Outside a unit of work writes are
+        committed immediately, so callback runs right away. Callbacks are
+        dropped if the unit rolls back.
+        
+        Args:
+            callback (callable): Zero-argument function
+        """
+        unit = Database.current_unit_of_work()
+        if unit is None:
+            callback()
+        else:
+            unit.commit_callbacks.append(callback)
+    
+    @staticmethod
+    @contextmanager
+    def transaction():
+        """
+        Runs the enclosed queries on one connection and commits them together
+        
+        Joins the current unit of work when one is already active (for example
+        the request-scoped one), in which case the outer unit commits.
+        
+        Yields:
+            UnitOfWork: The active unit of work
+        """
+        existing = Database.current_unit_of_work()
+        if existing is not None:
+            yield existing
+            return
+        
+        unit = UnitOfWork()
+        Database._local.unit_of_work = unit
+        try:
+            yield unit
+            unit.commit()
+        except Exception:
+            unit.rollback()
+            raise
+        finally:
+            Database._local.unit_of_work = None
+            unit.release()
+    
     @staticmethod
     def execute_query(query, params=None, fetch=True):
         """
@@ -47,12 +485,18 @@ class Database:
             If fetch is True, returns the query result
             If fetch is False, returns the last row id
         """
+        unit = Database.current_unit_of_work()
         connection = None
+        savepoint = None
         cursor = None
         result = None
         
         try:
-            connection = Database.get_connection()
+            if unit:
+                savepoint = unit.begin_statement()
+                connection = unit.connection
+            else:
+                connection = Database.get_connection()
             cursor = connection.cursor(dictionary=True)
             
             if params:
@@ -62,6 +506,10 @@ class Database:
                 
             if fetch:
                 result = cursor.fetchall()
+            elif unit:
+                # Commit is deferred until the unit of work ends
+                unit.has_writes = True
+                result = cursor.lastrowid
             else:
                 connection.commit()
                 result = cursor.lastrowid
@@ -69,7 +517,9 @@ class Database:
             return result
             
         except Error as e:
-            if connection:
+            if unit:
+                unit.abort_statement(savepoint)
+            elif connection:
                 connection.rollback()
             logger.error(f"Error executing query: {e}")
             raise
@@ -77,8 +527,58 @@ class Database:
         finally:
             if cursor:
                 cursor.close()
-            if connection and connection.is_connected():
-                connection.close()
+            if connection and not unit:
+                Database.release_connection(connection)
+    
+    @staticmethod
+    def execute_write(query, params=None):
+        """
+        Executes a write and reports what it changed
+        
+        Useful for upserts, where MySQL reports 1 affected row for an
+        insert, 2 for an update and 0 when the existing row was left as is.
+        
+        Args:
+            query (str): SQL statement to execute
+            params (tuple, optional): Parameters for the statement
+        
+        Returns:
+            tuple: (affected row count, last row id)
+        """
+        unit = Database.current_unit_of_work()
+        connection = None
+        savepoint = None
+        cursor = None
+        
+        try:
+            if unit:
+                savepoint = unit.begin_statement()
+                connection = unit.connection
+            else:
+                connection = Database.get_connection()
+            cursor = connection.cursor()
+            
+            cursor.execute(query, params)
+            if unit:
+                unit.has_writes = True
+            else:
+                connection.commit()
+            
+            return (cursor.rowcount, cursor.lastrowid)
+        
+        except Error as e:
+            if unit:
+                unit.abort_statement(savepoint)
+            elif connection:
+                connection.rollback()
+            logger.error(f"Error executing write: {e}")
+            raise
+        
+        finally:
+            if cursor:
+                cursor.close()
+            if connection and not unit:
+                Database.release_connection(connection)
     
     @staticmethod
     def execute_many(query, params_list):
@@ -92,20 +592,31 @@ class Database:
         Returns:
             int: Number of affected rows
         """
+        unit = Database.current_unit_of_work()
         connection = None
+        savepoint = None
         cursor = None
         
         try:
-            connection = Database.get_connection()
+            if unit:
+                savepoint = unit.begin_statement()
+                connection = unit.connection
+            else:
+                connection = Database.get_connection()
             cursor = connection.cursor()
             
             cursor.executemany(query, params_list)
-            connection.commit()
+            if unit:
+                unit.has_writes = True
+            else:
+                connection.commit()
             
             return cursor.rowcount
             
         except Error as e:
-            if connection:
+            if unit:
+                unit.abort_statement(savepoint)
+            elif connection:
                 connection.rollback()
             logger.error(f"Error executing many: {e}")
             raise
@@ -113,8 +624,8 @@ class Database:
         finally:
             if cursor:
                 cursor.close()
-            if connection and connection.is_connected():
-                connection.close()
+            if connection and not unit:
+                Database.release_connection(connection)
     
     @staticmethod
     def get_single_result(query, params=None):
@@ -0,0 +1,158 @@
+import os
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import bcrypt
+from flask import current_app
+from app.utils.hashing_worker import hashpw, checkpw
+import logging
+
+logger = logging.getLogger(__name__)
+
+class HashingOverloadedError(Exception):
+    """Raised when too many password hashes are already queued"""
+    pass
+
+class PasswordHasher:
+    """
+    Runs bcrypt on a dedicated process pool
+    
+    bcrypt is deliberately slow, so hashing on the request thread ties a
+    worker up for the full hash. Work is sent to a pool of BCRYPT_WORKERS
+    processes instead. At most BCRYPT_MAX_PENDING hashes may be running or
+    queued at once; beyond that HashingOverloadedError is raised so the
+    request can be answered with 503 instead of waiting behind the queue.
+    """
+    
+    _executor = None
+    _executor_pid = None
+    _slots = None
+    _lock = threading.Lock()
+    
+    @staticmethod
+    def get_executor():
+        """
+        Returns the process pool, creating it on first use
+        
+        Workers are started with the spawn method so they never inherit
+        locks or sockets from a threaded parent; the functions they run live
+        in app.utils.hashing_worker, which imports nothing from the app. The
+        pool is recreated after a fork.
+        
+        Returns:
+            ProcessPoolExecutor or None: The pool, or None when BCRYPT_WORKERS is 0
+        """
+        workers = current_app.config.get('BCRYPT_WORKERS', os.cpu_count() or 1)
+        if not workers:
+            return None
+        
+        pid = os.getpid()
+        
+        if PasswordHasher._executor is None or PasswordHasher._executor_pid != pid:
+            with PasswordHasher._lock:
+                if PasswordHasher._executor is None or PasswordHasher._executor_pid != pid:
+                    max_pending = current_app.config.get('BCRYPT_MAX_PENDING', workers * 4)
+                    
+                    PasswordHasher._executor = ProcessPoolExecutor(
+                        max_workers=workers,
+                        mp_context=multiprocessing.get_context('spawn')
+                    )
+                    PasswordHasher._slots = threading.BoundedSemaphore(max(max_pending, workers))
+                    PasswordHasher._executor_pid = pid
+        
+        return PasswordHasher._executor
+    
+    @staticmethod
+    def run(fn, *args):
+        """
+        Runs fn on the pool and waits for its result
+        
+        Args:
+            fn (callable): Function from hashing_worker to run
+            *args: Arguments for fn
+        
+        Returns:
+            The result of fn
+        
+        Raises:
+            HashingOverloadedError: If BCRYPT_MAX_PENDING hashes are already pending
+        """
+        executor = PasswordHasher.get_executor()
+        if executor is None:
+            return fn(*args)
+        
+        slots = PasswordHasher._slots
+        if not slots.acquire(blocking=False):
+            logger.warning("Password hashing queue is full, rejecting request")
+            raise HashingOverloadedError('Too many password operations in progress')
+        
+        try:
+            future = executor.submit(fn, *args)
+        except Exception:
+            slots.release()
+            raise
+        
+        future.add_done_callback(lambda _: slots.release())
+        return future.result()
+    
+    @staticmethod
+    def get_rounds():
+        """Returns the target bcrypt cost factor"""
+        return current_app.config.get('BCRYPT_ROUNDS', 12)
+    
+    @staticmethod
+    def get_cost(hashed_password):
+        """
+        Reads the cost factor from a bcrypt hash
+        
+        Args:
+            hashed_password (str): Hash in modular crypt format, e.g. $2b$12$...
+        
+        Returns:
+            int: Cost factor, or None if the hash is not a bcrypt hash
+        """
+        parts = hashed_password.split('$')
+        if len(parts) < 4 or not parts[2].isdigit():
+            return None
+        return int(parts[2])
+    
+    @staticmethod
+    def needs_rehash(hashed_password):
+        """
+        Checks whether a hash was made with a cost other than BCRYPT_ROUNDS
+        
+        Args:
+            hashed_password (str): The stored hash
+        
+        Returns:
+            bool: True if the hash should be replaced
+        """
+        return PasswordHasher.get_cost(hashed_password) != PasswordHasher.get_rounds()
+    
+    @staticmethod
+    def hash(password):
+        """
+        Hash a password with bcrypt at the BCRYPT_ROUNDS cost
+        
+        Args:
+            password (str): The password to hash
+        
+        Returns:
+            str: The hashed password
+        """
+        salt = bcrypt.gensalt(PasswordHasher.get_rounds())
+        return PasswordHasher.run(hashpw, password.encode('utf-8'), salt).decode('utf-8')
+    
+    @staticmethod
+    def verify(password, hashed_password):
+        """
+        Verify a password against a bcrypt hash
+        
+        Args:
+            password (str): The password to verify
+            hashed_password (str): The hashed password to check against
+        
+        Returns:
+            bool: True if password matches, False otherwise
+        """
+        return PasswordHasher.run(checkpw, password.encode('utf-8'), hashed_password.encode('utf-8'))
\ No newline at end of file
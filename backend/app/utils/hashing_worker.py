@@ -0,0 +1,13 @@
+import bcrypt
+
+# Functions run by the bcrypt process pool in app/utils/hashing.py. Spawned
+# workers import the module of the function they run; this one imports
+# nothing but bcrypt, so running it needs none of the app's state.
+
+def hashpw(password, salt):
+    """Hashes a password; runs in a worker process"""
+    return bcrypt.hashpw(password, salt)
+
+def checkpw(password, hashed_password):
+    """Checks a password against a hash; runs in a worker process"""
+    return bcrypt.checkpw(password, hashed_password)
\ No newline at end of file
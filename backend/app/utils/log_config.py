@@ -0,0 +1,146 @@
+import os
+import sys
+import json
+import queue
+import atexit
+import random
+import logging
+from logging.handlers import QueueHandler, QueueListener
+
+# Attributes every LogRecord has; anything else was passed through `extra`
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+_listener = None
+_listener_pid = None
+_queue_handler = None
+
+class SamplingFilter(logging.Filter):
+    """
+    Keeps only a fraction of DEBUG records from selected loggers
+    
+    Rates are keyed by logger name and also apply to child loggers, so
+    {'app.utils.auth': 0.01} keeps about one in a hundred debug records
+    from the auth decorators. Records above DEBUG always pass.
+    """
+    
+    def __init__(self, rates):
+        """
+        Args:
+            rates (dict): Logger name -> fraction of debug records to keep
+        """
+        super().__init__()
+        self.rates = rates
+    
+    def filter(self, record):
+        if record.levelno > logging.DEBUG or not self.rates:
+            return True
+        
+        name = record.name
+        while name:
+            if name in self.rates:
+                return random.random() < self.rates[name]
+            name = name.rpartition('.')[0]
+        
+        return True
+
+class JsonFormatter(logging.Formatter):
+    """Formats records as one JSON object per line, including `extra` fields"""
+    
+    def format(self, record):
+        entry = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage()
+        }
+        
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith('_'):
+                entry[key] = value
+        
+        if record.exc_info:
+            entry['exc_info'] = self.formatException(record.exc_info)
+        
+        return json.dumps(entry, default=str)
+
+def parse_sample_rates(value):
+    """
+    Parses LOG_SAMPLE_RATES, e.g. "app.utils.auth=0.01,app.routes.access_codes=0.1"
+    
+    Args:
+        value (str): Comma-separated logger=rate pairs
+    
+    Returns:
+        dict: Logger name -> rate between 0 and 1
+    """
+    rates = {}
+    for pair in (value or '').split(','):
+        name, _, rate = pair.strip().partition('=')
+        if name and rate:
+            rates[name] = min(max(float(rate), 0.0), 1.0)
+    return rates
+
+def _start_listener(queue_handler, handler):
+    """Starts a listener writing queue_handler's records to handler"""
+    global _listener, _listener_pid, _queue_handler
+    
+    _listener = QueueListener(queue_handler.queue, handler, respect_handler_level=True)
+    _listener.start()
+    _listener_pid = os.getpid()
+    _queue_handler = queue_handler
+    
+    # Flush whatever is still queued when the process exits
+    atexit.register(_listener.stop)
+
+def _restart_listener_after_fork():
+    """
+    Gives a forked child its own queue and listener
+    
+    The listener thread does not survive a fork, e.g. of workers from an app
+    created with gunicorn --preload, so without this the child's records
+    would pile up on the queue unwritten.
+    """
+    if _listener is None or _listener_pid == os.getpid():
+        return
+    
+    # Records the parent had queued are the parent's to write
+    _queue_handler.queue = queue.SimpleQueue()
+    _start_listener(_queue_handler, _listener.handlers[0])
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_restart_listener_after_fork)
+
+def configure_logging(app):
+    """
+    Sets up process-wide logging once, from the app configuration
+    
+    Records are put on an in-memory queue by the calling thread and written
+    to stderr by a background QueueListener, so request threads never block
+    on handler I/O. Sampled loggers are filtered before anything is queued.
+    A forked child starts a listener of its own.
+    
+    Args:
+        app (Flask): The Flask application
+    """
+    if _listener is not None and _listener_pid == os.getpid():
+        return
+    
+    if app.config.get('LOG_FORMAT', 'text') == 'json':
+        formatter = JsonFormatter()
+    else:
+        formatter = logging.Formatter('%(asctime)s %(levelname)s [%(name)s] %(message)s')
+    
+    stream_handler = logging.StreamHandler(sys.stderr)
+    stream_handler.setFormatter(formatter)
+    
+    log_queue = queue.SimpleQueue()
+    queue_handler = QueueHandler(log_queue)
+    queue_handler.addFilter(SamplingFilter(parse_sample_rates(app.config.get('LOG_SAMPLE_RATES', ''))))
+    
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(app.config.get('LOG_LEVEL', 'INFO').upper())
+    
+    _start_listener(queue_handler, stream_handler)
\ No newline at end of file
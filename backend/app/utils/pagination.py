@@ -0,0 +1,201 @@
+import json
+import base64
+import threading
+from datetime import datetime
+from flask import request, current_app
+from app.utils.database import Database
+from app.utils.cache import TTLCache
+import logging
+
+logger = logging.getLogger(__name__)
+
+_count_cache = None
+_count_cache_lock = threading.Lock()
+
+class InvalidCursorError(ValueError):
+    """Raised when a pagination cursor cannot be decoded"""
+    pass
+
+def encode_cursor(sort_value, row_id):
+    """
+    Builds an opaque cursor pointing just past a row
+    
+    Args:
+        sort_value (datetime): The row's sort column value
+        row_id (int): The row's primary key
+    
+    Returns:
+        str: URL-safe cursor token
+    """
+    if isinstance(sort_value, datetime):
+        sort_value = sort_value.isoformat(sep=' ')
+    payload = json.dumps([sort_value, row_id], separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(payload).decode('ascii').rstrip('=')
+
+def decode_cursor(token):
+    """
+    Reads a cursor produced by encode_cursor
+    
+    Args:
+        token (str): Cursor token
+    
+    Returns:
+        tuple: (sort_value, row_id)
+    
+    Raises:
+        InvalidCursorError: If the token is malformed
+    """
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        return (datetime.fromisoformat(sort_value), int(row_id))
+    except Exception:
+        raise InvalidCursorError('Invalid cursor')
+
+def get_count_cache():
+    """
+    Returns the process-wide cache of listing totals
+    
+    Returns:
+        TTLCache: Cache of COUNT(*) results keyed by query and parameters
+    """
+    global _count_cache
+    
+    if _count_cache is None:
+        with _count_cache_lock:
+            if _count_cache is None:
+                _count_cache = TTLCache(
+                    max_entries=current_app.config.get('PAGINATION_COUNT_CACHE_MAX_ENTRIES', 1024)
+                )
+    
+    return _count_cache
+
+def cached_count(query, params):
+    """
+    Runs a COUNT(*) query, reusing the result for PAGINATION_COUNT_TTL seconds
+    
+    Args:
+        query (str): Query selecting a single `count` column
+        params (tuple): Query parameters
+    
+    Returns:
+        int: Row count
+    """
+    cache = get_count_cache()
+    key = (query, params)
+    
+    count = cache.get(key)
+    if count is None:
+        row = Database.get_single_result(query, params or None)
+        count = row['count'] if row else 0
+        cache.set(key, count, current_app.config.get('PAGINATION_COUNT_TTL', 60))
+    
+    return count
+
+def approximate_count(table):
+    """
+    Returns InnoDB's row estimate for a table without scanning it
+    
+    Args:
+        table (str): Table name
+    
+    Returns:
+        int: Estimated row count
+    """
+    row = Database.get_single_result(
+        """
+        SELECT TABLE_ROWS AS count
+        FROM information_schema.tables
+        WHERE table_schema = DATABASE() AND table_name = %s
+        """,
+        (table,)
+    )
+    return int(row['count'] or 0) if row else 0
+
+def paginate(select, from_clause, conditions, params, sort_column, id_column, table, default_per_page=10):
+    """
+    Runs one page of an admin listing, newest first
+    
+    Rows are ordered by (sort_column, id_column) descending. With a `cursor`
+    argument the page starts just past the cursor row, so each page is an
+    index range scan however deep it is. Requests without a cursor are
+    served by page number with OFFSET as before, and also get a next_cursor
+    to continue from.
+    
+    The `total` argument picks how the total is reported: "exact" reads a
+    COUNT(*) cached for PAGINATION_COUNT_TTL seconds, "approximate" uses the
+    table's row estimate when no filter is applied, and "none" skips it.
+    Page-number requests default to "exact", cursor requests to "none".
+    
+    Args:
+        select (str): SELECT list, including sort_column and id_column
+        from_clause (str): FROM clause with any joins
+        conditions (list): SQL conditions joined with AND
+        params (list): Parameters for the conditions
+        sort_column (str): Qualified sort column, e.g. "l.created_at"
+        id_column (str): Qualified primary key column, e.g. "l.log_id"
+        table (str): Table the estimate is read from for approximate totals
+        default_per_page (int): Page size when per_page is not given
+    
+    Returns:
+        tuple: (rows, pagination dict)
+    
+    Raises:
+        InvalidCursorError: If the cursor argument is malformed
+    """
+    max_per_page = current_app.config.get('PAGINATION_MAX_PER_PAGE', 100)
+    per_page = min(max(request.args.get('per_page', default_per_page, type=int), 1), max_per_page)
+    cursor = request.args.get('cursor')
+    page = max(request.args.get('page', 1, type=int), 1) if not cursor else None
+    total_mode = request.args.get('total', 'exact' if page else 'none')
+    
+    where = " WHERE " + " AND ".join(conditions) if conditions else ""
+    page_conditions = list(conditions)
+    page_params = list(params)
+    
+    if cursor:
+        sort_value, row_id = decode_cursor(cursor)
+        # Written with a plain upper bound on the sort column so MySQL can
+        # range-scan its index and prune partitions
+        page_conditions.append(f"{sort_column} <= %s AND ({sort_column} < %s OR {id_column} < %s)")
+        page_params.extend([sort_value, sort_value, row_id])
+    
+    query = f"SELECT {select} FROM {from_clause}"
+    if page_conditions:
+        query += " WHERE " + " AND ".join(page_conditions)
+    
+    # Fetch one extra row to know whether another page follows
+    query += f" ORDER BY {sort_column} DESC, {id_column} DESC LIMIT %s"
+    page_params.append(per_page + 1)
+    
+    if page:
+        query += " OFFSET %s"
+        page_params.append((page - 1) * per_page)
+    
+    rows = Database.execute_query(query, tuple(page_params))
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    
+    next_cursor = None
+    if has_more:
+        last = rows[-1]
+        next_cursor = encode_cursor(last[sort_column.split('.')[-1]], last[id_column.split('.')[-1]])
+    
+    total = None
+    if total_mode == 'approximate' and not conditions:
+        total = approximate_count(table)
+    elif total_mode in ('exact', 'approximate'):
+        total = cached_count(f"SELECT COUNT(*) AS count FROM {from_clause}{where}", tuple(params))
+    
+    pagination = {
+        'per_page': per_page,
+        'next_cursor': next_cursor,
+        'has_more': has_more,
+        'total': total
+    }
+    
+    if page:
+        pagination['page'] = page
+        pagination['pages'] = -(-total // per_page) if total is not None else None
+    
+    return rows, pagination
\ No newline at end of file
@@ -0,0 +1,163 @@
+from datetime import date, datetime
+from app.utils.database import Database
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Tables are range-partitioned on UNIX_TIMESTAMP(<timestamp column>) with one
+# partition per calendar month named pYYYYMM, plus a catch-all pmax
+CATCH_ALL_PARTITION = 'pmax'
+
+def month_start(value):
+    """
+    Returns the first day of the month containing a date
+    
+    Args:
+        value (date or datetime): Any day in the month
+    
+    Returns:
+        date: First day of that month
+    """
+    return date(value.year, value.month, 1)
+
+def add_months(month, count):
+    """
+    Moves the first day of a month by a number of months
+    
+    Args:
+        month (date): First day of a month
+        count (int): Months to add, may be negative
+    
+    Returns:
+        date: First day of the resulting month
+    """
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+def partition_name(month):
+    """
+    Returns the partition name holding a month, e.g. p202610
+    
+    Args:
+        month (date): First day of the month
+    
+    Returns:
+        str: Partition name
+    """
+    return month.strftime('p%Y%m')
+
+def partition_month(name):
+    """
+    Parses a monthly partition name
+    
+    Args:
+        name (str): Partition name
+    
+    Returns:
+        date or None: First day of the month, or None for other partitions
+    """
+    try:
+        return datetime.strptime(name, 'p%Y%m').date()
+    except ValueError:
+        return None
+
+def partition_definition(month):
+    """
+    Returns the PARTITION clause for one month
+    
+    Args:
+        month (date): First day of the month
+    
+    Returns:
+        str: Partition definition for CREATE/ALTER TABLE
+    """
+    upper = add_months(month, 1).strftime('%Y-%m-%d 00:00:00')
+    return f"PARTITION {partition_name(month)} VALUES LESS THAN (UNIX_TIMESTAMP('{upper}'))"
+
+def get_partitions(table):
+    """
+    Lists a table's partitions in order
+    
+    Args:
+        table (str): Table name
+    
+    Returns:
+        list: Dicts with partition_name and table_rows; empty if the table is not partitioned
+    """
+    partitions = Database.execute_query(
+        """
+        SELECT partition_name, table_rows
+        FROM information_schema.partitions
+        WHERE table_schema = DATABASE() AND table_name = %s AND partition_name IS NOT NULL
+        ORDER BY partition_ordinal_position
+        """,
+        (table,)
+    )
+    return [{key.lower(): value for key, value in row.items()} for row in partitions]
+
+def ensure_month_partitions(table, months_ahead, today=None):
+    """
+    Splits the catch-all partition so every month up to months_ahead has its own
+    
+    Reorganizing pmax only moves the rows already in it, which is none in
+    normal operation since the current month always has a partition.
+    
+    Args:
+        table (str): Partitioned table name
+        months_ahead (int): Months after the current one to create partitions for
+        today (date, optional): Reference day, defaults to today
+    
+    Returns:
+        list: Names of the partitions created
+    """
+    existing = [partition_month(p['partition_name']) for p in get_partitions(table)]
+    existing = [month for month in existing if month is not None]
+    
+    current = month_start(today or date.today())
+    last_wanted = add_months(current, months_ahead)
+    month = add_months(max(existing), 1) if existing else current
+    
+    months = []
+    while month <= last_wanted:
+        months.append(month)
+        month = add_months(month, 1)
+    
+    if not months:
+        return []
+    
+    definitions = ', '.join(partition_definition(month) for month in months)
+    Database.execute_query(
+        f"""
+        ALTER TABLE {table} REORGANIZE PARTITION {CATCH_ALL_PARTITION} INTO (
+            {definitions},
+            PARTITION {CATCH_ALL_PARTITION} VALUES LESS THAN MAXVALUE
+        )
+        """,
+        fetch=False
+    )
+    
+    created = [partition_name(month) for month in months]
+    logger.info(f"Created partitions {', '.join(created)} on {table}")
+    return created
+
+def expired_partitions(table, retention_months, today=None):
+    """
+    Lists monthly partitions that only hold rows older than the retention window
+    
+    Args:
+        table (str): Partitioned table name
+        retention_months (int): Number of whole months to keep before the current one
+        today (date, optional): Reference day, defaults to today
+    
+    Returns:
+        list: Names of expired partitions, oldest first
+    """
+    cutoff = add_months(month_start(today or date.today()), -retention_months)
+    expired = []
+    
+    for partition in get_partitions(table):
+        month = partition_month(partition['partition_name'])
+        if month is not None and month < cutoff:
+            expired.append(partition['partition_name'])
+    
+    return expired
\ No newline at end of file
@@ -0,0 +1,213 @@
+import os
+import time
+import threading
+import numpy as np
+from flask import current_app
+import logging
+
+logger = logging.getLogger(__name__)
+
+_model = None
+_model_pid = None
+_model_lock = threading.Lock()
+
+def interaction_strength(rating=None, watch_percentage=None):
+    """
+    Scores how much a user's interaction with a title says they liked it
+    
+    An explicit rating wins over watch progress; merely starting a title
+    counts for something, finishing it for as much as a 10/10 rating.
+    
+    Args:
+        rating (int, optional): 1-10 rating from user_ratings
+        watch_percentage (float, optional): Progress from watch_history
+    
+    Returns:
+        float: Strength between 0 and 1
+    """
+    if rating is not None:
+        return min(max(float(rating), 1.0), 10.0) / 10
+    return 0.2 + 0.8 * min(max(float(watch_percentage or 0), 0.0), 100.0) / 100
+
+def model_dtype(id_width, neighbors):
+    """
+    Returns the record layout of a recommendations file
+    
+    Each record is one title, sorted by content_id: its content_id, how
+    many users interacted with it, and its nearest titles as record
+    positions (-1 when there are fewer) with their similarity, best first.
+    
+    Args:
+        id_width (int): Bytes reserved for a content_id
+        neighbors (int): Neighbors kept per title
+    
+    Returns:
+        numpy.dtype: Structured record type
+    """
+    return np.dtype([
+        ('content_id', f'S{id_width}'),
+        ('users', np.int32),
+        ('neighbors', np.int32, (neighbors,)),
+        ('scores', np.float32, (neighbors,))
+    ])
+
+class RecommendationModel:
+    """
+    Item-item similarities built by scripts/build_recommendations.py
+    
+    The file is memory-mapped, so worker processes share its pages through
+    the OS page cache instead of each holding a copy. It is reopened when
+    the job replaces it, checked at most every `reload_interval` seconds.
+    """
+    
+    def __init__(self, path, reload_interval=60.0):
+        """
+        Args:
+            path (str): Recommendations file
+            reload_interval (float): Minimum seconds between checks for a newer file
+        """
+        self.path = path
+        self.reload_interval = reload_interval
+        
+        self._loaded = (None, None)  # (mapped records, positions by popularity), swapped as a pair
+        self._mtime = None
+        self._checked_at = None
+        self._lock = threading.Lock()
+        
+        self.requests = 0
+    
+    def _load(self):
+        """Returns the mapped records and popularity order, reopening the file if it was replaced"""
+        now = time.monotonic()
+        if self._checked_at is not None and now - self._checked_at < self.reload_interval:
+            return self._loaded
+        
+        with self._lock:
+            if self._checked_at is not None and now - self._checked_at < self.reload_interval:
+                return self._loaded
+            self._checked_at = now
+            
+            try:
+                mtime = os.stat(self.path).st_mtime
+            except FileNotFoundError:
+                return self._loaded
+            
+            if mtime != self._mtime:
+                try:
+                    # The job replaces the file atomically, so mappings of
+                    # the previous version stay valid for requests using it
+                    records = np.load(self.path, mmap_mode='r')
+                    self._loaded = (records, np.argsort(-records['users'], kind='stable')[:500])
+                    self._mtime = mtime
+                    logger.info(f"Loaded recommendations for {len(records)} titles from {self.path}")
+                except Exception as e:
+                    logger.error(f"Error loading recommendations from {self.path}: {e}")
+        
+        return self._loaded
+    
+    def recommend(self, seeds, limit):
+        """
+        Ranks titles similar to those a user interacted with
+        
+        A title scores the sum, over the user's titles, of its similarity to
+        each one times the strength of that interaction. Titles the user
+        already interacted with are left out.
+        
+        Args:
+            seeds (dict): content_id -> interaction strength
+            limit (int): Maximum number of titles
+        
+        Returns:
+            list: content_ids, best first; empty without a model or usable seeds
+        """
+        records, _ = self._load()
+        if records is None or not len(records) or not seeds:
+            return []
+        
+        self.requests += 1
+        content_ids = records['content_id']
+        
+        # Ids wider than the file's would be truncated into other titles' ids
+        width = content_ids.dtype.itemsize
+        encoded = {content_id.encode(): weight for content_id, weight in seeds.items()}
+        encoded = {key: weight for key, weight in encoded.items() if len(key) <= width}
+        if not encoded:
+            return []
+        
+        keys = np.array(list(encoded), dtype=content_ids.dtype)
+        weights = np.fromiter(encoded.values(), dtype=np.float32, count=len(encoded))
+        positions = np.searchsorted(content_ids, keys)
+        known = positions < len(records)
+        known[known] = content_ids[positions[known]] == keys[known]
+        positions, weights = positions[known], weights[known]
+        if not len(positions):
+            return []
+        
+        neighbors = records['neighbors'][positions]
+        scores = records['scores'][positions] * weights[:, None]
+        
+        valid = neighbors >= 0
+        candidates, inverse = np.unique(neighbors[valid], return_inverse=True)
+        totals = np.bincount(inverse, weights=scores[valid])
+        totals[np.isin(candidates, positions)] = 0
+        
+        best = np.argsort(-totals, kind='stable')[:limit]
+        best = best[totals[best] > 0]
+        return [content_ids[candidates[index]].decode() for index in best]
+    
+    def popular(self, limit, exclude=()):
+        """
+        Returns the titles the most users interacted with
+        
+        Args:
+            limit (int): Maximum number of titles
+            exclude (iterable): content_ids to leave out
+        
+        Returns:
+            list: content_ids, most popular first
+        """
+        records, popular = self._load()
+        if records is None:
+            return []
+        
+        exclude = set(exclude)
+        content_ids = records['content_id']
+        ranked = (content_ids[position].decode() for position in popular)
+        return [content_id for content_id in ranked if content_id not in exclude][:limit]
+    
+    def stats(self):
+        """
+        Returns model counters
+        
+        Returns:
+            dict: Title count, neighbors per title, file age and requests served
+        """
+        records, _ = self._loaded
+        return {
+            'titles': len(records) if records is not None else 0,
+            'neighbors': records.dtype['neighbors'].shape[0] if records is not None else 0,
+            'age_seconds': round(time.time() - self._mtime) if self._mtime is not None else None,
+            'requests': self.requests
+        }
+
+def get_recommendation_model():
+    """
+    Returns the process-wide recommendation model
+    
+    Returns:
+        RecommendationModel: The model; recommends nothing until the job has run
+    """
+    global _model, _model_pid
+    
+    pid = os.getpid()
+    
+    if _model is None or _model_pid != pid:
+        with _model_lock:
+            if _model is None or _model_pid != pid:
+                _model = RecommendationModel(
+                    path=current_app.config.get('RECOMMENDATIONS_FILE', 'recommendations.npy'),
+                    reload_interval=current_app.config.get('RECOMMENDATIONS_RELOAD_INTERVAL', 60)
+                )
+                _model_pid = pid
+    
+    return _model
\ No newline at end of file
@@ -0,0 +1,72 @@
+import threading
+import unicodedata
+from flask import current_app
+from app.utils.cache import LFUCache
+import logging
+
+logger = logging.getLogger(__name__)
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def normalize_query(query):
+    """
+    Normalizes a search query so equivalent spellings share a cache entry
+    
+    Applies Unicode NFKC normalization, case folding and whitespace
+    collapsing; "  The  MATRIX" and "the matrix" normalize alike.
+    
+    Args:
+        query (str): Query as typed
+    
+    Returns:
+        str: Normalized query
+    """
+    return ' '.join(unicodedata.normalize('NFKC', query).casefold().split())
+
+def get_search_cache():
+    """
+    Returns the process-wide search result cache
+    
+    Returns:
+        LFUCache: Cache of search responses keyed by normalized query, page and type
+    """
+    global _cache
+    
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = LFUCache(max_entries=current_app.config.get('SEARCH_CACHE_MAX_ENTRIES', 10000))
+    
+    return _cache
+
+def cached_search(query, page, media_type, search):
+    """
+    Runs a search through the result cache
+    
+    Error responses are not cached.
+    
+    Args:
+        query (str): Query as typed
+        page (int): Page number
+        media_type (str): 'movie', 'tv' or 'multi'
+        search (callable): Takes the normalized query and returns the response
+    
+    Returns:
+        dict: Search response
+    """
+    normalized = normalize_query(query)
+    
+    if not current_app.config.get('SEARCH_CACHE_ENABLED', True):
+        return search(normalized)
+    
+    cache = get_search_cache()
+    key = (normalized, page, media_type)
+    
+    response = cache.get(key)
+    if response is None:
+        response = search(normalized)
+        if 'error' not in response:
+            cache.set(key, response, current_app.config.get('SEARCH_CACHE_TTL', 3600))
+    
+    return response
\ No newline at end of file
@@ -0,0 +1,956 @@
+import os
+import re
+import math
+import time
+import heapq
+import itertools
+import bisect
+import threading
+import unicodedata
+from collections import Counter
+from flask import current_app
+from app.utils.database import Database
+from app.utils.content_store import ContentStore, to_content_id
+import logging
+
+logger = logging.getLogger(__name__)
+
+_index = None
+_index_pid = None
+_index_lock = threading.Lock()
+
+_TOKEN_PATTERN = re.compile(r'\w+')
+
+# How much an occurrence in each field counts towards a term's frequency
+FIELD_WEIGHTS = (('title', 3.0), ('original_title', 2.0), ('overview', 1.0))
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+# Shortest last token expanded to the indexed terms it prefixes, and the
+# most terms one prefix may expand to, those in the most documents first
+MIN_PREFIX_LENGTH = 2
+MAX_PREFIX_EXPANSIONS = 50
+
+# Title suggestions: prefixes up to this length have their ranked
+# completions cached, the most completions one lookup returns, and how much
+# a log-scaled view count counts against log-scaled TMDB popularity
+SUGGEST_CACHED_PREFIX_LENGTH = 3
+MAX_SUGGESTIONS = 20
+VIEWS_WEIGHT = 2.0
+
+# Batches changing more terms than this are merged into the sorted vocabulary
+# in one pass instead of inserted term by term
+MERGE_THRESHOLD = 1000
+
+# Fuzzy title matching: the share of a query's trigrams a title must contain
+# to be a candidate, how many of the best-overlapping candidates get their
+# edit distance computed, and the edits allowed per query character
+MIN_TRIGRAM_OVERLAP = 0.3
+MAX_FUZZY_CANDIDATES = 25
+MAX_EDIT_RATIO = 0.25
+
+# Query trigrams found in more than this share of titles are only counted
+# while the postings read stay under MAX_TRIGRAM_POSTINGS
+COMMON_TRIGRAM_SHARE = 0.01
+MAX_TRIGRAM_POSTINGS = 10000
+
+def fold(text):
+    """
+    Lower-cases text and strips diacritics, so "Amélie" and "amelie" match
+    
+    Args:
+        text (str): Text to fold
+    
+    Returns:
+        str: Folded text
+    """
+    decomposed = unicodedata.normalize('NFKD', text)
+    return ''.join(char for char in decomposed if not unicodedata.combining(char)).casefold()
+
+def tokenize(text):
+    """
+    Splits text into folded word tokens
+    
+    Args:
+        text (str): Text to tokenize
+    
+    Returns:
+        list: Tokens in order of appearance
+    """
+    return _TOKEN_PATTERN.findall(fold(text or ''))
+
+def to_search_result(summary):
+    """
+    Shapes a content summary like an item of a TMDB search response
+    
+    Args:
+        summary (dict): Summary as built by summarize_content
+    
+    Returns:
+        dict: Result with the title and date keys TMDB uses for the media type
+    """
+    result = {
+        'id': summary['id'],
+        'media_type': summary['media_type'],
+        'overview': summary['overview'],
+        'poster_path': summary['poster_path'],
+        'backdrop_path': summary['backdrop_path'],
+        'vote_average': summary['vote_average'],
+        'popularity': summary['popularity']
+    }
+    
+    if summary['media_type'] == 'tv':
+        result['name'] = summary['title']
+        result['original_name'] = summary['original_title']
+        result['first_air_date'] = summary['release_date']
+    else:
+        result['title'] = summary['title']
+        result['original_title'] = summary['original_title']
+        result['release_date'] = summary['release_date']
+    
+    return result
+
+def to_suggestion(summary):
+    """
+    Shapes a content summary as a search box suggestion
+    
+    Args:
+        summary (dict): Summary as built by summarize_content
+    
+    Returns:
+        dict: Id, media type, title, year and poster
+    """
+    return {
+        'id': summary['id'],
+        'media_type': summary['media_type'],
+        'title': summary['title'],
+        'year': summary.get('year'),
+        'poster_path': summary['poster_path']
+    }
+
+class TitleSuggester:
+    """
+    Prefix completion over titles, kept as a sorted array searched with bisect
+    
+    Every title and original title is folded and entered once per word it
+    contains, starting at that word, so "ma" completes "The Matrix" through
+    "matrix". Completions are ranked by TMDB popularity and by how many
+    users have the title in their watch history. Each batch of new titles is
+    merged into the array as it arrives; the ranked completions of short
+    prefixes, whose ranges are the largest, are cached until a change would
+    reorder them or view counts are reloaded.
+    """
+    
+    def __init__(self):
+        self._keys = []  # sorted folded keys
+        self._ids = []  # content id of each key
+        self._stale_keys = 0  # keys in the array their titles no longer have
+        self._titles = {}  # content_id -> (summary, keys)
+        self._views = {}  # content_id -> users who watched it
+        self._cache = {}  # (prefix, media_type) -> ranked content ids
+        self._lock = threading.Lock()
+        self._views_loaded_at = None
+        self._views_loading = False
+        
+        self.lookups = 0
+        self.cache_hits = 0
+    
+    @staticmethod
+    def title_keys(summary):
+        """
+        Returns the folded keys a summary is completed from
+        
+        Args:
+            summary (dict): Summary as built by summarize_content
+        
+        Returns:
+            frozenset: Each title from each of its words onwards
+        """
+        keys = set()
+        for field in ('title', 'original_title'):
+            tokens = tokenize(summary.get(field))
+            keys.update(' '.join(tokens[start:]) for start in range(len(tokens)))
+        return frozenset(keys)
+    
+    def add_many(self, summaries):
+        """
+        Adds or updates titles, merging their new keys into the sorted array
+        
+        Args:
+            summaries (list): Summaries as built by summarize_content
+        """
+        with self._lock:
+            added = []
+            for summary in summaries:
+                content_id = to_content_id(summary['media_type'], summary['id'])
+                keys = self.title_keys(summary)
+                previous = self._titles.get(content_id)
+                self._titles[content_id] = (summary, keys)
+                
+                if previous is None:
+                    changed = keys
+                    added.extend((key, content_id) for key in keys)
+                else:
+                    changed = keys ^ previous[1]
+                    added.extend((key, content_id) for key in keys - previous[1])
+                    self._stale_keys += len(previous[1] - keys)
+                
+                    # A new popularity reorders every prefix the title completes
+                    if previous[0].get('popularity') != summary.get('popularity'):
+                        changed = keys | previous[1]
+                self._invalidate(content_id, changed)
+            
+            if added or self._stale_keys > len(self._keys) // 10:
+                self._merge(added)
+    
+    def _merge(self, added):
+        """
+        Merges a batch of keys into the sorted array in one pass; the caller must hold the lock
+        
+        The array is copied once, slice by slice between the positions the
+        new keys go to. Keys titles no longer have are skipped by lookups and
+        dropped here once they make up a tenth of the array.
+        """
+        added.sort()
+        old_keys, old_ids = self._keys, self._ids
+        keys, content_ids = [], []
+        start = 0
+        for key, content_id in added:
+            position = bisect.bisect_left(old_keys, key, start)
+            keys += old_keys[start:position]
+            content_ids += old_ids[start:position]
+            keys.append(key)
+            content_ids.append(content_id)
+            start = position
+        keys += old_keys[start:]
+        content_ids += old_ids[start:]
+        
+        if self._stale_keys > len(keys) // 10:
+            titles = self._titles
+            live = [key in titles[content_id][1] for key, content_id in zip(keys, content_ids)]
+            keys = list(itertools.compress(keys, live))
+            content_ids = list(itertools.compress(content_ids, live))
+            self._stale_keys = 0
+        
+        self._keys, self._ids = keys, content_ids
+    
+    def _invalidate(self, content_id, keys):
+        """
+        Drops cached completions a changed title would alter; the caller must hold the lock
+        
+        Only cached prefixes of the title's added, removed or reordered keys
+        are looked at, and of those only the ones that list the title or
+        that it would now enter.
+        """
+        if not self._cache:
+            return
+        
+        prefixes = {key[:length] for key in keys for length in range(1, min(len(key), SUGGEST_CACHED_PREFIX_LENGTH) + 1)}
+        summary = self._titles[content_id][0]
+        weight = self._weight(content_id)
+        
+        for prefix in prefixes:
+            for media_type in (None, 'movie', 'tv'):
+                ranked = self._cache.get((prefix, media_type))
+                if ranked is None:
+                    continue
+                
+                enters = (
+                    (media_type is None or summary['media_type'] == media_type)
+                    and (len(ranked) < MAX_SUGGESTIONS or weight >= self._weight(ranked[-1]))
+                )
+                if enters or content_id in ranked:
+                    del self._cache[(prefix, media_type)]
+    
+    def _weight(self, content_id):
+        """Ranking weight of a title from its popularity and view count"""
+        popularity = self._titles[content_id][0].get('popularity') or 0
+        return math.log1p(max(popularity, 0)) + VIEWS_WEIGHT * math.log1p(self._views.get(content_id, 0))
+    
+    def _complete(self, prefix, media_type):
+        """Ranks every title with a key starting with prefix"""
+        keys, content_ids = self._keys, self._ids
+        titles = self._titles
+        start = bisect.bisect_left(keys, prefix)
+        end = bisect.bisect_left(keys, prefix + '\U0010ffff', start)
+        
+        matches = {}
+        for position in range(start, end):
+            content_id = content_ids[position]
+            if content_id in matches:
+                continue
+            title = titles.get(content_id)
+            if title is None or keys[position] not in title[1]:
+                continue
+            if media_type is None or title[0]['media_type'] == media_type:
+                matches[content_id] = self._weight(content_id)
+        
+        return heapq.nlargest(MAX_SUGGESTIONS, matches, key=matches.get)
+    
+    def suggest(self, query, limit=10, media_type=None):
+        """
+        Completes a partially typed title
+        
+        Args:
+            query (str): Text typed so far
+            limit (int): Maximum number of suggestions, at most MAX_SUGGESTIONS
+            media_type (str, optional): Only suggest 'movie' or 'tv' titles
+        
+        Returns:
+            list: Summaries, highest weighted first
+        """
+        prefix = ' '.join(tokenize(query))
+        if not prefix:
+            return []
+        
+        self.lookups += 1
+        cacheable = len(prefix) <= SUGGEST_CACHED_PREFIX_LENGTH
+        
+        ranked = self._cache.get((prefix, media_type)) if cacheable else None
+        if ranked is not None:
+            self.cache_hits += 1
+        else:
+            with self._lock:
+                ranked = self._complete(prefix, media_type)
+                if cacheable:
+                    self._cache[(prefix, media_type)] = ranked
+        
+        titles = self._titles
+        return [titles[content_id][0] for content_id in ranked[:limit] if content_id in titles]
+    
+    def load_views(self):
+        """Reloads per-title view counts from watch_history"""
+        try:
+            rows = Database.execute_query(
+                """
+                SELECT content_id, COUNT(*) AS views
+                FROM watch_history
+                GROUP BY content_id
+                """
+            )
+            views = {row['content_id']: row['views'] for row in rows}
+            with self._lock:
+                self._views = views
+                self._cache.clear()
+        except Exception as e:
+            logger.error(f"Error loading view counts for suggestions: {e}")
+        finally:
+            self._views_loaded_at = time.monotonic()
+            self._views_loading = False
+    
+    def refresh_views(self, max_age):
+        """
+        Reloads view counts in the background once they are older than max_age
+        
+        Args:
+            max_age (float): Seconds view counts are used for
+        """
+        if self._views_loading:
+            return
+        if self._views_loaded_at is not None and time.monotonic() - self._views_loaded_at < max_age:
+            return
+        
+        with self._lock:
+            if self._views_loading:
+                return
+            self._views_loading = True
+        threading.Thread(target=self.load_views, name='suggest-views-load', daemon=True).start()
+    
+    def stats(self):
+        """
+        Returns suggester counters
+        
+        Returns:
+            dict: Title, key and cached prefix counts, lookups and cache hits
+        """
+        return {
+            'titles': len(self._titles),
+            'keys': len(self._keys),
+            'cached_prefixes': len(self._cache),
+            'lookups': self.lookups,
+            'cache_hits': self.cache_hits
+        }
+
+def trigrams(text):
+    """
+    Returns the trigrams of each word, padded so word starts and ends count
+    
+    Args:
+        text (str): Folded, space-separated words
+    
+    Returns:
+        set: Three-character strings, e.g. "  m", " ma", "mat", ..., "ix "
+    """
+    grams = set()
+    for word in text.split():
+        padded = f"  {word} "
+        grams.update(padded[position:position + 3] for position in range(len(padded) - 2))
+    return grams
+
+def substring_distance(pattern, text, max_distance):
+    """
+    Edit distance from pattern to its closest match anywhere in text
+    
+    Insertions, deletions, substitutions and swaps of adjacent characters
+    each count as one edit. Uses Hyyro's bit-parallel variant of Myers'
+    algorithm, where each bit of a column tracks one pattern character, so
+    the cost grows with the length of text only. Skipping text before and
+    after the match is free.
+    
+    Args:
+        pattern (str): Query
+        text (str): Title
+        max_distance (int): Largest distance of interest
+    
+    Returns:
+        int: The distance, or max_distance + 1 when it is larger
+    """
+    length = len(pattern)
+    if not length:
+        return 0
+    
+    masks = {}
+    for position, char in enumerate(pattern):
+        masks[char] = masks.get(char, 0) | (1 << position)
+    get_mask = masks.get
+    
+    full = (1 << length) - 1
+    last = 1 << (length - 1)
+    positive, negative = full, 0
+    diagonal = previous_match = 0
+    score = best = length
+    
+    for char in text:
+        match = get_mask(char, 0)
+        swapped = (((diagonal ^ full) & match) << 1) & previous_match
+        diagonal = ((((match & positive) + positive) ^ positive) | match | negative | swapped) & full
+        horizontal_positive = negative | ((diagonal | positive) ^ full)
+        horizontal_negative = positive & diagonal
+        
+        if horizontal_positive & last:
+            score += 1
+        elif horizontal_negative & last:
+            score -= 1
+            if score < best:
+                best = score
+        
+        horizontal_positive <<= 1
+        positive = ((horizontal_negative << 1) | ~(diagonal | horizontal_positive)) & full
+        negative = horizontal_positive & diagonal
+        previous_match = match
+    
+    return min(best, max_distance + 1)
+
+class TrigramIndex:
+    """
+    Typo-tolerant title matching through a trigram index
+    
+    Titles and original titles are split into padded word trigrams. A query
+    counts, for every title, how many of its informative trigrams the title
+    shares; only the MAX_FUZZY_CANDIDATES titles sharing the most, and at
+    least MIN_TRIGRAM_OVERLAP of them, are ranked by how many edits turn the
+    query into part of the title.
+    
+    Entries and posting lists are only ever appended to, and an entry's
+    text is stored before its postings, so searches count and score
+    without holding the lock add_many takes.
+    """
+    
+    def __init__(self):
+        self._texts = []  # entry -> folded title, or None once replaced
+        self._content_ids = []  # entry -> content id
+        self._entries = {}  # content_id -> entries
+        self._postings = {}  # trigram -> entries
+        self._summaries = {}  # content_id -> summary
+        self._lock = threading.Lock()
+    
+    def add_many(self, summaries):
+        """
+        Adds or replaces titles
+        
+        Replaced entries stay in the posting lists but are skipped, as
+        titles are seldom renamed.
+        
+        Args:
+            summaries (list): Summaries as built by summarize_content
+        """
+        with self._lock:
+            for summary in summaries:
+                content_id = to_content_id(summary['media_type'], summary['id'])
+                texts = {' '.join(tokenize(summary.get(field))) for field in ('title', 'original_title')}
+                texts.discard('')
+                
+                self._summaries[content_id] = summary
+                previous = self._entries.get(content_id, ())
+                if {self._texts[entry] for entry in previous} == texts:
+                    continue
+                for entry in previous:
+                    self._texts[entry] = None
+                
+                entries = []
+                for text in texts:
+                    entry = len(self._texts)
+                    grams = trigrams(text)
+                    self._texts.append(text)
+                    self._content_ids.append(content_id)
+                    for gram in grams:
+                        self._postings.setdefault(gram, []).append(entry)
+                    entries.append(entry)
+                self._entries[content_id] = entries
+    
+    def search(self, query, media_type=None, limit=20):
+        """
+        Finds titles resembling a possibly misspelled query
+        
+        Args:
+            query (str): Free-text query
+            media_type (str, optional): Only return 'movie' or 'tv' titles
+            limit (int): Maximum number of results
+        
+        Returns:
+            list: Summaries, fewest edits first
+        """
+        text = ' '.join(tokenize(query))
+        grams = trigrams(text)
+        if not grams:
+            return []
+        
+        max_distance = max(1, int(len(text) * MAX_EDIT_RATIO))
+        
+        with self._lock:
+            lists = [self._postings.get(gram, ()) for gram in grams]
+            common = COMMON_TRIGRAM_SHARE * len(self._texts)
+            
+        # Trigrams found in a large share of titles, like those of "the",
+        # say little about a match but cost the most to count. Rarest
+        # first, they are only counted while within budget.
+        lists.sort(key=len)
+        kept = 1
+        read = len(lists[0])
+        for postings in lists[1:]:
+            read += len(postings)
+            if len(postings) > common and read > MAX_TRIGRAM_POSTINGS:
+                break
+            kept += 1
+        lists = lists[:kept]
+        required = math.ceil(kept * MIN_TRIGRAM_OVERLAP)
+            
+        # Counter.update counts a whole posting list in C. A title first
+        # seen in the last `required - 1` lists can no longer reach
+        # `required`, so those, the longest, only count titles already seen.
+        counts = Counter()
+        for position, postings in enumerate(lists):
+            if position > kept - required:
+                postings = filter(counts.__contains__, postings)
+            counts.update(postings)
+            
+        # Many titles tie on overlap; of those, prefer the ones about as
+        # long as the query, the likeliest to be within the edit budget
+        texts = self._texts
+        best = [
+            (overlap, entry)
+            for entry, overlap in counts.most_common(4 * MAX_FUZZY_CANDIDATES)
+            if overlap >= required and texts[entry] is not None
+        ]
+        best.sort(key=lambda item: (-item[0], abs(len(texts[item[1]]) - len(text))))
+        
+        ranked = {}
+        for overlap, entry in best[:MAX_FUZZY_CANDIDATES]:
+            content_id = self._content_ids[entry]
+            summary = self._summaries[content_id]
+            if media_type is not None and summary['media_type'] != media_type:
+                continue
+            distance = substring_distance(text, self._texts[entry], max_distance)
+            if distance > max_distance:
+                continue
+            # Among equally close titles prefer those about as long as
+            # the query, then the most popular
+            key = (distance, abs(len(self._texts[entry]) - len(text)), -overlap, -(summary.get('popularity') or 0))
+            if content_id not in ranked or key < ranked[content_id][0]:
+                ranked[content_id] = (key, summary)
+        
+        return [summary for _, summary in sorted(ranked.values(), key=lambda item: item[0])[:limit]]
+    
+    def stats(self):
+        """
+        Returns index counters
+        
+        Returns:
+            dict: Title entry and trigram counts
+        """
+        return {
+            'entries': len(self._texts),
+            'trigrams': len(self._postings)
+        }
+
+class SearchIndex:
+    """
+    In-memory inverted index over content summaries, ranked with BM25
+    
+    Titles, original titles and overviews are tokenized with diacritics
+    folded. Each field's occurrences are weighted by FIELD_WEIGHTS before
+    BM25 scoring, so title matches outrank overview matches. A document
+    must contain every query token; the last token also matches indexed
+    terms it is a prefix of, which suits search-as-you-type.
+    """
+    
+    def __init__(self):
+        self._documents = {}  # content_id -> summary
+        self._doc_terms = {}  # content_id -> {term: weighted frequency}
+        self._doc_lengths = {}  # content_id -> weighted length
+        self._postings = {}  # term -> {content_id: weighted frequency}
+        self._total_length = 0.0
+        self._vocabulary = []  # sorted terms, kept in step with the postings for prefix lookups
+        self._lock = threading.RLock()
+        
+        self.suggester = TitleSuggester()
+        self.fuzzy = TrigramIndex()
+        self.ready = False
+        self.searches = 0
+    
+    def add_many(self, summaries):
+        """
+        Adds or replaces documents
+        
+        Args:
+            summaries (list): Summaries as built by summarize_content
+        
+        Returns:
+            int: Number of documents indexed
+        """
+        summaries = [
+            summary for summary in summaries
+            if summary and summary.get('id') and summary.get('media_type') in ('movie', 'tv')
+        ]
+        indexed = 0
+        
+        with self._lock:
+            changed_terms = set()
+            for summary in summaries:
+                content_id = to_content_id(summary['media_type'], summary['id'])
+                changed_terms.update(self._remove(content_id))
+                
+                terms = {}
+                length = 0.0
+                for field, weight in FIELD_WEIGHTS:
+                    for token in tokenize(summary.get(field)):
+                        terms[token] = terms.get(token, 0.0) + weight
+                        length += weight
+                
+                self._documents[content_id] = summary
+                self._doc_terms[content_id] = terms
+                self._doc_lengths[content_id] = length
+                self._total_length += length
+                
+                for term, frequency in terms.items():
+                    postings = self._postings.get(term)
+                    if postings is None:
+                        postings = self._postings[term] = {}
+                        changed_terms.add(term)
+                    postings[content_id] = frequency
+                
+                indexed += 1
+            
+            self._update_vocabulary(changed_terms)
+        
+        self.suggester.add_many(summaries)
+        self.fuzzy.add_many(summaries)
+        return indexed
+    
+    def _remove(self, content_id):
+        """Removes a document and returns the terms no document has any more; the caller must hold the lock"""
+        terms = self._doc_terms.pop(content_id, None)
+        if terms is None:
+            return []
+        
+        del self._documents[content_id]
+        self._total_length -= self._doc_lengths.pop(content_id)
+        
+        dropped = []
+        for term in terms:
+            postings = self._postings[term]
+            del postings[content_id]
+            if not postings:
+                del self._postings[term]
+                dropped.append(term)
+        return dropped
+    
+    def _update_vocabulary(self, terms):
+        """Adds terms that gained postings to the sorted vocabulary and drops those that lost them; the caller must hold the lock"""
+        vocabulary = self._vocabulary
+        added, removed = [], []
+        for term in terms:
+            position = bisect.bisect_left(vocabulary, term)
+            listed = position < len(vocabulary) and vocabulary[position] == term
+            if term in self._postings and not listed:
+                added.append(term)
+            elif term not in self._postings and listed:
+                removed.append(term)
+        
+        if len(added) + len(removed) > MERGE_THRESHOLD:
+            removed = set(removed)
+            self._vocabulary = list(heapq.merge(
+                (term for term in vocabulary if term not in removed),
+                sorted(added)
+            ))
+            return
+        
+        for term in removed:
+            del vocabulary[bisect.bisect_left(vocabulary, term)]
+        for term in added:
+            bisect.insort(vocabulary, term)
+    
+    def _expand_prefix(self, prefix):
+        """Returns the indexed terms starting with prefix in the most documents; the caller must hold the lock"""
+        vocabulary = self._vocabulary
+        start = bisect.bisect_left(vocabulary, prefix)
+        stop = bisect.bisect_left(vocabulary, prefix[:-1] + chr(ord(prefix[-1]) + 1), start)
+        if stop - start <= MAX_PREFIX_EXPANSIONS:
+            return vocabulary[start:stop]
+        
+        # The prefix typed as a whole word always stays in
+        postings = self._postings
+        return heapq.nlargest(
+            MAX_PREFIX_EXPANSIONS,
+            vocabulary[start:stop],
+            key=lambda term: (term == prefix, len(postings[term]))
+        )
+    
+    def search(self, query, media_type=None, limit=None, offset=0):
+        """
+        Finds documents containing every query token, best match first
+        
+        Only the best offset + limit matches are ordered, so a page costs
+        little more than counting the matches.
+        
+        Args:
+            query (str): Free-text query
+            media_type (str, optional): Only return 'movie' or 'tv' documents
+            limit (int, optional): Maximum number of results; all when None
+            offset (int): Number of best matches to skip
+        
+        Returns:
+            tuple: (summaries ordered by BM25 score, then popularity, total number of matches)
+        """
+        tokens = list(dict.fromkeys(tokenize(query)))
+        if not tokens:
+            return [], 0
+        
+        with self._lock:
+            self.searches += 1
+            document_count = len(self._documents)
+            if not document_count:
+                return [], 0
+            average_length = self._total_length / document_count
+            
+            # Alternatives for each query token: the token itself, plus longer
+            # terms for the last, possibly unfinished, word
+            positions = []
+            for position, token in enumerate(tokens):
+                alternatives = [token]
+                if position == len(tokens) - 1 and len(token) >= MIN_PREFIX_LENGTH:
+                    alternatives = self._expand_prefix(token) or alternatives
+                positions.append(alternatives)
+            
+            # Intersect starting from the rarest token so later ones only
+            # score documents that are still candidates
+            positions.sort(key=lambda alternatives: sum(len(self._postings.get(term, ())) for term in alternatives))
+            
+            scores = None
+            for alternatives in positions:
+                token_scores = {}
+                for term in alternatives:
+                    postings = self._postings.get(term)
+                    if not postings:
+                        continue
+                    
+                    idf = math.log(1 + (document_count - len(postings) + 0.5) / (len(postings) + 0.5))
+                    for content_id, frequency in postings.items():
+                        if scores is not None and content_id not in scores:
+                            continue
+                        norm = K1 * (1 - B + B * self._doc_lengths[content_id] / average_length)
+                        score = idf * frequency * (K1 + 1) / (frequency + norm)
+                        if score > token_scores.get(content_id, 0.0):
+                            token_scores[content_id] = score
+                
+                if scores is None:
+                    scores = token_scores
+                else:
+                    scores = {content_id: scores[content_id] + score for content_id, score in token_scores.items()}
+                
+                if not scores:
+                    return [], 0
+            
+            documents = self._documents
+            matches = [
+                (score, documents[content_id])
+                for content_id, score in scores.items()
+                if media_type is None or documents[content_id]['media_type'] == media_type
+            ]
+            
+            ranked = heapq.nlargest(
+                len(matches) if limit is None else offset + limit,
+                matches,
+                key=lambda item: (item[0], item[1].get('popularity') or 0)
+            )
+        
+        return [summary for _, summary in ranked[offset:]], len(matches)
+    
+    def load(self):
+        """Indexes every title in the content metadata store"""
+        try:
+            batch = []
+            for summary in ContentStore.iter_all():
+                batch.append(summary)
+                if len(batch) >= 5000:
+                    self.add_many(batch)
+                    batch = []
+            self.add_many(batch)
+            logger.info(f"Search index loaded with {len(self._documents)} titles")
+        except Exception as e:
+            logger.error(f"Error loading search index: {e}")
+        finally:
+            # Serve what was loaded; titles keep arriving through add_many
+            self.ready = True
+    
+    def stats(self):
+        """
+        Returns index counters
+        
+        Returns:
+            dict: Document and term counts, readiness and searches served
+        """
+        with self._lock:
+            return {
+                'ready': self.ready,
+                'documents': len(self._documents),
+                'terms': len(self._postings),
+                'searches': self.searches,
+                'suggestions': self.suggester.stats(),
+                'fuzzy': self.fuzzy.stats()
+            }
+
+def get_search_index():
+    """
+    Returns the process-wide search index, loading it in the background on first use
+    
+    The index is rebuilt after a fork since the loading thread does not
+    survive it.
+    
+    Returns:
+        SearchIndex: The index; not ready until the initial load finishes
+    """
+    global _index, _index_pid
+    
+    pid = os.getpid()
+    
+    if _index is None or _index_pid != pid:
+        with _index_lock:
+            if _index is None or _index_pid != pid:
+                _index = SearchIndex()
+                _index_pid = pid
+                threading.Thread(target=_index.load, name='search-index-load', daemon=True).start()
+    
+    return _index
+
+def index_summaries(summaries):
+    """
+    Adds freshly fetched summaries to the search index of this process, if it has one
+    
+    Args:
+        summaries (list): Summaries as built by summarize_content
+    """
+    if _index is not None and _index_pid == os.getpid():
+        _index.add_many(summaries)
+
+def search_catalog(query, page=1, media_type=None):
+    """
+    Serves a search from the local index when it has enough matches
+    
+    Args:
+        query (str): Search query
+        page (int): Page number, TMDB-style
+        media_type (str, optional): 'movie' or 'tv'; both when None
+    
+    Returns:
+        dict or None: Response shaped like TMDB's search responses, or None
+            when the index is disabled, still loading or has fewer than
+            SEARCH_LOCAL_MIN_RESULTS matches
+    """
+    if not current_app.config.get('SEARCH_INDEX_ENABLED', True):
+        return None
+    
+    index = get_search_index()
+    if not index.ready:
+        return None
+    
+    page_size = current_app.config.get('SEARCH_PAGE_SIZE', 20)
+    results, total = index.search(query, media_type=media_type, limit=page_size, offset=(max(page, 1) - 1) * page_size)
+    if total < current_app.config.get('SEARCH_LOCAL_MIN_RESULTS', 5):
+        return None
+    
+    return _catalog_page(results, total, page, 'local')
+
+def fuzzy_search_catalog(query, page=1, media_type=None):
+    """
+    Serves a search from locally known titles resembling a misspelled query
+    
+    Args:
+        query (str): Search query
+        page (int): Page number, TMDB-style
+        media_type (str, optional): 'movie' or 'tv'; both when None
+    
+    Returns:
+        dict or None: Response shaped like TMDB's search responses, or None
+            when the index is disabled, still loading or nothing is close
+    """
+    if not current_app.config.get('SEARCH_INDEX_ENABLED', True) or not current_app.config.get('SEARCH_FUZZY_ENABLED', True):
+        return None
+    
+    index = get_search_index()
+    if not index.ready:
+        return None
+    
+    matches = index.fuzzy.search(query, media_type=media_type, limit=current_app.config.get('SEARCH_FUZZY_MAX_RESULTS', 20))
+    if not matches:
+        return None
+    
+    page_size = current_app.config.get('SEARCH_PAGE_SIZE', 20)
+    start = (max(page, 1) - 1) * page_size
+    return _catalog_page(matches[start:start + page_size], len(matches), page, 'fuzzy')
+
+def _catalog_page(results, total, page, source):
+    """Shapes one page of matching summaries like a TMDB search response"""
+    page_size = current_app.config.get('SEARCH_PAGE_SIZE', 20)
+    
+    return {
+        'page': page,
+        'results': [to_search_result(summary) for summary in results],
+        'total_results': total,
+        'total_pages': -(-total // page_size),
+        'source': source
+    }
+
+def suggest_titles(query, limit=10, media_type=None):
+    """
+    Completes a partially typed title from the local index
+    
+    Args:
+        query (str): Text typed so far
+        limit (int): Maximum number of suggestions
+        media_type (str, optional): 'movie' or 'tv'; both when None
+    
+    Returns:
+        list: Suggestions as built by to_suggestion; empty while the index loads
+    """
+    if not current_app.config.get('SEARCH_INDEX_ENABLED', True):
+        return []
+    
+    index = get_search_index()
+    if not index.ready:
+        return []
+    
+    index.suggester.refresh_views(current_app.config.get('SEARCH_SUGGEST_VIEWS_REFRESH', 600))
+    return [to_suggestion(summary) for summary in index.suggester.suggest(query, limit, media_type)]
\ No newline at end of file
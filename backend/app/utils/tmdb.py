@@ -1,16 +1,290 @@
+import os
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from urllib.parse import urlencode
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from flask import current_app
+from app.utils.cache import TTLCache, SingleFlight
+from app.utils.content_store import ContentStore, to_content_id
+from app.utils.search_index import index_summaries
 import logging
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Status codes worth retrying: rate limiting and transient upstream failures
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+def summarize_content(data, media_type):
+    """
+    Trims a TMDB movie or TV resource to the fields needed to render a card
+    
+    Args:
+        data (dict): Movie or TV show resource from TMDB
+        media_type (str): 'movie' or 'tv'
+    
+    Returns:
+        dict: Summary with a fixed set of keys for both media types
+    """
+    release_date = data.get('first_air_date') if media_type == 'tv' else data.get('release_date')
+    
+    return {
+        'id': data.get('id'),
+        'media_type': media_type,
+        'title': data.get('name') if media_type == 'tv' else data.get('title'),
+        'original_title': data.get('original_name') if media_type == 'tv' else data.get('original_title'),
+        'overview': data.get('overview'),
+        'poster_path': data.get('poster_path'),
+        'backdrop_path': data.get('backdrop_path'),
+        'vote_average': data.get('vote_average'),
+        'popularity': data.get('popularity'),
+        'release_date': release_date or None,
+        'year': int(release_date[:4]) if release_date and release_date[:4].isdigit() else None
+    }
+
+def extract_summaries(endpoint, data):
+    """
+    Collects content summaries from a TMDB response body
+    
+    Handles single movie/TV resources as well as result pages from list,
+    search and trending endpoints. People and other media are skipped.
+    
+    Args:
+        endpoint (str): Endpoint the response came from, e.g. /movie/popular
+        data (dict): Parsed response body
+    
+    Returns:
+        list: Summaries as built by summarize_content
+    """
+    parts = endpoint.strip('/').split('/')
+    endpoint_type = next((part for part in parts if part in ('movie', 'tv')), None)
+    
+    # Base resource, e.g. /movie/123 or /tv/123
+    if len(parts) == 2 and endpoint_type and parts[1].isdigit():
+        return [summarize_content(data, endpoint_type)]
+    
+    summaries = []
+    for item in data.get('results') or []:
+        media_type = item.get('media_type', endpoint_type)
+        if media_type in ('movie', 'tv') and item.get('id'):
+            summaries.append(summarize_content(item, media_type))
+    
+    return summaries
+
 class TMDBApi:
     """
     TMDB API utility class for interacting with The Movie Database API
     """
     
+    _session = None
+    _session_pid = None
+    _session_lock = threading.Lock()
+    
+    _cache = None
+    _cache_lock = threading.Lock()
+    
+    # Concurrent identical requests share one upstream fetch
+    _in_flight = SingleFlight()
+    
+    # Thread pools for background refreshes and batch fetches
+    _executors = {}
+    _executors_pid = None
+    _executors_lock = threading.Lock()
+    
+    _refreshing = set()
+    _refresh_lock = threading.Lock()
+    
+    @staticmethod
+    def mirror_in_background(endpoint, body):
+        """
+        Writes the content found in a TMDB response to the local store
+        and the local search index
+        
+        Runs on a single background thread so request latency is unaffected.
+        
+        Args:
+            endpoint (str): Endpoint the response came from
+            body (bytes): Raw response body
+        """
+        def mirror():
+            try:
+                summaries = extract_summaries(endpoint, json.loads(body))
+                if summaries:
+                    ContentStore.upsert_many(summaries)
+                    index_summaries(summaries)
+            except Exception as e:
+                logger.warning(f"Could not mirror {endpoint} to content metadata: {e}")
+        
+        TMDBApi.get_executor('content-store', 1).submit(mirror)
+    
+    @staticmethod
+    def get_session():
+        """
+        Returns the process-wide HTTP session used for TMDB requests
+        
+        The session keeps connections to TMDB alive between requests and
+        retries rate-limited or failed GETs with exponential backoff. It is
+        recreated after a fork so worker processes never share sockets.
+        
+        Returns:
+            requests.Session: Shared session
+        """
+        pid = os.getpid()
+        
+        if TMDBApi._session is None or TMDBApi._session_pid != pid:
+            with TMDBApi._session_lock:
+                if TMDBApi._session is None or TMDBApi._session_pid != pid:
+                    retry = Retry(
+                        total=current_app.config.get('TMDB_MAX_RETRIES', 3),
+                        backoff_factor=current_app.config.get('TMDB_RETRY_BACKOFF', 0.3),
+                        status_forcelist=RETRY_STATUS_CODES,
+                        allowed_methods=frozenset(['GET']),
+                        respect_retry_after_header=True,
+                        raise_on_status=False
+                    )
+                    pool_size = current_app.config.get('TMDB_POOL_SIZE', 20)
+                    adapter = HTTPAdapter(
+                        pool_connections=1,
+                        pool_maxsize=pool_size,
+                        max_retries=retry
+                    )
+                    
+                    session = requests.Session()
+                    session.mount('https://', adapter)
+                    session.mount('http://', adapter)
+                    
+                    TMDBApi._session = session
+                    TMDBApi._session_pid = pid
+        
+        return TMDBApi._session
+    
+    @staticmethod
+    def get_timeout():
+        """Returns the (connect, read) timeout tuple for TMDB requests"""
+        return (
+            current_app.config.get('TMDB_CONNECT_TIMEOUT', 3.05),
+            current_app.config.get('TMDB_READ_TIMEOUT', 10)
+        )
+    
+    @staticmethod
+    def get_cache():
+        """
+        Returns the process-wide TMDB response cache
+        
+        Returns:
+            TTLCache: Cache of raw response bodies keyed by endpoint and params
+        """
+        if TMDBApi._cache is None:
+            with TMDBApi._cache_lock:
+                if TMDBApi._cache is None:
+                    TMDBApi._cache = TTLCache(
+                        max_entries=current_app.config.get('TMDB_CACHE_MAX_ENTRIES', 2048),
+                        max_bytes=current_app.config.get('TMDB_CACHE_MAX_BYTES', 64 * 1024 * 1024)
+                    )
+        
+        return TMDBApi._cache
+    
+    @staticmethod
+    def get_cache_ttl(cache_family):
+        """
+        Returns the TTL in seconds for an endpoint family
+        
+        Args:
+            cache_family (str): Family name, e.g. 'genres', 'trending' or 'lists'
+        
+        Returns:
+            int: TTL in seconds, 0 if the family is not cached
+        """
+        if not current_app.config.get('TMDB_CACHE_ENABLED', True):
+            return 0
+        
+        return current_app.config.get(f'TMDB_CACHE_TTL_{cache_family.upper()}', 0)
+    
+    @staticmethod
+    def get_cache_key(endpoint, params):
+        """
+        Builds a cache key from an endpoint and its query parameters
+        
+        Parameters are sorted and stringified so equivalent requests share a key.
+        
+        Args:
+            endpoint (str): API endpoint
+            params (dict): Query parameters, without the API key
+        
+        Returns:
+            str: Cache key
+        """
+        normalized = sorted((str(key), str(value)) for key, value in params.items() if key != 'api_key')
+        return f"{endpoint}?{urlencode(normalized)}"
+    
+    @staticmethod
+    def cache_stats():
+        """Returns hit/miss counters for the TMDB response cache"""
+        stats = TMDBApi.get_cache().stats()
+        stats['coalesced_requests'] = TMDBApi._in_flight.shared
+        return stats
+    
+    @staticmethod
+    def get_executor(name, max_workers):
+        """
+        Returns a named, process-wide thread pool, creating it on first use
+        
+        Pools are recreated after a fork since threads do not survive it.
+        
+        Args:
+            name (str): Pool name, also used as the thread name prefix
+            max_workers (int): Thread count used when the pool is created
+        
+        Returns:
+            ThreadPoolExecutor: The pool
+        """
+        pid = os.getpid()
+        
+        with TMDBApi._executors_lock:
+            if TMDBApi._executors_pid != pid:
+                TMDBApi._executors = {}
+                TMDBApi._executors_pid = pid
+            
+            if name not in TMDBApi._executors:
+                TMDBApi._executors[name] = ThreadPoolExecutor(
+                    max_workers=max_workers,
+                    thread_name_prefix=name
+                )
+            
+            return TMDBApi._executors[name]
+    
+    @staticmethod
+    def refresh_in_background(cache_key, fetch):
+        """
+        Schedules fetch to refresh a stale cache entry
+        
+        At most one refresh per key is queued at a time; requests that miss
+        the cache while it runs join it through the single-flight group.
+        
+        Args:
+            cache_key (str): Key of the stale entry
+            fetch (callable): Function that fetches and re-caches the entry
+        """
+        with TMDBApi._refresh_lock:
+            if cache_key in TMDBApi._refreshing:
+                return
+            TMDBApi._refreshing.add(cache_key)
+            
+        executor = TMDBApi.get_executor('tmdb-refresh', current_app.config.get('TMDB_REFRESH_WORKERS', 4))
+        
+        def refresh():
+            try:
+                TMDBApi._in_flight.do(cache_key, fetch)
+            except requests.exceptions.RequestException as e:
+                logger.warning(f"Background refresh of {cache_key} failed, serving stale data: {e}")
+            finally:
+                with TMDBApi._refresh_lock:
+                    TMDBApi._refreshing.discard(cache_key)
+        
+        executor.submit(refresh)
+    
     @staticmethod
     def get_base_url():
         """Returns the TMDB API base URL"""
@@ -44,13 +318,15 @@ class TMDBApi:
         return f"{TMDBApi.get_image_base_url()}/{size}{path}"
     
     @staticmethod
-    def make_request(endpoint, params=None):
+    def make_request(endpoint, params=None, cache_family=None):
         """
         Make a request to the TMDB API
         
         Args:
             endpoint (str): API endpoint (e.g., /movie/popular)
             params (dict, optional): Additional query parameters
+            cache_family (str, optional): Endpoint family whose TTL applies;
+                responses are only cached when this is given
             
         Returns:
             dict: API response as JSON
@@ -61,37 +337,70 @@ class TMDBApi:
         if params is None:
             params = {}
             
+        ttl = TMDBApi.get_cache_ttl(cache_family) if cache_family else 0
+        stale_ttl = current_app.config.get('TMDB_CACHE_STALE_TTL', 0) if ttl else 0
+        cache_key = TMDBApi.get_cache_key(endpoint, params)
+        
         # Add API key to params
-        params['api_key'] = TMDBApi.get_api_key()
+        request_params = dict(params, api_key=TMDBApi.get_api_key())
         
-        try:
-            response = requests.get(url, params=params)
+        # Resolve everything that needs the app context up front so fetch can
+        # also run on a background thread
+        session = TMDBApi.get_session()
+        timeout = TMDBApi.get_timeout()
+        cache = TMDBApi.get_cache()
+        mirror = current_app.config.get('CONTENT_METADATA_ENABLED', True)
+        
+        def fetch():
+            response = session.get(url, params=request_params, timeout=timeout)
             response.raise_for_status()
-            return response.json()
+            
+            if ttl:
+                cache.set(cache_key, response.content, ttl, size=len(response.content), stale_ttl=stale_ttl)
+            
+            # Write-through to the local content metadata store
+            if mirror:
+                TMDBApi.mirror_in_background(endpoint, response.content)
+            
+            return response.content
+        
+        if ttl:
+            cached, is_stale = cache.get_with_state(cache_key)
+            if cached is not None:
+                if is_stale:
+                    TMDBApi.refresh_in_background(cache_key, fetch)
+                # Parse the stored body so callers can freely modify the result
+                return json.loads(cached)
+        
+        try:
+            return json.loads(TMDBApi._in_flight.do(cache_key, fetch))
         except requests.exceptions.RequestException as e:
             logger.error(f"TMDB API request error: {e}")
             return {'error': str(e)}
+        except ValueError as e:
+            logger.error(f"TMDB API returned invalid JSON for {endpoint}: {e}")
+            return {'error': 'Invalid response from TMDB'}
     
     # Movie related methods
     @staticmethod
     def get_popular_movies(page=1):
         """Get popular movies"""
-        return TMDBApi.make_request('/movie/popular', {'page': page})
+        return TMDBApi.make_request('/movie/popular', {'page': page}, cache_family='lists')
     
     @staticmethod
     def get_trending_movies(time_window='week'):
         """Get trending movies (day or week)"""
-        return TMDBApi.make_request(f'/trending/movie/{time_window}')
+        return TMDBApi.make_request(f'/trending/movie/{time_window}', cache_family='trending')
     
     @staticmethod
     def get_top_rated_movies(page=1):
         """Get top rated movies"""
-        return TMDBApi.make_request('/movie/top_rated', {'page': page})
+        return TMDBApi.make_request('/movie/top_rated', {'page': page}, cache_family='lists')
     
     @staticmethod
     def get_upcoming_movies(page=1):
         """Get upcoming movies"""
-        return TMDBApi.make_request('/movie/upcoming', {'page': page})
+        return TMDBApi.make_request('/movie/upcoming', {'page': page}, cache_family='lists')
     
     @staticmethod
     def get_movie_details(movie_id):
@@ -106,24 +415,25 @@ class TMDBApi:
         """
         return TMDBApi.make_request(
             f'/movie/{movie_id}',
-            {'append_to_response': 'videos,credits,similar,recommendations'}
+            {'append_to_response': 'videos,credits,similar,recommendations'},
+            cache_family='details'
         )
     
     # TV Show related methods
     @staticmethod
     def get_popular_tv_shows(page=1):
         """Get popular TV shows"""
-        return TMDBApi.make_request('/tv/popular', {'page': page})
+        return TMDBApi.make_request('/tv/popular', {'page': page}, cache_family='lists')
     
     @staticmethod
     def get_trending_tv_shows(time_window='week'):
         """Get trending TV shows (day or week)"""
-        return TMDBApi.make_request(f'/trending/tv/{time_window}')
+        return TMDBApi.make_request(f'/trending/tv/{time_window}', cache_family='trending')
     
     @staticmethod
     def get_top_rated_tv_shows(page=1):
         """Get top rated TV shows"""
-        return TMDBApi.make_request('/tv/top_rated', {'page': page})
+        return TMDBApi.make_request('/tv/top_rated', {'page': page}, cache_family='lists')
     
     @staticmethod
     def get_tv_show_details(tv_id):
@@ -138,9 +448,148 @@ class TMDBApi:
         """
         return TMDBApi.make_request(
             f'/tv/{tv_id}',
-            {'append_to_response': 'videos,credits,similar,recommendations'}
+            {'append_to_response': 'videos,credits,similar,recommendations'},
+            cache_family='details'
         )
     
+    # Summary functionality
+    @staticmethod
+    def get_content_summary(media_type, tmdb_id):
+        """
+        Get a compact summary of a movie or TV show for list views
+        
+        Only the base resource is requested (no appended videos, credits,
+        similar titles or recommendations) and the result is trimmed by
+        summarize_content. Summaries are cached apart from full details.
+        
+        Args:
+            media_type (str): 'movie' or 'tv'
+            tmdb_id (int): TMDB ID
+        
+        Returns:
+            dict: Content summary, or a dict with an 'error' key
+        """
+        ttl = TMDBApi.get_cache_ttl('summary')
+        cache_key = f"summary:{media_type}:{tmdb_id}"
+        
+        if ttl:
+            cached = TMDBApi.get_cache().get(cache_key)
+            if cached is not None:
+                return json.loads(cached)
+        
+        endpoint = f'/tv/{tmdb_id}' if media_type == 'tv' else f'/movie/{tmdb_id}'
+        response = TMDBApi.make_request(endpoint)
+        
+        if 'error' in response:
+            return response
+        
+        summary = summarize_content(response, media_type)
+        
+        if ttl:
+            body = json.dumps(summary).encode('utf-8')
+            TMDBApi.get_cache().set(cache_key, body, ttl, size=len(body))
+        
+        return summary
+    
+    @staticmethod
+    def get_summaries(items):
+        """
+        Get summaries for many movies and TV shows, local store first
+        
+        Rows in the content metadata store younger than
+        CONTENT_METADATA_MAX_AGE are served as is. Missing or older titles
+        are fetched from TMDB concurrently; when that fails an older stored
+        row is served instead.
+        
+        Args:
+            items (list): (media_type, tmdb_id) tuples, media_type being 'movie' or 'tv'
+        
+        Returns:
+            list: Summary for each item in order, None where none is available
+        """
+        if not current_app.config.get('CONTENT_METADATA_ENABLED', True):
+            return TMDBApi.get_details_batch(items, summary=True)
+        
+        max_age = current_app.config.get('CONTENT_METADATA_MAX_AGE', 7 * 24 * 60 * 60)
+        stored = ContentStore.get_many([to_content_id(media_type, tmdb_id) for media_type, tmdb_id in items])
+        
+        results = []
+        to_fetch = []
+        
+        for index, (media_type, tmdb_id) in enumerate(items):
+            summary, age = stored.get(to_content_id(media_type, tmdb_id), (None, None))
+            results.append(summary)
+            if summary is None or age is None or age >= max_age:
+                to_fetch.append(index)
+        
+        if to_fetch:
+            fetched = TMDBApi.get_details_batch([items[index] for index in to_fetch], summary=True)
+            for index, summary in zip(to_fetch, fetched):
+                if summary is not None:
+                    results[index] = summary
+        
+        return results
+    
+    # Batch functionality
+    @staticmethod
+    def get_details_batch(items, deadline=None, summary=False):
+        """
+        Get details for many movies and TV shows concurrently
+        
+        Lookups run on a shared, bounded thread pool and go through the
+        response cache. When the deadline passes, whatever has finished is
+        returned. Lookups still queued are cancelled so they do not hold up
+        the pool for later requests; lookups already running finish in the
+        background and warm the cache for the next request.
+        
+        Args:
+            items (list): (media_type, tmdb_id) tuples, media_type being 'movie' or 'tv'
+            deadline (float, optional): Seconds to wait, defaults to TMDB_BATCH_DEADLINE
+            summary (bool): Fetch card summaries through get_content_summary
+                instead of full details
+        
+        Returns:
+            list: Details for each item in order, None where the lookup failed
+                or did not finish in time
+        """
+        if not items:
+            return []
+        
+        if deadline is None:
+            deadline = current_app.config.get('TMDB_BATCH_DEADLINE', 5)
+        
+        app = current_app._get_current_object()
+        executor = TMDBApi.get_executor('tmdb-batch', current_app.config.get('TMDB_BATCH_WORKERS', 10))
+        
+        def fetch(media_type, tmdb_id):
+            with app.app_context():
+                if summary:
+                    return TMDBApi.get_content_summary(media_type, tmdb_id)
+                if media_type == 'tv':
+                    return TMDBApi.get_tv_show_details(tmdb_id)
+                return TMDBApi.get_movie_details(tmdb_id)
+        
+        futures = [executor.submit(fetch, media_type, tmdb_id) for media_type, tmdb_id in items]
+        done, not_done = wait(futures, timeout=deadline)
+        
+        if not_done:
+            logger.warning(
+                f"TMDB batch deadline of {deadline}s reached, "
+                f"returning {len(done)} of {len(futures)} results"
+            )
+            for future in not_done:
+                future.cancel()
+        
+        results = []
+        for future in futures:
+            if future in done and future.exception() is None:
+                details = future.result()
+                results.append(details if 'error' not in details else None)
+            else:
+                results.append(None)
+        
+        return results
+    
     # Search functionality
     @staticmethod
     def search_multi(query, page=1):
@@ -198,9 +647,9 @@ class TMDBApi:
     @staticmethod
     def get_movie_genres():
         """Get list of movie genres"""
-        return TMDBApi.make_request('/genre/movie/list')
+        return TMDBApi.make_request('/genre/movie/list', cache_family='genres')
     
     @staticmethod
     def get_tv_genres():
         """Get list of TV show genres"""
-        return TMDBApi.make_request('/genre/tv/list') 
\ No newline at end of file
+        return TMDBApi.make_request('/genre/tv/list', cache_family='genres')
\ No newline at end of file
@@ -0,0 +1,291 @@
+import os
+import atexit
+import threading
+from datetime import datetime
+from flask import current_app
+from app.utils.database import Database
+import logging
+
+logger = logging.getLogger(__name__)
+
+_buffer = None
+_buffer_pid = None
+_buffer_lock = threading.Lock()
+
+def write_watch_events(rows):
+    """
+    Writes (user_id, content_id, watched_at, progress) rows to watch_history
+    
+    Relies on the unique (user_id, content_id) key: each group of rows is
+    one multi-row INSERT ... ON DUPLICATE KEY UPDATE. Rows without
+    progress only move watched_at forward. Inside a request the rows join
+    the request's unit of work.
+    
+    Args:
+        rows (list): Rows with progress as (watch_duration, watch_percentage) or None
+    """
+    views = [
+        (user_id, content_id, watched_at)
+        for user_id, content_id, watched_at, progress in rows
+        if progress is None
+    ]
+    progress_rows = [
+        (user_id, content_id, watched_at) + tuple(progress)
+        for user_id, content_id, watched_at, progress in rows
+        if progress is not None
+    ]
+    
+    with Database.transaction():
+        if views:
+            Database.execute_many(
+                """
+                INSERT INTO watch_history (user_id, content_id, watched_at)
+                VALUES (%s, %s, %s)
+                ON DUPLICATE KEY UPDATE watched_at = GREATEST(watched_at, VALUES(watched_at))
+                """,
+                views
+            )
+        
+        if progress_rows:
+            Database.execute_many(
+                """
+                INSERT INTO watch_history (user_id, content_id, watched_at, watch_duration, watch_percentage)
+                VALUES (%s, %s, %s, %s, %s)
+                ON DUPLICATE KEY UPDATE
+                    watched_at = GREATEST(watched_at, VALUES(watched_at)),
+                    watch_duration = VALUES(watch_duration),
+                    watch_percentage = VALUES(watch_percentage)
+                """,
+                progress_rows
+            )
+
+class WatchEventBuffer:
+    """
+    In-process write-behind buffer for watch_history updates
+    
+    Events are coalesced per (user_id, content_id), keeping the latest
+    timestamp and the last reported progress, and written by a background
+    thread in batches every `flush_interval` seconds or as soon as
+    `batch_size` distinct rows are pending. Whatever is still buffered is
+    written when the process exits.
+    """
+    
+    def __init__(self, flush_interval=2.0, batch_size=500, max_pending=50000):
+        """
+        Args:
+            flush_interval (float): Seconds between flushes
+            batch_size (int): Rows written per statement; reaching it triggers a flush
+            max_pending (int): Rows kept in memory before new ones are dropped
+        """
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.max_pending = max_pending
+        
+        self._pending = {}  # (user_id, content_id) -> [watched_at, (watch_duration, watch_percentage) or None]
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = False
+        self._thread = None
+        
+        self.recorded = 0
+        self.flushed = 0
+        self.dropped = 0
+    
+    def start(self):
+        """Starts the background flush thread"""
+        self._thread = threading.Thread(target=self._run, name='watch-buffer', daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+        return self
+    
+    def record(self, user_id, content_id, watched_at=None, progress=None):
+        """
+        Buffers a watch event
+        
+        Args:
+            user_id (int): User ID
+            content_id (str): Content ID, "123" or "tv_123"
+            watched_at (datetime, optional): When the event happened, defaults to now
+            progress (tuple, optional): (watch_duration, watch_percentage); the
+                stored progress is left as is when None
+        
+        Returns:
+            bool: False if the buffer is full and the event was dropped
+        """
+        key = (user_id, str(content_id))
+        watched_at = watched_at or datetime.now()
+        
+        with self._lock:
+            entry = self._pending.get(key)
+            
+            if entry is None:
+                if len(self._pending) >= self.max_pending:
+                    self.dropped += 1
+                    return False
+                self._pending[key] = [watched_at, progress]
+            else:
+                entry[0] = max(entry[0], watched_at)
+                if progress is not None:
+                    entry[1] = progress
+            
+            self.recorded += 1
+            pending = len(self._pending)
+        
+        if pending >= self.batch_size:
+            self._wakeup.set()
+        
+        return True
+    
+    def flush(self):
+        """
+        Writes every buffered event to the database
+        
+        Rows that fail to write are put back, unless newer events for the
+        same row arrived in the meantime.
+        
+        Returns:
+            int: Number of rows written
+        """
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+            
+            if not batch:
+                return 0
+            
+            rows = [(user_id, content_id, watched_at, progress) for (user_id, content_id), (watched_at, progress) in batch.items()]
+            written = 0
+            
+            for start in range(0, len(rows), self.batch_size):
+                chunk = rows[start:start + self.batch_size]
+                try:
+                    write_watch_events(chunk)
+                    written += len(chunk)
+                except Exception as e:
+                    logger.error("Error flushing %d watch events: %s", len(chunk), e)
+                    self._requeue(chunk)
+            
+            self.flushed += written
+            return written
+    
+    def _requeue(self, rows):
+        """Puts rows from a failed flush back unless newer events replaced them"""
+        with self._lock:
+            for user_id, content_id, watched_at, progress in rows:
+                key = (user_id, content_id)
+                if key in self._pending:
+                    continue
+                if len(self._pending) >= self.max_pending:
+                    self.dropped += 1
+                    continue
+                self._pending[key] = [watched_at, progress]
+    
+    def _run(self):
+        """Background loop flushing on the interval or when a batch fills up"""
+        while not self._stopping:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error("Watch buffer flush loop error: %s", e)
+    
+    def stop(self):
+        """Stops the flush thread and drains the buffer"""
+        self._stopping = True
+        self._wakeup.set()
+        if self._thread is not None and self._thread.is_alive():
+            self._thread.join(timeout=self.flush_interval + 5)
+        self.flush()
+    
+    def stats(self):
+        """
+        Returns buffer counters
+        
+        Returns:
+            dict: Pending rows, events recorded, rows flushed and events dropped
+        """
+        with self._lock:
+            return {
+                'pending': len(self._pending),
+                'recorded': self.recorded,
+                'flushed': self.flushed,
+                'dropped': self.dropped
+            }
+
+def get_watch_buffer():
+    """
+    Returns the process-wide watch event buffer, starting it on first use
+    
+    A new buffer is started after a fork since the flush thread does not
+    survive it.
+    
+    Returns:
+        WatchEventBuffer: The buffer
+    """
+    global _buffer, _buffer_pid
+    
+    pid = os.getpid()
+    
+    if _buffer is None or _buffer_pid != pid:
+        with _buffer_lock:
+            if _buffer is None or _buffer_pid != pid:
+                _buffer = WatchEventBuffer(
+                    flush_interval=current_app.config.get('WATCH_BUFFER_FLUSH_INTERVAL', 2.0),
+                    batch_size=current_app.config.get('WATCH_BUFFER_BATCH_SIZE', 500),
+                    max_pending=current_app.config.get('WATCH_BUFFER_MAX_PENDING', 50000)
+                ).start()
+                _buffer_pid = pid
+    
+    return _buffer
+
+def record_watch(user_id, content_id, progress=None):
+    """
+    Records that a user watched or opened a title without waiting on the write
+    
+    With WATCH_BUFFER_ENABLED off the event is written before returning,
+    as part of the current request.
+    
+    Args:
+        user_id (int): User ID
+        content_id (str): Content ID, "123" or "tv_123"
+        progress (tuple, optional): (watch_duration, watch_percentage)
+    """
+    if not current_app.config.get('WATCH_BUFFER_ENABLED', True):
+        write_watch_events([(user_id, str(content_id), datetime.now(), progress)])
+        return
+    
+    get_watch_buffer().record(user_id, content_id, progress=progress)
+
+def record_progress(user_id, events):
+    """
+    Records a batch of playback progress reports without waiting on the write
+    
+    Reports for the same title collapse into one pending row holding the
+    last one, so a title being played costs one row per flush however
+    often the player reports.
+    
+    Args:
+        user_id (int): User ID
+        events (list): (content_id, watch_duration, watch_percentage) tuples, oldest first
+    
+    Returns:
+        int: Number of reports accepted; the rest were dropped because the buffer is full
+    """
+    now = datetime.now()
+    
+    if not current_app.config.get('WATCH_BUFFER_ENABLED', True):
+        # Only this request's reports, written in its own unit of work
+        latest = {str(content_id): (watch_duration, watch_percentage) for content_id, watch_duration, watch_percentage in events}
+        write_watch_events([(user_id, content_id, now, progress) for content_id, progress in latest.items()])
+        return len(events)
+    
+    buffer = get_watch_buffer()
+    accepted = 0
+    
+    for content_id, watch_duration, watch_percentage in events:
+        if buffer.record(user_id, content_id, watched_at=now, progress=(watch_duration, watch_percentage)):
+            accepted += 1
+    
+    return accepted
\ No newline at end of file
@@ -0,0 +1,87 @@
+import os
+import sys
+import time
+import argparse
+import logging
+import threading
+
+# Add the parent directory to sys.path to ensure proper module imports
+sys.path.insert(0, os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+
+import bcrypt
+from app import create_app
+from app.utils.hashing import PasswordHasher, HashingOverloadedError
+
+PASSWORD = 'correct horse battery staple'
+
+def run(app, verify, clients, duration):
+    """
+    Runs verify from concurrent client threads for a fixed time
+    
+    Args:
+        app (Flask): Application providing the bcrypt configuration
+        verify (callable): Function checking PASSWORD against a hash
+        clients (int): Number of concurrent client threads
+        duration (float): Seconds to run for
+    
+    Returns:
+        tuple: (successful logins per second, rejected attempts)
+    """
+    completed = [0]
+    rejected = [0]
+    lock = threading.Lock()
+    stop_at = time.perf_counter() + duration
+    
+    def client():
+        with app.app_context():
+            while time.perf_counter() < stop_at:
+                try:
+                    verify()
+                    with lock:
+                        completed[0] += 1
+                except HashingOverloadedError:
+                    with lock:
+                        rejected[0] += 1
+                    time.sleep(0.01)
+    
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    
+    return completed[0] / elapsed, rejected[0]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare login throughput with inline bcrypt and the bcrypt process pool")
+    parser.add_argument('--clients', type=int, default=8, help="Concurrent login attempts")
+    parser.add_argument('--duration', type=float, default=5.0, help="Seconds per run")
+    parser.add_argument('--rounds', type=int, default=12, help="bcrypt cost of the stored hash")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="BCRYPT_WORKERS")
+    parser.add_argument('--max-pending', type=int, default=None, help="BCRYPT_MAX_PENDING")
+    args = parser.parse_args()
+    
+    cores = os.cpu_count() or 1
+    hashed = bcrypt.hashpw(PASSWORD.encode('utf-8'), bcrypt.gensalt(args.rounds))
+    
+    # Rejections are counted below; don't log each one
+    logging.getLogger('app.utils.hashing').setLevel(logging.ERROR)
+    
+    app = create_app('development')
+    app.config['BCRYPT_WORKERS'] = args.workers
+    app.config['BCRYPT_MAX_PENDING'] = args.max_pending or args.workers * 4
+    
+    # Previous behaviour: bcrypt on the request thread
+    inline_rate, _ = run(app, lambda: bcrypt.checkpw(PASSWORD.encode('utf-8'), hashed), args.clients, args.duration)
+    
+    # Warm the pool so worker start-up is not measured
+    with app.app_context():
+        PasswordHasher.verify(PASSWORD, hashed.decode('utf-8'))
+    
+    pooled_rate, rejected = run(app, lambda: PasswordHasher.verify(PASSWORD, hashed.decode('utf-8')), args.clients, args.duration)
+    
+    print(f"Cores: {cores}, clients: {args.clients}, cost: {args.rounds}, pool workers: {args.workers}")
+    print(f"Inline bcrypt: {inline_rate:8.2f} logins/s ({inline_rate / cores:6.2f} per core)")
+    print(f"Process pool:  {pooled_rate:8.2f} logins/s ({pooled_rate / cores:6.2f} per core), {rejected} rejected with 503")
\ No newline at end of file
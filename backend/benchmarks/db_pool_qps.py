@@ -0,0 +1,87 @@
+import os
+import sys
+import time
+import logging
+import argparse
+import threading
+
+# Add the parent directory to sys.path to ensure proper module imports
+sys.path.insert(0, os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+
+import mysql.connector
+from app.utils.database import Database
+from app.config.config import active_config as config
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+QUERY = "SELECT user_id, username, email, role_id FROM users WHERE user_id = %s"
+
+def unpooled_query(user_id):
+    """Runs QUERY the way Database did before pooling: one connection per call"""
+    connection = mysql.connector.connect(
+        host=config.DB_HOST,
+        database=config.DB_NAME,
+        user=config.DB_USER,
+        password=config.DB_PASSWORD,
+        port=config.DB_PORT
+    )
+    try:
+        cursor = connection.cursor(dictionary=True)
+        cursor.execute(QUERY, (user_id,))
+        cursor.fetchall()
+        cursor.close()
+    finally:
+        connection.close()
+
+def pooled_query(user_id):
+    """Runs QUERY through the pooled Database utility"""
+    Database.get_single_result(QUERY, (user_id,))
+
+def run(query_fn, threads, queries_per_thread):
+    """
+    Runs query_fn concurrently and returns queries per second
+    
+    Args:
+        query_fn (callable): Function executing one query
+        threads (int): Number of concurrent client threads
+        queries_per_thread (int): Queries issued by each thread
+    
+    Returns:
+        float: Achieved queries per second
+    """
+    def worker():
+        for _ in range(queries_per_thread):
+            query_fn(1)
+    
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    
+    start = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    
+    return (threads * queries_per_thread) / elapsed
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare query throughput with and without the connection pool")
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--queries', type=int, default=200, help="Queries per thread")
+    args = parser.parse_args()
+    
+    logger.info(
+        "Running %d threads x %d queries against %s:%s/%s (pool size %d, overflow %d)",
+        args.threads, args.queries, config.DB_HOST, config.DB_PORT, config.DB_NAME,
+        config.DB_POOL_SIZE, config.DB_POOL_MAX_OVERFLOW
+    )
+    
+    unpooled_qps = run(unpooled_query, args.threads, args.queries)
+    pooled_qps = run(pooled_query, args.threads, args.queries)
+    
+    print(f"Without pool: {unpooled_qps:10.1f} queries/s")
+    print(f"With pool:    {pooled_qps:10.1f} queries/s")
+    print(f"Speedup:      {pooled_qps / unpooled_qps:10.2f}x")
+    print(f"Pool status:  {Database.get_pool().status()}")
\ No newline at end of file
@@ -0,0 +1,72 @@
+import os
+import sys
+import time
+import argparse
+import statistics
+
+# Add the parent directory to sys.path to ensure proper module imports
+sys.path.insert(0, os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+
+import requests
+from app import create_app
+from app.utils.tmdb import TMDBApi
+from benchmarks.tmdb_stub import StubTMDBServer
+
+def measure(fetch, iterations):
+    """
+    Calls fetch repeatedly and returns per-call latencies in milliseconds
+    
+    Args:
+        fetch (callable): Function performing one TMDB request
+        iterations (int): Number of calls
+    
+    Returns:
+        list: Latencies in milliseconds
+    """
+    latencies = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fetch()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+def summarize(label, latencies):
+    """Prints mean, p50 and p99 latency"""
+    ordered = sorted(latencies)
+    p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+    print(
+        f"{label:<28} mean {statistics.mean(ordered):7.2f} ms   "
+        f"p50 {statistics.median(ordered):7.2f} ms   p99 {p99:7.2f} ms"
+    )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare TMDB request latency with and without the shared session")
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--handshake-ms', type=float, default=20.0,
+                        help="Simulated connection setup cost (DNS + TCP + TLS) per new connection")
+    args = parser.parse_args()
+    
+    stub = StubTMDBServer(handshake_delay=args.handshake_ms / 1000).start()
+    
+    app = create_app('development')
+    app.config['TMDB_API_BASE_URL'] = stub.base_url
+    
+    with app.app_context():
+        url = f"{stub.base_url}/movie/popular"
+        
+        # Previous behaviour: module-level requests.get, new connection every call
+        stub.reset_counters()
+        without_session = measure(
+            lambda: requests.get(url, params={'page': 1, 'api_key': TMDBApi.get_api_key()}),
+            args.iterations
+        )
+        unpooled_connections = stub.connection_count
+        
+        stub.reset_counters()
+        with_session = measure(lambda: TMDBApi.make_request('/movie/popular', {'page': 1}), args.iterations)
+        pooled_connections = stub.connection_count
+    
+    stub.stop()
+    
+    summarize(f"requests.get ({unpooled_connections} conns)", without_session)
+    summarize(f"shared session ({pooled_connections} conns)", with_session)
\ No newline at end of file
@@ -0,0 +1,74 @@
+import os
+import sys
+import time
+import argparse
+import threading
+
+# Add the parent directory to sys.path to ensure proper module imports
+sys.path.insert(0, os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+
+from app import create_app
+from app.utils.tmdb import TMDBApi
+from benchmarks.tmdb_stub import StubTMDBServer
+
+def burst(app, clients):
+    """
+    Fires `clients` concurrent get_popular_movies calls
+    
+    Args:
+        app (Flask): Application whose config points at the stub
+        clients (int): Number of concurrent callers
+    
+    Returns:
+        float: Slowest caller latency in milliseconds
+    """
+    barrier = threading.Barrier(clients)
+    latencies = []
+    lock = threading.Lock()
+    
+    def client():
+        with app.app_context():
+            barrier.wait()
+            start = time.perf_counter()
+            TMDBApi.get_popular_movies(1)
+            elapsed = (time.perf_counter() - start) * 1000
+            with lock:
+                latencies.append(elapsed)
+    
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    return max(latencies)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure upstream calls caused by a burst of identical TMDB requests")
+    parser.add_argument('--clients', type=int, default=50)
+    parser.add_argument('--upstream-ms', type=float, default=200.0, help="Stub response time")
+    args = parser.parse_args()
+    
+    stub = StubTMDBServer(response_delay=args.upstream_ms / 1000).start()
+    
+    app = create_app('development')
+    app.config['TMDB_API_BASE_URL'] = stub.base_url
+    app.config['TMDB_CACHE_TTL_LISTS'] = 1
+    app.config['TMDB_CACHE_STALE_TTL'] = 60
+    
+    # Cold cache: every caller misses, single-flight lets only one through
+    stub.reset_counters()
+    slowest = burst(app, args.clients)
+    print(f"Cold cache:    {args.clients} callers -> {stub.request_count} upstream call(s), slowest {slowest:7.1f} ms")
+    
+    # Expired entry: callers get the stale copy while one refresh runs
+    time.sleep(1.1)
+    stub.reset_counters()
+    slowest = burst(app, args.clients)
+    time.sleep(args.upstream_ms / 1000 * 2)
+    print(f"Expired entry: {args.clients} callers -> {stub.request_count} upstream call(s), slowest {slowest:7.1f} ms")
+    
+    with app.app_context():
+        print(f"Cache stats:   {TMDBApi.cache_stats()}")
+    
+    stub.stop()
\ No newline at end of file
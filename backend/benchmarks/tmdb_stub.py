@@ -0,0 +1,90 @@
+import json
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+class StubTMDBServer:
+    """
+    Minimal local stand-in for the TMDB API used by the benchmarks
+    
+    Every GET returns a small JSON payload after `response_delay` seconds.
+    `handshake_delay` is paid once per new TCP connection to approximate the
+    DNS + TCP + TLS setup cost of talking to the real API.
+    """
+    
+    def __init__(self, response_delay=0.0, handshake_delay=0.0):
+        """
+        Args:
+            response_delay (float): Seconds spent on every request
+            handshake_delay (float): Seconds spent on every new connection
+        """
+        self.response_delay = response_delay
+        self.handshake_delay = handshake_delay
+        self.request_count = 0
+        self.connection_count = 0
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+    
+    @property
+    def base_url(self):
+        """Base URL to use as TMDB_API_BASE_URL"""
+        host, port = self._server.server_address
+        return f"http://{host}:{port}/3"
+    
+    def reset_counters(self):
+        """Resets request and connection counters"""
+        with self._lock:
+            self.request_count = 0
+            self.connection_count = 0
+    
+    def start(self):
+        """Starts serving on an ephemeral localhost port"""
+        stub = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            # Headers and body go out as separate writes; avoid delayed-ACK stalls on keep-alive
+            disable_nagle_algorithm = True
+            
+            def setup(self):
+                with stub._lock:
+                    stub.connection_count += 1
+                if stub.handshake_delay:
+                    time.sleep(stub.handshake_delay)
+                super().setup()
+            
+            def do_GET(self):
+                with stub._lock:
+                    stub.request_count += 1
+                if stub.response_delay:
+                    time.sleep(stub.response_delay)
+                
+                body = json.dumps({
+                    'page': 1,
+                    'path': self.path.split('?')[0],
+                    'results': [{'id': i, 'title': f"Title {i}"} for i in range(20)],
+                    'total_pages': 1,
+                    'total_results': 20
+                }).encode('utf-8')
+                
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            
+            def log_message(self, format, *args):
+                pass
+        
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+    
+    def stop(self):
+        """Stops the server"""
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
\ No newline at end of file
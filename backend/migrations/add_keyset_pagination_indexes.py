@@ -0,0 +1,73 @@
+import os
+import sys
+import logging
+
+# Add the parent directory to sys.path to ensure proper module imports
+sys.path.insert(0, os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+
+from app.utils.database import Database
+from app import create_app
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# (table, index name, columns) backing the admin listings' (sort column, id) order
+INDEXES = [
+    ('users', 'idx_users_created', 'created_at, user_id'),
+    ('subscriptions', 'idx_subscriptions_start', 'start_date, subscription_id'),
+    ('audit_log', 'idx_audit_log_created', 'created_at, log_id'),
+    ('audit_log', 'idx_audit_log_action_created', 'action, created_at, log_id'),
+    ('audit_log', 'idx_audit_log_user_created', 'user_id, created_at, log_id'),
+]
+
+def run_migration():
+    """Add composite indexes for keyset pagination of admin listings"""
+    
+    # Create Flask app to initialize database connection
+    app = create_app('development')
+    with app.app_context():
+        try:
+            created = 0
+            
+            for table, index_name, columns in INDEXES:
+                # Check if the index already exists
+                index_exists = Database.get_single_result(
+                    """
+                    SELECT COUNT(*) AS count
+                    FROM information_schema.statistics
+                    WHERE table_schema = DATABASE()
+                      AND table_name = %s
+                      AND index_name = %s
+                    """,
+                    (table, index_name)
+                )
+                
+                if index_exists and index_exists['count']:
+                    logger.info(f"{index_name} already exists on {table}.")
+                    continue
+                
+                logger.info(f"Creating {index_name} on {table} ({columns})...")
+                
+                # InnoDB builds secondary indexes online, without blocking writes
+                Database.execute_query(
+                    f"ALTER TABLE {table} ADD INDEX {index_name} ({columns}), ALGORITHM=INPLACE, LOCK=NONE",
+                    fetch=False
+                )
+                created += 1
+            
+            if not created:
+                return False
+            
+            logger.info("Migration completed successfully!")
+            return True
+        
+        except Exception as e:
+            logger.error(f"Migration failed: {e}")
+            return False
+
+if __name__ == "__main__":
+    if run_migration():
+        print("Migration successful!")
+    else:
+        print("Migration not needed or failed. Check logs for details.")
\ No newline at end of file
@@ -0,0 +1,103 @@
+import os
+import sys
+import logging
+
+# Add the parent directory to sys.path to ensure proper module imports
+sys.path.insert(0, os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+
+from app.utils.database import Database
+from app import create_app
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def run_migration():
+    """De-duplicate watch_history and add a unique (user_id, content_id) index"""
+    
+    # Create Flask app to initialize database connection
+    app = create_app('development')
+    with app.app_context():
+        try:
+            # Check if the index already exists
+            index_exists = Database.get_single_result(
+                """
+                SELECT COUNT(*) AS count
+                FROM information_schema.statistics
+                WHERE table_schema = DATABASE()
+                  AND table_name = 'watch_history'
+                  AND index_name = 'unique_watch'
+                """
+            )
+            
+            if index_exists and index_exists['count']:
+                logger.info("unique_watch index already exists on watch_history.")
+                return False
+            
+            # The temporary table only exists on the connection that created it,
+            # so run every step on one connection
+            with Database.transaction():
+                logger.info("Collecting duplicate watch_history rows...")
+                
+                # One row per duplicated (user_id, content_id): the row to keep
+                # and the merged values it should end up with
+                Database.execute_query(
+                    """
+                    CREATE TEMPORARY TABLE watch_history_keep AS
+                    SELECT user_id, content_id,
+                           MAX(history_id) AS history_id,
+                           MAX(watched_at) AS watched_at,
+                           MAX(watch_duration) AS watch_duration,
+                           MAX(watch_percentage) AS watch_percentage
+                    FROM watch_history
+                    GROUP BY user_id, content_id
+                    HAVING COUNT(*) > 1
+                    """,
+                    fetch=False
+                )
+                
+                Database.execute_query(
+                    """
+                    UPDATE watch_history w
+                    JOIN watch_history_keep k ON w.history_id = k.history_id
+                    SET w.watched_at = k.watched_at,
+                        w.watch_duration = k.watch_duration,
+                        w.watch_percentage = k.watch_percentage
+                    """,
+                    fetch=False
+                )
+                
+                removed, _ = Database.execute_write(
+                    """
+                    DELETE w
+                    FROM watch_history w
+                    JOIN watch_history_keep k ON w.user_id = k.user_id AND w.content_id = k.content_id
+                    WHERE w.history_id <> k.history_id
+                    """
+                )
+                logger.info(f"Removed {removed} duplicate watch_history rows.")
+                
+                Database.execute_query("DROP TEMPORARY TABLE watch_history_keep", fetch=False)
+            
+            logger.info("Adding unique_watch index to watch_history...")
+            
+            Database.execute_query(
+                """
+                ALTER TABLE watch_history
+                ADD UNIQUE KEY unique_watch (user_id, content_id);
+                """,
+                fetch=False
+            )
+            
+            logger.info("Migration completed successfully!")
+            return True
+        
+        except Exception as e:
+            logger.error(f"Migration failed: {e}")
+            return False
+
+if __name__ == "__main__":
+    if run_migration():
+        print("Migration successful!")
+    else:
+        print("Migration not needed or failed. Check logs for details.")
\ No newline at end of file
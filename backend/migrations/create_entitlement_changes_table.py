@@ -0,0 +1,60 @@
+import os
+import sys
+import logging
+
+# Add the parent directory to sys.path to ensure proper module imports
+sys.path.insert(0, os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+
+from app.utils.database import Database
+from app import create_app
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def run_migration():
+    """Create the entitlement_changes table workers read to drop cached entitlements"""
+    
+    # Create Flask app to initialize database connection
+    app = create_app('development')
+    with app.app_context():
+        try:
+            # Check if the table already exists
+            table_exists = Database.get_single_result(
+                """
+                SELECT COUNT(*) AS count
+                FROM information_schema.tables
+                WHERE table_schema = DATABASE() AND table_name = 'entitlement_changes'
+                """
+            )
+            
+            if table_exists and table_exists['count']:
+                logger.info("entitlement_changes table already exists in the database schema.")
+                return False
+            
+            logger.info("Creating entitlement_changes table...")
+            
+            Database.execute_query(
+                """
+                CREATE TABLE entitlement_changes (
+                    change_id BIGINT AUTO_INCREMENT PRIMARY KEY,
+                    user_id INT NOT NULL,
+                    changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    INDEX idx_entitlement_changes_changed (changed_at)
+                );
+                """,
+                fetch=False
+            )
+            
+            logger.info("Migration completed successfully!")
+            return True
+        
+        except Exception as e:
+            logger.error(f"Migration failed: {e}")
+            return False
+
+if __name__ == "__main__":
+    if run_migration():
+        print("Migration successful!")
+    else:
+        print("Migration not needed or failed. Check logs for details.")
\ No newline at end of file
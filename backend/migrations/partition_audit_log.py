@@ -0,0 +1,113 @@
+import os
+import sys
+import logging
+from datetime import date
+
+# Add the parent directory to sys.path to ensure proper module imports
+sys.path.insert(0, os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+
+from app.utils.database import Database
+from app.utils.partitions import (
+    CATCH_ALL_PARTITION, month_start, add_months, partition_definition, get_partitions
+)
+from app import create_app
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Indexes serving the admin audit log listing, which filters by action or
+# user and pages by (created_at, log_id)
+INDEXES = [
+    ('idx_audit_log_created', 'created_at, log_id'),
+    ('idx_audit_log_action_created', 'action, created_at, log_id'),
+    ('idx_audit_log_user_created', 'user_id, created_at, log_id'),
+]
+
+def run_migration():
+    """Range-partition audit_log by month and add its listing indexes"""
+    
+    # Create Flask app to initialize database connection
+    app = create_app('development')
+    with app.app_context():
+        try:
+            # Check if the table is already partitioned
+            if get_partitions('audit_log'):
+                logger.info("audit_log is already partitioned.")
+                return False
+            
+            # Partitioned tables cannot have foreign keys
+            foreign_keys = Database.execute_query(
+                """
+                SELECT constraint_name AS name
+                FROM information_schema.referential_constraints
+                WHERE constraint_schema = DATABASE() AND table_name = 'audit_log'
+                """
+            )
+            for foreign_key in foreign_keys:
+                logger.info(f"Dropping foreign key {foreign_key['name']} on audit_log...")
+                Database.execute_query(
+                    f"ALTER TABLE audit_log DROP FOREIGN KEY {foreign_key['name']}",
+                    fetch=False
+                )
+            
+            for index_name, columns in INDEXES:
+                index_exists = Database.get_single_result(
+                    """
+                    SELECT COUNT(*) AS count
+                    FROM information_schema.statistics
+                    WHERE table_schema = DATABASE()
+                      AND table_name = 'audit_log'
+                      AND index_name = %s
+                    """,
+                    (index_name,)
+                )
+                
+                if not (index_exists and index_exists['count']):
+                    logger.info(f"Creating {index_name} on audit_log ({columns})...")
+                    Database.execute_query(
+                        f"ALTER TABLE audit_log ADD INDEX {index_name} ({columns})",
+                        fetch=False
+                    )
+            
+            # One partition per month from the oldest entry to a few months ahead
+            oldest = Database.get_single_result("SELECT MIN(created_at) AS oldest FROM audit_log")
+            first = month_start(oldest['oldest'] if oldest and oldest['oldest'] else date.today())
+            last = add_months(month_start(date.today()), app.config.get('AUDIT_PARTITION_MONTHS_AHEAD', 3))
+            
+            months = [first]
+            while months[-1] < last:
+                months.append(add_months(months[-1], 1))
+            
+            definitions = ',\n                    '.join(partition_definition(month) for month in months)
+            
+            # Every unique key must include the partitioning column, so the
+            # primary key becomes (log_id, created_at). This rebuilds the table.
+            logger.info(f"Partitioning audit_log into {len(months)} monthly partitions; this copies the table...")
+            Database.execute_query(
+                f"""
+                ALTER TABLE audit_log
+                    MODIFY created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                    DROP PRIMARY KEY,
+                    ADD PRIMARY KEY (log_id, created_at)
+                PARTITION BY RANGE (UNIX_TIMESTAMP(created_at)) (
+                    {definitions},
+                    PARTITION {CATCH_ALL_PARTITION} VALUES LESS THAN MAXVALUE
+                )
+                """,
+                fetch=False
+            )
+            
+            logger.info("Migration completed successfully!")
+            logger.info("Schedule scripts/audit_retention.py daily to add future partitions and archive old ones.")
+            return True
+        
+        except Exception as e:
+            logger.error(f"Migration failed: {e}")
+            return False
+
+if __name__ == "__main__":
+    if run_migration():
+        print("Migration successful!")
+    else:
+        print("Migration not needed or failed. Check logs for details.")
\ No newline at end of file
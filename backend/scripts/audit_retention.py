@@ -0,0 +1,120 @@
+import os
+import sys
+import gzip
+import json
+import argparse
+import logging
+
+# Add the parent directory to sys.path to ensure proper module imports
+sys.path.insert(0, os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+
+from app.utils.database import Database
+from app.utils.partitions import ensure_month_partitions, expired_partitions
+from app import create_app
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def export_partition(partition, archive_dir, chunk_size=5000):
+    """
+    Writes every row of one audit_log partition to a gzip JSON-lines file
+    
+    Rows are read in primary key order, chunk by chunk, so memory use does
+    not depend on the partition size. The file only appears under its final
+    name once it is complete.
+    
+    Args:
+        partition (str): Partition name, e.g. p202401
+        archive_dir (str): Directory the archive is written to
+        chunk_size (int): Rows read per query
+    
+    Returns:
+        tuple: (archive path, number of rows exported)
+    """
+    path = os.path.join(archive_dir, f"audit_log_{partition}.jsonl.gz")
+    temp_path = path + '.tmp'
+    exported = 0
+    last_id = 0
+    
+    with gzip.open(temp_path, 'wt', encoding='utf-8') as archive:
+        while True:
+            rows = Database.execute_query(
+                f"""
+                SELECT log_id, user_id, action, details, ip_address, created_at
+                FROM audit_log PARTITION ({partition})
+                WHERE log_id > %s
+                ORDER BY log_id
+                LIMIT %s
+                """,
+                (last_id, chunk_size)
+            )
+            
+            if not rows:
+                break
+            
+            for row in rows:
+                archive.write(json.dumps(row, default=str) + '\n')
+            
+            exported += len(rows)
+            last_id = rows[-1]['log_id']
+    
+    os.replace(temp_path, path)
+    return path, exported
+
+def run_retention(retention_months, archive_dir, months_ahead, dry_run=False):
+    """
+    Adds upcoming audit_log partitions and archives then drops expired ones
+    
+    Args:
+        retention_months (int): Whole months kept before the current one
+        archive_dir (str): Directory archives are written to
+        months_ahead (int): Months after the current one that get a partition
+        dry_run (bool): Only report what would be done
+    
+    Returns:
+        list: Names of the partitions archived and dropped
+    """
+    expired = expired_partitions('audit_log', retention_months)
+    
+    if dry_run:
+        logger.info(f"Would archive and drop: {', '.join(expired) or 'nothing'}")
+        return []
+    
+    ensure_month_partitions('audit_log', months_ahead)
+    os.makedirs(archive_dir, exist_ok=True)
+    
+    dropped = []
+    for partition in expired:
+        path, exported = export_partition(partition, archive_dir)
+        
+        # Make sure nothing was added to the partition while it was exported
+        remaining = Database.get_single_result(
+            f"SELECT COUNT(*) AS count FROM audit_log PARTITION ({partition})"
+        )
+        if remaining['count'] != exported:
+            logger.error(f"{partition} has {remaining['count']} rows but {exported} were archived; keeping it")
+            continue
+        
+        Database.execute_query(f"ALTER TABLE audit_log DROP PARTITION {partition}", fetch=False)
+        logger.info(f"Archived {exported} rows from {partition} to {path} and dropped it")
+        dropped.append(partition)
+    
+    return dropped
+
+if __name__ == "__main__":
+    app = create_app('development')
+    
+    parser = argparse.ArgumentParser(description="Archive audit_log partitions past retention and create upcoming ones")
+    parser.add_argument('--retention-months', type=int, default=app.config.get('AUDIT_RETENTION_MONTHS', 12),
+                        help="Whole months kept before the current one")
+    parser.add_argument('--archive-dir', default=app.config.get('AUDIT_ARCHIVE_DIR', 'audit_archive'),
+                        help="Directory the gzip JSON-lines archives are written to")
+    parser.add_argument('--months-ahead', type=int, default=app.config.get('AUDIT_PARTITION_MONTHS_AHEAD', 3),
+                        help="Months after the current one that get a partition")
+    parser.add_argument('--dry-run', action='store_true', help="Only list the partitions that would be archived")
+    args = parser.parse_args()
+    
+    with app.app_context():
+        dropped = run_retention(args.retention_months, args.archive_dir, args.months_ahead, args.dry_run)
+        print(f"Archived and dropped {len(dropped)} partition(s)")
\ No newline at end of file
@@ -0,0 +1,110 @@
+import os
+import sys
+import time
+import random
+import itertools
+import argparse
+import statistics
+
+# Add the parent directory to sys.path to ensure proper module imports
+sys.path.insert(0, os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+
+from app.utils.search_index import TrigramIndex, tokenize
+
+CONSONANTS = ['b', 'c', 'd', 'f', 'g', 'h', 'k', 'l', 'm', 'n', 'p', 'r', 's', 't', 'v', 'w', 'st', 'tr', 'br', 'ch', 'sh', 'th']
+VOWELS = ['a', 'e', 'i', 'o', 'u', 'ea', 'ou', 'y']
+
+def make_corpus(size, vocabulary_size, seed):
+    """
+    Builds synthetic title summaries
+    
+    Words are drawn with Zipf-like frequencies, like words in real titles,
+    so some trigrams are very common and most are rare.
+    
+    Args:
+        size (int): Number of titles
+        vocabulary_size (int): Number of distinct words
+        seed (int): Random seed
+    
+    Returns:
+        list: Summaries with the keys TrigramIndex reads
+    """
+    rng = random.Random(seed)
+    vocabulary = list({
+        ''.join(
+            rng.choice(CONSONANTS) + rng.choice(VOWELS) + rng.choice(CONSONANTS + [''] * 10)
+            for _ in range(rng.randint(1, 3))
+        )
+        for _ in range(vocabulary_size)
+    })
+    cumulative = list(itertools.accumulate(1 / rank for rank in range(1, len(vocabulary) + 1)))
+    
+    return [
+        {
+            'id': number,
+            'media_type': rng.choice(('movie', 'tv')),
+            'title': ' '.join(rng.choices(vocabulary, cum_weights=cumulative, k=rng.randint(1, 5))),
+            'original_title': None,
+            'popularity': rng.random() * 100
+        }
+        for number in range(1, size + 1)
+    ]
+
+def misspell(title, rng):
+    """
+    Applies one or two random typos to a title
+    
+    Args:
+        title (str): Title to misspell
+        rng (random.Random): Random source
+    
+    Returns:
+        str: Misspelled title
+    """
+    chars = list(' '.join(tokenize(title)))
+    for _ in range(rng.randint(1, 2)):
+        position = rng.randrange(len(chars))
+        typo = rng.choice(('substitute', 'delete', 'insert', 'swap'))
+        if typo == 'substitute':
+            chars[position] = rng.choice('abcdefghijklmnopqrstuvwxyz')
+        elif typo == 'delete' and len(chars) > 3:
+            del chars[position]
+        elif typo == 'insert':
+            chars.insert(position, rng.choice('abcdefghijklmnopqrstuvwxyz'))
+        elif position + 1 < len(chars):
+            chars[position], chars[position + 1] = chars[position + 1], chars[position]
+    return ''.join(chars)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure fuzzy title search latency and recall on a synthetic corpus")
+    parser.add_argument('--titles', type=int, default=200000, help="Number of titles indexed")
+    parser.add_argument('--vocabulary', type=int, default=30000, help="Distinct words titles are made of")
+    parser.add_argument('--queries', type=int, default=2000, help="Misspelled queries timed")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    
+    rng = random.Random(args.seed)
+    corpus = make_corpus(args.titles, args.vocabulary, args.seed)
+    
+    index = TrigramIndex()
+    start = time.perf_counter()
+    index.add_many(corpus)
+    print(f"Indexed {args.titles} titles in {time.perf_counter() - start:.1f} s: {index.stats()}")
+    
+    timings = []
+    found = 0
+    for summary in rng.sample(corpus, args.queries):
+        query = misspell(summary['title'], rng)
+        start = time.perf_counter()
+        results = index.search(query, limit=10)
+        timings.append((time.perf_counter() - start) * 1000)
+        # Titles repeat in the corpus, so any title spelled like the intended one counts
+        if any(result['title'] == summary['title'] for result in results):
+            found += 1
+    
+    timings.sort()
+    print(f"p50 {statistics.median(timings):.2f} ms, "
+          f"p95 {timings[int(len(timings) * 0.95)]:.2f} ms, "
+          f"p99 {timings[int(len(timings) * 0.99)]:.2f} ms, "
+          f"max {timings[-1]:.2f} ms")
+    print(f"Intended title in the top 10 for {found / len(timings):.1%} of misspelled queries")
\ No newline at end of file
@@ -0,0 +1,244 @@
+import os
+import sys
+import time
+import argparse
+import logging
+import numpy as np
+import scipy.sparse as sp
+
+# Add the parent directory to sys.path to ensure proper module imports
+sys.path.insert(0, os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+
+from app.utils.database import Database
+from app.utils.recommendations import interaction_strength, model_dtype
+from app import create_app
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def load_interactions(chunk_size=50000):
+    """
+    Reads every rating and watch into one strength per (user, title)
+    
+    Both tables are read in primary key order, chunk by chunk. A rating
+    replaces whatever the watch history says about the same title.
+    
+    Args:
+        chunk_size (int): Rows read per query
+    
+    Returns:
+        dict: (user_id, content_id) -> interaction strength
+    """
+    interactions = {}
+    
+    for table, key, column in (
+        ('watch_history', 'history_id', 'watch_percentage'),
+        ('user_ratings', 'rating_id', 'rating')
+    ):
+        last_id = 0
+        while True:
+            rows = Database.execute_query(
+                f"""
+                SELECT {key} AS row_id, user_id, content_id, {column} AS value
+                FROM {table}
+                WHERE {key} > %s
+                ORDER BY {key}
+                LIMIT %s
+                """,
+                (last_id, chunk_size)
+            )
+            
+            if not rows:
+                break
+            
+            for row in rows:
+                if column == 'rating':
+                    strength = interaction_strength(rating=row['value'])
+                else:
+                    strength = interaction_strength(watch_percentage=row['value'])
+                interactions[(row['user_id'], row['content_id'])] = strength
+            
+            last_id = rows[-1]['row_id']
+    
+    return interactions
+
+def build_matrix(interactions, min_users):
+    """
+    Builds the sparse title x user matrix with unit-length rows
+    
+    Args:
+        interactions (dict): (user_id, content_id) -> interaction strength
+        min_users (int): Titles with fewer users are left out
+    
+    Returns:
+        tuple: (CSR matrix, content_ids of its rows, user count of each row)
+    """
+    users = {}
+    titles = {}
+    rows, columns, values = [], [], []
+    
+    for (user_id, content_id), strength in interactions.items():
+        rows.append(titles.setdefault(content_id, len(titles)))
+        columns.append(users.setdefault(user_id, len(users)))
+        values.append(strength)
+    
+    matrix = sp.csr_matrix(
+        (np.asarray(values, dtype=np.float32), (np.asarray(rows), np.asarray(columns))),
+        shape=(len(titles), len(users))
+    )
+    
+    counts = np.diff(matrix.indptr)
+    keep = np.flatnonzero(counts >= min_users)
+    matrix = matrix[keep]
+    content_ids = np.asarray(list(titles), dtype=object)[keep]
+    
+    # Unit-length rows make each dot product a cosine similarity
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    matrix = sp.diags(1 / np.maximum(norms, 1e-12)).dot(matrix).tocsr()
+    
+    return matrix, content_ids, counts[keep]
+
+def top_k_similarities(matrix, neighbors, shrinkage, block_size=2048):
+    """
+    Finds each title's most similar titles by cosine similarity
+    
+    Similarities are computed a block of titles at a time, so memory use is
+    bounded by the block rather than the full title x title matrix. Each
+    similarity is damped by n / (n + shrinkage), n being the number of users
+    the two titles share, so pairs seen together by one or two users do not
+    dominate.
+    
+    Args:
+        matrix (scipy.sparse.csr_matrix): Title x user matrix with unit-length rows
+        neighbors (int): Similar titles kept per title
+        shrinkage (float): Damping constant; 0 disables it
+        block_size (int): Titles per block
+    
+    Returns:
+        tuple: (neighbor row indices, -1 padded; their similarities), each titles x neighbors
+    """
+    title_count = matrix.shape[0]
+    top_indices = np.full((title_count, neighbors), -1, dtype=np.int32)
+    top_scores = np.zeros((title_count, neighbors), dtype=np.float32)
+    
+    binary = matrix.copy()
+    binary.data[:] = 1
+    transposed = matrix.T.tocsc()
+    binary_transposed = binary.T.tocsc()
+    
+    for start in range(0, title_count, block_size):
+        stop = min(start + block_size, title_count)
+        similarities = matrix[start:stop].dot(transposed).tocsr()
+        similarities.sort_indices()
+        
+        if shrinkage:
+            shared = binary[start:stop].dot(binary_transposed).tocsr()
+            shared.sort_indices()
+            similarities.data *= shared.data / (shared.data + shrinkage)
+        
+        for row in range(stop - start):
+            low, high = similarities.indptr[row], similarities.indptr[row + 1]
+            columns = similarities.indices[low:high]
+            scores = similarities.data[low:high]
+            
+            others = columns != start + row
+            columns, scores = columns[others], scores[others]
+            
+            if len(scores) > neighbors:
+                best = np.argpartition(-scores, neighbors - 1)[:neighbors]
+                columns, scores = columns[best], scores[best]
+            
+            order = np.argsort(-scores, kind='stable')
+            top_indices[start + row, :len(order)] = columns[order]
+            top_scores[start + row, :len(order)] = scores[order]
+        
+        logger.info(f"Computed similarities for {stop}/{title_count} titles")
+    
+    return top_indices, top_scores
+
+def write_model(path, content_ids, users, top_indices, top_scores):
+    """
+    Writes the recommendations file workers memory-map
+    
+    Records are sorted by content_id so workers can binary-search them. The
+    file is written under a temporary name and moved into place, so workers
+    never map a partial file.
+    
+    Args:
+        path (str): Recommendations file
+        content_ids (numpy.ndarray): content_id of each title
+        users (numpy.ndarray): User count of each title
+        top_indices (numpy.ndarray): Neighbor row indices, -1 padded
+        top_scores (numpy.ndarray): Neighbor similarities
+    """
+    encoded = np.asarray([content_id.encode() for content_id in content_ids])
+    width = max(encoded.dtype.itemsize, 1)
+    order = np.argsort(encoded, kind='stable')
+    
+    # Neighbors point at rows before sorting; map them to sorted positions
+    position = np.empty(len(order), dtype=np.int32)
+    position[order] = np.arange(len(order), dtype=np.int32)
+    neighbors = np.where(top_indices >= 0, position[np.maximum(top_indices, 0)], -1)
+    
+    records = np.zeros(len(order), dtype=model_dtype(width, top_indices.shape[1]))
+    records['content_id'] = encoded[order]
+    records['users'] = users[order]
+    records['neighbors'] = neighbors[order]
+    records['scores'] = top_scores[order]
+    
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, 'wb') as model_file:
+        np.save(model_file, records)
+    os.replace(temp_path, path)
+
+def build_recommendations(path, neighbors, min_users, shrinkage):
+    """
+    Rebuilds the recommendations file from user_ratings and watch_history
+    
+    Args:
+        path (str): Recommendations file
+        neighbors (int): Similar titles kept per title
+        min_users (int): Titles with fewer users are left out
+        shrinkage (float): Similarity damping constant
+    
+    Returns:
+        int: Number of titles written
+    """
+    started = time.monotonic()
+    
+    interactions = load_interactions()
+    logger.info(f"Loaded {len(interactions)} interactions")
+    
+    matrix, content_ids, users = build_matrix(interactions, min_users)
+    logger.info(f"Built a {matrix.shape[0]} x {matrix.shape[1]} matrix with {matrix.nnz} entries")
+    
+    if not matrix.shape[0]:
+        logger.warning("No title has enough users; keeping the current recommendations")
+        return 0
+    
+    top_indices, top_scores = top_k_similarities(matrix, neighbors, shrinkage)
+    write_model(path, content_ids, users, top_indices, top_scores)
+    
+    logger.info(f"Wrote {path} in {time.monotonic() - started:.1f} s")
+    return len(content_ids)
+
+if __name__ == "__main__":
+    app = create_app('development')
+    
+    parser = argparse.ArgumentParser(description="Build item-item recommendations from ratings and watch history")
+    parser.add_argument('--output', default=app.config.get('RECOMMENDATIONS_FILE', 'recommendations.npy'),
+                        help="Recommendations file workers memory-map")
+    parser.add_argument('--neighbors', type=int, default=app.config.get('RECOMMENDATIONS_NEIGHBORS', 50),
+                        help="Similar titles kept per title")
+    parser.add_argument('--min-users', type=int, default=app.config.get('RECOMMENDATIONS_MIN_USERS', 2),
+                        help="Titles with fewer users are left out")
+    parser.add_argument('--shrinkage', type=float, default=app.config.get('RECOMMENDATIONS_SHRINKAGE', 10.0),
+                        help="Damps similarities backed by few shared users; 0 disables it")
+    args = parser.parse_args()
+    
+    with app.app_context():
+        written = build_recommendations(args.output, args.neighbors, args.min_users, args.shrinkage)
+        print(f"Wrote recommendations for {written} title(s)")
\ No newline at end of file
@@ -0,0 +1,58 @@
+import time
+import argparse
+import statistics
+import bcrypt
+
+def measure_cost(rounds, samples):
+    """
+    Measures how long one bcrypt hash takes at a given cost on this host
+    
+    Args:
+        rounds (int): bcrypt cost factor
+        samples (int): Number of hashes to time
+    
+    Returns:
+        float: Median hash time in milliseconds
+    """
+    timings = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        bcrypt.hashpw(b'calibration password', bcrypt.gensalt(rounds))
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+def recommend_cost(timings, target_ms):
+    """
+    Picks the highest cost whose hash time fits the target
+    
+    Args:
+        timings (dict): Cost factor -> median hash time in milliseconds
+        target_ms (float): Hash time budget in milliseconds
+    
+    Returns:
+        int: Recommended cost, or the lowest measured cost if none fits
+    """
+    fitting = [rounds for rounds, elapsed in timings.items() if elapsed <= target_ms]
+    return max(fitting) if fitting else min(timings)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure bcrypt hash time on this host and recommend BCRYPT_ROUNDS")
+    parser.add_argument('--target-ms', type=float, default=250.0,
+                        help="Hash time budget per login, in milliseconds")
+    parser.add_argument('--min-cost', type=int, default=10)
+    parser.add_argument('--max-cost', type=int, default=16)
+    parser.add_argument('--samples', type=int, default=3, help="Hashes timed per cost")
+    args = parser.parse_args()
+    
+    timings = {}
+    for rounds in range(args.min_cost, args.max_cost + 1):
+        timings[rounds] = measure_cost(rounds, args.samples)
+        print(f"cost {rounds:2d}: {timings[rounds]:9.1f} ms")
+        
+        # Each step doubles the work; stop once we are well past the budget
+        if timings[rounds] > args.target_ms * 2:
+            break
+    
+    recommended = recommend_cost(timings, args.target_ms)
+    print(f"\nRecommended for a {args.target_ms:.0f} ms budget: BCRYPT_ROUNDS={recommended}")
+    print("Existing hashes are upgraded to the new cost on each user's next successful login.")
\ No newline at end of file
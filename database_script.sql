@@ -87,7 +87,8 @@ CREATE TABLE watch_history (
     watched_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     watch_duration INT DEFAULT 0, -- in seconds
     watch_percentage DECIMAL(5,2) DEFAULT 0,
-    FOREIGN KEY (user_id) REFERENCES users(user_id)
+    FOREIGN KEY (user_id) REFERENCES users(user_id),
+    UNIQUE KEY unique_watch (user_id, content_id)
 );
 
 -- User favorites
@@ -124,14 +125,20 @@ CREATE TABLE user_ratings (
 );
 
 -- Audit log for tracking important actions
+-- Range-partitioned by month; backend/scripts/audit_retention.py splits pmax into
+-- upcoming monthly partitions and archives expired ones. Partitioned tables
+-- cannot have foreign keys, and the primary key must include created_at.
 CREATE TABLE audit_log (
-    log_id INT AUTO_INCREMENT PRIMARY KEY,
+    log_id INT AUTO_INCREMENT,
     user_id INT,
     action VARCHAR(255) NOT NULL,
     details TEXT,
     ip_address VARCHAR(45),
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    FOREIGN KEY (user_id) REFERENCES users(user_id)
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (log_id, created_at)
+)
+PARTITION BY RANGE (UNIX_TIMESTAMP(created_at)) (
+    PARTITION pmax VALUES LESS THAN MAXVALUE
 );
 
 -- Create password_reset_tokens table
@@ -144,9 +151,40 @@ CREATE TABLE IF NOT EXISTS password_reset_tokens (
     FOREIGN KEY (user_id) REFERENCES users(user_id)
 );
 
+-- Content metadata mirrored from TMDB, keyed like favorites and watch history
+CREATE TABLE content_metadata (
+    content_id VARCHAR(50) PRIMARY KEY,
+    media_type ENUM('movie', 'tv') NOT NULL,
+    tmdb_id INT NOT NULL,
+    title VARCHAR(500),
+    original_title VARCHAR(500),
+    overview TEXT,
+    poster_path VARCHAR(255),
+    backdrop_path VARCHAR(255),
+    vote_average FLOAT,
+    popularity FLOAT,
+    release_date DATE NULL,
+    fetched_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Users whose subscription or access code changed, read by every app worker
+-- to drop its cached entitlements
+CREATE TABLE entitlement_changes (
+    change_id BIGINT AUTO_INCREMENT PRIMARY KEY,
+    user_id INT NOT NULL,
+    changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
 -- Create indexes
 CREATE INDEX idx_users_role ON users(role_id);
 CREATE INDEX idx_subscriptions_user ON subscriptions(user_id);
 CREATE INDEX idx_access_codes_created_by ON access_codes(created_by);
 CREATE INDEX idx_watch_history_user ON watch_history(user_id);
-CREATE INDEX idx_favorites_user ON favorites(user_id); 
\ No newline at end of file
+CREATE INDEX idx_favorites_user ON favorites(user_id);
+CREATE INDEX idx_content_metadata_fetched ON content_metadata(fetched_at);
+CREATE INDEX idx_entitlement_changes_changed ON entitlement_changes(changed_at);
+CREATE INDEX idx_users_created ON users(created_at, user_id);
+CREATE INDEX idx_subscriptions_start ON subscriptions(start_date, subscription_id);
+CREATE INDEX idx_audit_log_created ON audit_log(created_at, log_id);
+CREATE INDEX idx_audit_log_action_created ON audit_log(action, created_at, log_id);
+CREATE INDEX idx_audit_log_user_created ON audit_log(user_id, created_at, log_id);
\ No newline at end of file